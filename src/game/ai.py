@@ -1,22 +1,165 @@
 # src/game/ai.py
+import json
 import math
+import os
 import random
 import time
 from game.game import GameState
 from utils.utils import WHITE, BLACK, EMPTY, MILLS
 
+# transposition table bound flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# the same bound seen from the other side
+FLIPPED = {EXACT: EXACT, LOWER: UPPER, UPPER: LOWER}
+
+# a win scores WIN_SCORE + remaining depth, so sooner wins score higher;
+# scores at or beyond MATE_THRESHOLD are forced wins / losses
+WIN_SCORE = 1000000
+MATE_THRESHOLD = 900000
+
+# repeated positions and rule draws
+DRAW_SCORE = 0
+
+# evaluation weights: per piece, per legal move, per open two-in-a-row.
+# Tuned values (python -m game.tuning) are read from WEIGHTS_FILE if present.
+DEFAULT_WEIGHTS = {'piece': 100, 'mobility': 5, 'mill': 30}
+WEIGHTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eval_weights.json')
+
+
+def load_weights(path=None):
+    """
+    Evaluation weights from a JSON config ({"piece": .., "mobility": ..,
+    "mill": ..}); missing keys, or a missing default file, keep the
+    defaults.
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    if path is None:
+        path = WEIGHTS_FILE
+        if not os.path.exists(path):
+            return weights
+    with open(path) as f:
+        data = json.load(f)
+    for name in DEFAULT_WEIGHTS:
+        if name in data:
+            weights[name] = data[name]
+    return weights
+
 
 class AIPlayer:
     """
     Iterative deepening minimax with alpha-beta and mate-shortening preference.
+    Aspiration windows at the root, PVS and late-move reductions below it.
+    With shared_tt, keep_tt and TT_MAX_ENTRIES are ignored: the shared table
+    is never cleared by a search, and every player using it must have the
+    same weights and evaluator.
     """
 
-    def __init__(self, color=BLACK, max_time=1.8, max_win_moves=0):
+    # entries kept across searches before the table is reset
+    TT_MAX_ENTRIES = 500000
+
+    # aspiration window half-width around the previous iteration's score
+    ASPIRATION_WINDOW = 50
+
+    # late-move reductions: moves searched at full depth first, minimum depth
+    LMR_FULL_MOVES = 3
+    LMR_MIN_DEPTH = 3
+
+    # disk cache: exact results are also stored for the first CACHE_PLIES
+    # plies below the root (later searches may start there), when at least
+    # CACHE_MIN_DEPTH deep
+    CACHE_PLIES = 2
+    CACHE_MIN_DEPTH = 2
+
+    def __init__(self, color=BLACK, max_time=1.8, max_nodes=0, max_depth=0, seed=None,
+                 keep_tt=False, aspiration=True, pvs=True, lmr=True, multi_pv=1,
+                 weights=None, evaluator=None, disk_cache=None, shared_tt=None):
         self.color = color
+
+        # evaluation weights (dict like DEFAULT_WEIGHTS, or a config path)
+        from_config = weights is None or isinstance(weights, str)
+        config = weights if from_config else None
+        if from_config:
+            weights = load_weights(config)
+        self.weights = dict(DEFAULT_WEIGHTS, **weights)
+        self.piece_weight = self.weights['piece']
+        self.mobility_weight = self.weights['mobility']
+        self.mill_weight = self.weights['mill']
+
+        # optional replacement for evaluate(): an object with
+        # evaluate(state, color) (and optionally prepare(root_state)),
+        # 'pattern' for game.patterns tables or 'nnue' for game.nnue
+        if evaluator == 'pattern':
+            from game.patterns import PatternEvaluator
+            if from_config:
+                evaluator = PatternEvaluator.from_config(config)
+            else:
+                evaluator = PatternEvaluator(self.weights)
+        elif evaluator == 'nnue':
+            from game.nnue import NNUEEvaluator
+            evaluator = NNUEEvaluator.load()
+        self.evaluator = evaluator
+
+        # search limits, combinable; 0 disables a limit. Node and depth
+        # limits cost the same on any machine, so with a seed the
+        # AI plays identically from run to run.
         self.max_time = float(max_time)
-        self.max_win_moves = int(max_win_moves)
+        self.max_nodes = int(max_nodes)
+        self.max_depth = int(max_depth)
+        self.rng = random.Random(seed)
+
+        self.keep_tt = bool(keep_tt)
+
+        # optional persistent analysis cache (game.disk_cache): True for the
+        # default file, a path, or a DiskCache; consulted at the root only.
+        # Rows are tagged with the evaluation.
+        if disk_cache is True or isinstance(disk_cache, str):
+            from game.disk_cache import DiskCache
+            disk_cache = DiskCache.shared(None if disk_cache is True else disk_cache)
+        self.disk_cache = disk_cache or None
+        name = 'classic' if self.evaluator is None else type(self.evaluator).__name__
+        self.cache_namespace = name + json.dumps(self.weights, sort_keys=True)
+        self._iteration_depth = 0
+
+        # search enhancements (switchable to measure their effect)
+        self.aspiration = bool(aspiration)
+        self.pvs = bool(pvs)
+        self.lmr = bool(lmr)
+
+        # root moves scored per iteration (N-best analysis); 1 = best only
+        self.multi_pv = max(1, int(multi_pv))
+
         self.start_time = 0
-        self.transposition = {}
+        self.nodes = 0
+
+        # a game.shared_tt.SharedTT replaces the private table: it is kept
+        # across searches and shared with every process attached to it
+        # (ValueError if it already serves other evaluation settings)
+        if shared_tt is not None:
+            shared_tt.bind(self.cache_namespace)
+        self.shared_tt = shared_tt
+        self.transposition = {} if shared_tt is None else shared_tt
+
+        # transposition table statistics of the last search: lookups,
+        # entries found for the same depth, and cutoffs they gave
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+
+        # plies to the forced win found by the last search (None if none)
+        self.mate_distance = None
+
+        # last completed iteration: depth and score (self.color's view),
+        # and its best root lines [(score, (move, cap), mate), ...]
+        self.completed_depth = 0
+        self.score = None
+        self.lines = []
+
+        # set from another thread to end the running search early
+        self.stop_requested = False
+
+        # optional callback(ai, depth, score, choice) after each iteration
+        self.on_iteration = None
 
     # ======================================================================
     # PUBLIC: choose_move
@@ -32,110 +175,336 @@ class AIPlayer:
         # ---------------------------------------------------------
         # 1. NORMAL AI SEARCH (iterative deepening)
         # ---------------------------------------------------------
-        result = self._search(state) if self.max_time > 0 else None
+        # Won positions are converted by the search itself: mate scores
+        # prefer the shortest forced win.
+        limited = self.max_time > 0 or self.max_nodes > 0 or self.max_depth > 0
+        result = self._search(state) if limited else None
 
         if result is None:
             # fallback: random legal move for current player (AI turn)
             legal = state.legal_moves()
             if not legal:
                 return None
-            move = random.choice(legal)
+            move = self.rng.choice(legal)
             cap = None
         else:
             move, cap = result
 
-        # ---------------------------------------------------------
-        # 2. ENDGAME MAX-MOVES-TO-WIN RULE
-        # ---------------------------------------------------------
-        ai_pieces = state.pieces_count(self.color)
-        opp_pieces = state.pieces_count(-self.color)
-
-        if ai_pieces == 3 and opp_pieces in (3, 4) and self.max_win_moves > 0:
-            # count only AI moves in this specific endgame pattern
-            state.ai_endgame_moves += 1
-
-            if state.ai_endgame_moves >= self.max_win_moves:
-                # next move is random (but only if there are legal moves)
-                legal = state.legal_moves()
-                if legal:
-                    move = random.choice(legal)
-                    cap = None
-                # reset counter after random move
-                state.ai_endgame_moves = 0
-
         return move, cap
 
+    def analyze(self, state):
+        """
+        Searches `state` for its side to move without modifying it (its
+        ai_endgame_moves included). Returns a dict:
+            choice (move, cap) or None, score (side to move's view),
+            depth, nodes, mate (plies) and pv [(move, cap), ...];
+            lines: the best root moves (multi_pv of them), each a dict
+            with choice, score, mate and pv.
+        """
+        if state.current != self.color:
+            # scores are stored from self.color's view: start a fresh table
+            # (a shared table stores them from the side to move's view)
+            self.color = state.current
+            if self.shared_tt is None:
+                self.transposition.clear()
+        state = state.clone()
+
+        if state.is_game_over()[0]:
+            return {'choice': None, 'score': None, 'depth': 0, 'nodes': 0,
+                    'mate': None, 'pv': [], 'lines': []}
+
+        choice = self.choose_move(state)
+        depth = self.completed_depth
+        pv = self.principal_variation(state, choice, depth) if choice else []
+        lines = [
+            {'choice': ch, 'score': sc, 'mate': mate,
+             'pv': self.principal_variation(state, ch, depth)}
+            for sc, ch, mate in self.lines
+        ]
+        return {
+            'choice': choice,
+            'score': self.score,
+            'depth': depth,
+            'nodes': self.nodes,
+            'mate': self.mate_distance,
+            'pv': pv,
+            'lines': lines,
+        }
+
+    def analyze_many(self, positions, limits=None, processes=1, cache_size=100000):
+        """
+        Analyzes an iterable of GameStates (or notation strings) with this
+        player's settings, yielding (index, result) in completion order.
+        See game.analysis.analyze_many.
+        """
+        from game.analysis import analyze_many
+        settings = {
+            'max_time': self.max_time, 'max_nodes': self.max_nodes,
+            'max_depth': self.max_depth, 'aspiration': self.aspiration,
+            'pvs': self.pvs, 'lmr': self.lmr, 'multi_pv': self.multi_pv,
+            'weights': self.weights, 'evaluator': self.evaluator,
+        }
+        settings.update(limits or {})
+        return analyze_many(positions, settings, processes=processes, cache_size=cache_size)
+
+    def principal_variation(self, state, choice, depth):
+        """
+        Expected line [(move, cap), ...] starting with the root `choice`,
+        read back from the transposition table (may be shorter than depth).
+        """
+        pv = []
+        s = state
+        maximizing = True
+        seen = set()
+        while choice is not None and depth > 0:
+            pv.append(choice)
+            s = s.apply_move(choice[0], remove_pos=choice[1])
+            depth -= 1
+            maximizing = not maximizing
+            key = s.position_key() + (depth, maximizing)
+            if key in seen:
+                break
+            seen.add(key)
+            entry = self.transposition.get(key)
+            choice = entry[3] if entry is not None else None
+        return pv
+
     # ======================================================================
     # PRIVATE: iterative deepening search
     # ======================================================================
     def _search(self, state):
         """
-        Iterative deepening over _search_root until time runs out.
+        Iterative deepening over _search_root until a limit is reached
+        (time, nodes, or max_depth completed).
         Returns (move, cap) or None.
         """
         self.start_time = time.time()
-        self.transposition.clear()
+        self.nodes = 0
+        self.tt_probes = self.tt_hits = self.tt_cutoffs = 0
+        self.completed_depth = 0
+        self.score = None
+        self.lines = []
+        if self.shared_tt is None and (not self.keep_tt or len(self.transposition) > self.TT_MAX_ENTRIES):
+            self.transposition.clear()
+
+        prepare = getattr(self.evaluator, 'prepare', None)
+        if prepare is not None:
+            # incremental evaluators attach their state to a private root copy
+            state = state.clone()
+            prepare(state)
 
         best_choice = None
         best_mate = None
+        prev_score = None
         depth = 1
 
+        # a result from an earlier session: played outright when it is as
+        # deep as this search may go, otherwise its move is searched first
+        cached = self._cache_root(state)
+        if cached is not None:
+            if self.max_depth and cached[0] >= self.max_depth:
+                return self._use_cached(cached)
+            best_choice = cached[3]
+
         try:
-            while True:
-                score, choice, mate_dist = self._search_root(state, depth)
+            while not self.max_depth or depth <= self.max_depth:
+                self._iteration_depth = depth
+                if self.multi_pv > 1:
+                    lines = self._search_multi_pv(state, depth, self.lines)
+                    score, choice, mate_dist = lines[0] if lines else (-math.inf, None, None)
+                else:
+                    score, choice, mate_dist = self._search_aspiration(state, depth, prev_score, best_choice)
+                    lines = [(score, choice, mate_dist)] if choice is not None else []
                 if choice is not None:
                     best_choice = choice
                     best_mate = mate_dist
+                prev_score = score
+                self.completed_depth = depth
+                self.score = score
+                # mate distances counted from the root, as mate_distance
+                self.lines = [(sc, ch, None if m is None else m + 1) for sc, ch, m in lines]
+                if self.on_iteration is not None:
+                    self.on_iteration(self, depth, score, choice)
+                if score >= MATE_THRESHOLD:
+                    # forced win proven within this depth; as win scores
+                    # favour fewer plies, this is already the shortest one
+                    break
                 depth += 1
         except TimeoutError:
             pass
 
+        # a deeper cached result, unless this search proved a forced win / loss
+        if (cached is not None and cached[0] > self.completed_depth
+                and (self.score is None or abs(self.score) < MATE_THRESHOLD)):
+            return self._use_cached(cached)
+        if (self.disk_cache is not None and best_choice is not None and self.completed_depth
+                and abs(self.score) < MATE_THRESHOLD):
+            self.disk_cache.store(state, self.completed_depth, EXACT, self.score, best_choice,
+                                  self.cache_namespace)
+            # committed before returning, so the next search (in this
+            # process or another) finds this one's results
+            self.disk_cache.flush()
+
+        # plies from the root: the root move plus the child's distance
+        self.mate_distance = best_mate + 1 if best_mate is not None else None
         return best_choice
 
+    def _cache_root(self, state):
+        """
+        Exact disk cache entry for the root with a legal move, or None.
+        Single-line searches only: multi-PV needs every line.
+        """
+        if self.disk_cache is None or self.multi_pv > 1:
+            return None
+        cached = self.disk_cache.lookup(state, self.cache_namespace)
+        if cached is None or cached[1] != EXACT or cached[3] is None:
+            return None
+        return cached
+
+    def _use_cached(self, cached):
+        depth, _, score, choice = cached
+        self.completed_depth = depth
+        self.score = score
+        self.lines = [(score, choice, None)]
+        self.mate_distance = None
+        return choice
+
+    def _search_multi_pv(self, state, depth, prev_lines):
+        """
+        The best `multi_pv` root lines at this depth, best first. Line k is
+        the best root move once lines 0..k-1 are excluded; each search
+        reuses the transposition table filled by the previous ones.
+        """
+        lines = []
+        excluded = set()
+        for k in range(self.multi_pv):
+            prev_score, prev_choice = None, None
+            if k < len(prev_lines):
+                prev_score, prev_choice = prev_lines[k][0], prev_lines[k][1]
+                if prev_choice in excluded:
+                    prev_choice = None
+            score, choice, mate_dist = self._search_aspiration(
+                state, depth, prev_score, prev_choice, excluded)
+            if choice is None:
+                break
+            lines.append((score, choice, mate_dist))
+            excluded.add(choice)
+        lines.sort(key=lambda line: -line[0])
+        return lines
+
+    def _search_aspiration(self, state, depth, prev_score, prev_choice, exclude=()):
+        """
+        Root search in a narrow window around the previous iteration's
+        score; a fail low/high re-searches with that side opened up.
+        """
+        alpha, beta = -math.inf, math.inf
+        if self.aspiration and prev_score is not None and abs(prev_score) < MATE_THRESHOLD:
+            alpha = prev_score - self.ASPIRATION_WINDOW
+            beta = prev_score + self.ASPIRATION_WINDOW
+
+        while True:
+            score, choice, mate_dist = self._search_root(state, depth, alpha, beta, prev_choice, exclude)
+            if score <= alpha and alpha > -math.inf:
+                alpha = -math.inf
+            elif score >= beta and beta < math.inf:
+                beta = math.inf
+                prev_choice = choice or prev_choice
+            else:
+                return score, choice, mate_dist
+
+    def _check_limits(self):
+        """
+        Aborts the running iteration (TimeoutError) once the time or node
+        budget is spent; the previous iteration's move is then played.
+        """
+        if self.stop_requested:
+            raise TimeoutError()
+        if self.max_nodes and self.nodes >= self.max_nodes:
+            raise TimeoutError()
+        if self.max_time > 0 and time.time() - self.start_time > self.max_time:
+            raise TimeoutError()
+
     # ======================================================================
     # ROOT SEARCH
     # ======================================================================
-    def _search_root(self, state, depth):
+    def _search_root(self, state, depth, alpha=-math.inf, beta=math.inf, first=None, exclude=()):
         """
         Search from root for the current player (state.current).
         IMPORTANT: here we assume state.current == self.color.
+        `first` (move, cap) is searched first, normally the previous best;
+        root choices in `exclude` are skipped (multi-PV).
         """
-        moves = state.legal_moves()
-        random.shuffle(moves)
+        children = self._root_children(state, first)
+        if exclude:
+            children = [c for c in children if (c[0], c[1]) not in exclude]
 
         best_score = -math.inf
         best_choice = None
         best_mate = None
-        alpha = -math.inf
-        beta = math.inf
 
-        for move in moves:
-            if time.time() - self.start_time > self.max_time:
-                raise TimeoutError()
+        for i, (move, cap, quiet) in enumerate(children):
+            self._check_limits()
 
             # apply the move (this also flips turn inside GameState)
-            if state.last_move_forms_mill(move):
-                # must consider all captures
-                captures = state.can_capture_positions()
-                for cap in captures:
-                    new_state = state.apply_move(move, remove_pos=cap)
-                    val, mate_dist = self._minimax_with_mate(new_state, depth - 1, alpha, beta, maximizing=False)
-                    if val > best_score:
-                        best_score = val
-                        best_choice = (move, cap)
-                        best_mate = mate_dist
-                    alpha = max(alpha, val)
-            else:
-                new_state = state.apply_move(move, remove_pos=None)
-                val, mate_dist = self._minimax_with_mate(new_state, depth - 1, alpha, beta, maximizing=False)
-                if val > best_score:
-                    best_score = val
-                    best_choice = (move, None)
-                    best_mate = mate_dist
-                alpha = max(alpha, val)
+            new_state = state.apply_move(move, remove_pos=cap)
+            val, mate_dist = self._search_child(new_state, depth, alpha, beta, True, i, quiet)
+            if val > best_score:
+                best_score = val
+                best_choice = (move, cap)
+                best_mate = mate_dist
+            alpha = max(alpha, val)
+            if alpha >= beta:
+                break
 
         return best_score, best_choice, best_mate
 
+    # ======================================================================
+    # CHILD SEARCH: PVS + LATE-MOVE REDUCTIONS
+    # ======================================================================
+    def _search_child(self, child, depth, alpha, beta, maximizing, index, quiet):
+        """
+        Searches one child of a node at `depth` (maximizing = parent's role).
+        The first child gets the full window. Later children are tried with
+        a zero window (PVS) and, if quiet and late, one ply shallower (LMR);
+        a result that beats the bound is re-searched at full depth/window.
+        """
+        d = depth - 1
+        reduce = (self.lmr and quiet and index >= self.LMR_FULL_MOVES
+                  and depth >= self.LMR_MIN_DEPTH)
+
+        if index == 0 or not (self.pvs or reduce):
+            return self._minimax_with_mate(child, d, alpha, beta, not maximizing)
+
+        if not self.pvs:
+            lo, hi = alpha, beta
+        elif maximizing:
+            lo, hi = alpha, alpha + 1
+        else:
+            lo, hi = beta - 1, beta
+
+        val, mate_dist = self._minimax_with_mate(child, d - 1 if reduce else d, lo, hi, not maximizing)
+
+        improves = val > alpha if maximizing else val < beta
+        if improves and (reduce or alpha < val < beta):
+            val, mate_dist = self._minimax_with_mate(child, d, alpha, beta, not maximizing)
+        return val, mate_dist
+
+    def _root_children(self, state, first=None):
+        """
+        All (move, cap, quiet) children of the root, shuffled for variety
+        but keeping mill moves before quiet ones and `first` in front.
+        """
+        children = list(state.iter_children())
+        self.rng.shuffle(children)
+        children.sort(key=lambda child: child[2])
+
+        if first is not None:
+            entry = (first[0], first[1], first[1] is None)
+            if entry in children:
+                children.remove(entry)
+                children.insert(0, entry)
+        return children
+
     # ======================================================================
     # MINIMAX WITH MATE DISTANCE
     # ======================================================================
@@ -146,93 +515,98 @@ class AIPlayer:
         - mate_distance: None if no forced mate found in this subtree,
                          otherwise number of plies until mate.
         """
-        if time.time() - self.start_time > self.max_time:
-            raise TimeoutError()
+        self.nodes += 1
+        self._check_limits()
 
         over, winner = state.is_game_over()
         if over:
             if winner == self.color:
                 # immediate win: mate in 0 plies
-                return 1000000 + depth, 0
+                return WIN_SCORE + depth, 0
+            elif winner is None:
+                # draw by rule
+                return DRAW_SCORE, None
             else:
-                return -1000000 - depth, None
+                return -WIN_SCORE - depth, None
+
+        # a position repeated on the path (or in the game) is a draw:
+        # shuffling back and forth can't gain anything
+        if state.phase == 'moving' and state.is_repetition():
+            return DRAW_SCORE, None
 
-        if depth == 0:
+        if depth <= 0:
             return self.evaluate(state), None
 
-        key = (tuple(state.board), state.current, state.phase, depth, maximizing)
-        if key in self.transposition:
-            return self.transposition[key]
-
-        moves = state.legal_moves()
-        if not moves:
-            return (-1000000 if maximizing else 1000000), None
-
-        if maximizing:
-            value = -math.inf
-            best_mate = None
-
-            for move in moves:
-                if time.time() - self.start_time > self.max_time:
-                    raise TimeoutError()
-
-                if state.last_move_forms_mill(move):
-                    captures = state.can_capture_positions()
-                    for cap in captures:
-                        new_state = state.apply_move(move, remove_pos=cap)
-                        val, mate_dist = self._minimax_with_mate(new_state, depth - 1, alpha, beta, False)
-                        if val > value:
-                            value = val
-                            best_mate = mate_dist
-                        alpha = max(alpha, value)
-                        if alpha >= beta:
-                            break
-                else:
-                    new_state = state.apply_move(move, remove_pos=None)
-                    val, mate_dist = self._minimax_with_mate(new_state, depth - 1, alpha, beta, False)
-                    if val > value:
-                        value = val
-                        best_mate = mate_dist
-                    alpha = max(alpha, value)
-                    if alpha >= beta:
-                        break
-
-            mate_result = best_mate + 1 if best_mate is not None else None
-            self.transposition[key] = (value, mate_result)
-            return value, mate_result
+        # mate-distance pruning: no child can score above a win on the next
+        # ply or below a loss on the next ply
+        if alpha >= WIN_SCORE + depth - 1:
+            return alpha, None
+        if beta <= -WIN_SCORE - depth + 1:
+            return beta, None
+
+        # transposition entry: (value, mate, bound flag, best (move, cap))
+        key = state.position_key() + (depth, maximizing)
+        entry = self.transposition.get(key)
+        self.tt_probes += 1
+        if entry is None:
+            # previous iteration's best move, for ordering only
+            entry = self.transposition.get(key[:3] + (depth - 1, maximizing))
+            tt_choice = entry[3] if entry is not None else None
+        else:
+            self.tt_hits += 1
+            value, mate_result, flag, tt_choice = entry
+            if (flag == EXACT or (flag == LOWER and value >= beta)
+                    or (flag == UPPER and value <= alpha)):
+                self.tt_cutoffs += 1
+                return value, mate_result
+
+        alpha_orig, beta_orig = alpha, beta
+        value = -math.inf if maximizing else math.inf
+        best_mate = None
+        best_choice = None
+
+        # staged generation: mill tests and captures are only computed
+        # for the children actually reached before a cutoff
+        i = -1
+        for i, (move, cap, quiet) in enumerate(state.iter_children(tt_choice)):
+            self._check_limits()
+
+            new_state = state.apply_move(move, remove_pos=cap)
+            val, mate_dist = self._search_child(new_state, depth, alpha, beta, maximizing, i, quiet)
 
+            if maximizing:
+                if val > value:
+                    value = val
+                    best_mate = mate_dist
+                    best_choice = (move, cap)
+                alpha = max(alpha, value)
+            else:
+                if val < value:
+                    value = val
+                    best_mate = mate_dist
+                    best_choice = (move, cap)
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if i < 0:
+            return (-WIN_SCORE if maximizing else WIN_SCORE), None
+
+        if value <= alpha_orig:
+            flag = UPPER
+        elif value >= beta_orig:
+            flag = LOWER
         else:
-            value = math.inf
-            best_mate = None
-
-            for move in moves:
-                if time.time() - self.start_time > self.max_time:
-                    raise TimeoutError()
-
-                if state.last_move_forms_mill(move):
-                    captures = state.can_capture_positions()
-                    for cap in captures:
-                        new_state = state.apply_move(move, remove_pos=cap)
-                        val, mate_dist = self._minimax_with_mate(new_state, depth - 1, alpha, beta, True)
-                        if val < value:
-                            value = val
-                            best_mate = mate_dist
-                        beta = min(beta, value)
-                        if alpha >= beta:
-                            break
-                else:
-                    new_state = state.apply_move(move, remove_pos=None)
-                    val, mate_dist = self._minimax_with_mate(new_state, depth - 1, alpha, beta, True)
-                    if val < value:
-                        value = val
-                        best_mate = mate_dist
-                    beta = min(beta, value)
-                    if alpha >= beta:
-                        break
-
-            mate_result = best_mate + 1 if best_mate is not None else None
-            self.transposition[key] = (value, mate_result)
-            return value, mate_result
+            flag = EXACT
+
+        mate_result = best_mate + 1 if best_mate is not None else None
+        self.transposition[key] = (value, mate_result, flag, best_choice)
+        if (self.disk_cache is not None and flag == EXACT and depth >= self.CACHE_MIN_DEPTH
+                and depth >= self._iteration_depth - self.CACHE_PLIES and abs(value) < MATE_THRESHOLD):
+            # stored from the side to move's view
+            self.disk_cache.store(state, depth, EXACT, value if maximizing else -value,
+                                  best_choice, self.cache_namespace)
+        return value, mate_result
 
     # ======================================================================
     # EVALUATION
@@ -241,14 +615,17 @@ class AIPlayer:
         """
         Heuristic: piece difference, mobility, potential mills.
         """
+        if self.evaluator is not None:
+            return self.evaluator.evaluate(state, self.color)
+
         my = state.pieces_count(self.color)
         opp = state.pieces_count(-self.color)
-        piece_diff = 100 * (my - opp)
+        piece_diff = self.piece_weight * (my - opp)
 
-        # mobility (using color-agnostic legal_moves_for)
-        my_moves = len(state.legal_moves_for(self.color))
-        opp_moves = len(state.legal_moves_for(-self.color))
-        mobility = 5 * (my_moves - opp_moves)
+        # mobility (cached on the state, shared with is_game_over)
+        my_moves = state.mobility(self.color)
+        opp_moves = state.mobility(-self.color)
+        mobility = self.mobility_weight * (my_moves - opp_moves)
 
         # potential mills
         potential = 0
@@ -259,4 +636,4 @@ class AIPlayer:
             if line.count(-self.color) == 2 and line.count(EMPTY) == 1:
                 potential -= 1
 
-        return piece_diff + mobility + 30 * potential
\ No newline at end of file
+        return piece_diff + mobility + self.mill_weight * potential
\ No newline at end of file
@@ -0,0 +1,290 @@
+# src/game/analysis.py
+"""
+Batch analysis of many positions.
+
+    python -m game.analysis --positions-file positions.txt --nodes 20000 --processes 4
+    python -m game.analysis --games games.nmm --depth 6
+
+Results are printed as JSON lines in completion order, one per input
+position: index, position, bestmove, score (side to move's view), depth,
+nodes, mate, pv and whether the answer came from the cache.
+
+Positions are searched in a canonical orientation (the smallest board over
+the 16 SYMMETRIES), so duplicates and mirrored / rotated copies share one
+search; answers are mapped back to each input's own orientation. Input is
+consumed lazily with a bounded number of positions in flight and a bounded
+LRU cache, so memory stays flat however long the input is. Each position
+is analyzed on its own: the trail of earlier positions is not used.
+"""
+import argparse
+import collections
+import concurrent.futures
+import json
+import sys
+
+from game.ai import AIPlayer
+from game.game import GameState
+from game.notation import add_position_args, move_to_text, positions_from_args
+from game.record import read_records
+from utils.utils import SYMMETRIES
+
+CACHE_SIZE = 100000          # canonical positions remembered
+IN_FLIGHT_PER_PROCESS = 4    # positions queued per worker process
+
+
+# ======================================================================
+# SYMMETRY
+# ======================================================================
+def canonical_position(state):
+    """
+    Returns (notation, inverse) for the canonical orientation of `state`:
+    inverse[q] is the input point that canonical point q came from.
+    ai_endgame_moves does not affect the search and is dropped.
+    """
+    src = state.board
+    best = None
+    best_perm = None
+    for perm in SYMMETRIES:
+        board = [0] * 24
+        for i in range(24):
+            board[perm[i]] = src[i]
+        if best is None or board < best:
+            best = board
+            best_perm = perm
+
+    canon = state.clone()
+    canon.board = best
+    canon.ai_endgame_moves = 0
+    canon.invalidate()
+
+    inverse = [0] * 24
+    for i, q in enumerate(best_perm):
+        inverse[q] = i
+    return canon.to_notation(), inverse
+
+
+def _map_choice(choice, inverse):
+    move, cap = choice
+    if move[0] == 'place':
+        move = ('place', inverse[move[1]])
+    else:
+        move = ('move', inverse[move[1]], inverse[move[2]])
+    return move, (None if cap is None else inverse[cap])
+
+
+def _to_frame(result, inverse, notation, cached):
+    out = dict(result)
+    if result['choice'] is not None:
+        out['choice'] = _map_choice(result['choice'], inverse)
+    out['pv'] = [_map_choice(c, inverse) for c in result['pv']]
+    out['lines'] = [
+        dict(line, choice=_map_choice(line['choice'], inverse),
+             pv=[_map_choice(c, inverse) for c in line['pv']])
+        for line in result['lines']
+    ]
+    out['position'] = notation
+    out['cached'] = cached
+    return out
+
+
+# ======================================================================
+# SEARCH (in a worker process or in-process)
+# ======================================================================
+_worker_settings = {}
+_worker_players = {}
+
+
+def _init_worker(settings):
+    _worker_settings.update(settings)
+
+
+def _worker_analyze(notation):
+    return _analyze(_worker_players, _worker_settings, notation)
+
+
+def _analyze(players, settings, notation):
+    """
+    One warm AIPlayer per side to move, so tables are never thrown away
+    when the batch alternates colors.
+    """
+    state = GameState.from_notation(notation)
+    ai = players.get(state.current)
+    if ai is None:
+        ai = players[state.current] = AIPlayer(color=state.current, keep_tt=True, **settings)
+    return ai.analyze(state)
+
+
+def _as_state(item):
+    return item if isinstance(item, GameState) else GameState.from_notation(item)
+
+
+# ======================================================================
+# BATCH
+# ======================================================================
+def analyze_many(positions, settings=None, processes=1, cache_size=CACHE_SIZE):
+    """
+    Generator of (index, result) for an iterable of GameStates or notation
+    strings, in completion order. `settings` are AIPlayer keyword arguments
+    (max_time, max_nodes, max_depth...). Each result is AIPlayer.analyze()'s
+    dict plus 'position' (input notation) and 'cached'.
+    """
+    settings = dict(settings or {})
+    cache = collections.OrderedDict()
+
+    def remember(key, result):
+        if cache_size <= 0:
+            return
+        cache[key] = result
+        if len(cache) > cache_size:
+            cache.popitem(last=False)
+
+    def lookup(key):
+        result = cache.get(key)
+        if result is not None:
+            cache.move_to_end(key)
+        return result
+
+    if processes <= 1:
+        players = {}
+        for index, item in enumerate(positions):
+            state = _as_state(item)
+            notation = state.to_notation()
+            key, inverse = canonical_position(state)
+            result = lookup(key)
+            cached = result is not None
+            if not cached:
+                result = _analyze(players, settings, key)
+                remember(key, result)
+            yield index, _to_frame(result, inverse, notation, cached)
+        return
+
+    import multiprocessing
+    ctx = multiprocessing.get_context('spawn')
+    limit = processes * IN_FLIGHT_PER_PROCESS
+    waiting = {}     # key -> [(index, inverse, notation), ...]
+    futures = {}     # future -> key
+    held = 0         # input positions waiting for a result
+    source = enumerate(positions)
+    exhausted = False
+
+    with concurrent.futures.ProcessPoolExecutor(
+            processes, mp_context=ctx, initializer=_init_worker, initargs=(settings,)) as pool:
+        while True:
+            while not exhausted and held < limit:
+                try:
+                    index, item = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                state = _as_state(item)
+                notation = state.to_notation()
+                key, inverse = canonical_position(state)
+
+                result = lookup(key)
+                if result is not None:
+                    yield index, _to_frame(result, inverse, notation, True)
+                    continue
+                held += 1
+                if key in waiting:
+                    waiting[key].append((index, inverse, notation))
+                    continue
+                waiting[key] = [(index, inverse, notation)]
+                futures[pool.submit(_worker_analyze, key)] = key
+
+            if not futures:
+                break
+            done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                key = futures.pop(future)
+                result = future.result()
+                remember(key, result)
+                group = waiting.pop(key)
+                held -= len(group)
+                for n, (index, inverse, notation) in enumerate(group):
+                    yield index, _to_frame(result, inverse, notation, n > 0)
+
+
+# ======================================================================
+# COMMAND LINE
+# ======================================================================
+def iter_game_positions(path):
+    """
+    Every position (start and after each ply) of every game in a record file.
+    """
+    for record in read_records(path):
+        history, _ = record.to_history()
+        yield from history.positions()
+
+
+def _input_positions(args):
+    yield from positions_from_args(args)
+    for path in args.games or ():
+        yield from iter_game_positions(path)
+
+
+def result_to_json(index, result):
+    choice = result['choice']
+    out = {
+        'index': index,
+        'position': result['position'],
+        'bestmove': move_to_text(*choice) if choice else None,
+        'score': result['score'],
+        'depth': result['depth'],
+        'nodes': result['nodes'],
+        'mate': result['mate'],
+        'pv': [move_to_text(m, c) for m, c in result['pv']],
+        'cached': result['cached'],
+    }
+    if len(result['lines']) > 1:
+        out['lines'] = [
+            {'move': move_to_text(*line['choice']), 'score': line['score'], 'mate': line['mate'],
+             'pv': [move_to_text(m, c) for m, c in line['pv']]}
+            for line in result['lines']
+        ]
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.analysis',
+                                     description='Analyze many positions, streaming JSON lines.')
+    add_position_args(parser)
+    parser.add_argument('--games', action='append',
+                        help='game record file (.nmm): analyze every position; repeatable')
+    parser.add_argument('--movetime', type=int, default=0, help='ms per position')
+    parser.add_argument('--nodes', type=int, default=0, help='node limit per position')
+    parser.add_argument('--depth', type=int, default=0, help='depth limit per position')
+    parser.add_argument('--multi-pv', type=int, default=1,
+                        help='also score the N best root moves')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE,
+                        help='canonical positions kept in the result cache (0: none)')
+    parser.add_argument('--shared-tt', type=int, default=0, metavar='MB',
+                        help='one shared-memory transposition table of this size for all'
+                             ' processes (0: a private table each)')
+    args = parser.parse_args(argv)
+
+    settings = {
+        'max_time': args.movetime / 1000.0,
+        'max_nodes': args.nodes,
+        'max_depth': args.depth,
+    }
+    if not any(settings.values()):
+        settings['max_time'] = 1.0
+    settings['multi_pv'] = args.multi_pv
+
+    table = None
+    if args.shared_tt > 0:
+        from game.shared_tt import SharedTT
+        table = settings['shared_tt'] = SharedTT(args.shared_tt * (1 << 20) // 16)
+    try:
+        for index, result in analyze_many(_input_positions(args), settings,
+                                          processes=args.processes, cache_size=args.cache_size):
+            print(json.dumps(result_to_json(index, result)), flush=True)
+    finally:
+        if table is not None:
+            table.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
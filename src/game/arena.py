@@ -0,0 +1,207 @@
+# src/game/arena.py
+"""
+Headless matches between two engine configurations.
+
+    python -m game.arena "nodes=3000" "nodes=3000,evaluator=pattern" --games 20
+    python -m game.arena "time=1" "engine=mcts,time=1"
+
+A configuration is a comma-separated list of key=value settings:
+    engine                         alphabeta (default) or mcts
+    nodes, time (seconds), depth   search limits (max_nodes, max_time, max_depth)
+    evaluator                      classic (default), pattern or nnue
+    nnue                           network weights path (implies evaluator=nnue)
+    weights                        evaluation weights config path
+    aspiration, pvs, lmr           true / false
+MCTS configurations take time and:
+    playouts                       playout limit per move (default 2000)
+    policy                         uct or puct
+    exploration, processes, parallel (root / leaf), batch
+Games are played in pairs from the same random opening with colors swapped;
+threefold repetition and the ply limit end a game as a draw.
+"""
+import argparse
+import math
+import random
+import sys
+import time
+
+from game.ai import AIPlayer
+from game.game import GameState
+from game.mcts import MCTSPlayer
+from utils.utils import WHITE, BLACK
+
+LIMIT_KEYS = {'nodes': 'max_nodes', 'time': 'max_time', 'depth': 'max_depth'}
+BOOL_KEYS = ('aspiration', 'pvs', 'lmr')
+MCTS_KEYS = {'time': ('max_time', float), 'playouts': ('max_playouts', int),
+             'policy': ('policy', str), 'exploration': ('exploration', float),
+             'processes': ('processes', int), 'parallel': ('parallel', str),
+             'batch': ('batch', int)}
+
+
+def parse_spec(text):
+    """
+    "nodes=3000,evaluator=pattern" -> {'nodes': '3000', 'evaluator': 'pattern'}
+    """
+    spec = {}
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f"Bad setting {item!r}: expected key=value")
+        spec[key.strip()] = value.strip()
+    return spec
+
+
+def make_player(spec, color, seed=None):
+    """
+    A player for `color` from a parsed configuration.
+    """
+    kwargs = {'color': color, 'seed': seed, 'max_time': 0.0}
+    engine = spec.get('engine', 'alphabeta')
+    if engine == 'mcts':
+        for key, value in spec.items():
+            if key == 'engine':
+                continue
+            if key not in MCTS_KEYS:
+                raise ValueError(f"Unknown MCTS setting: {key}")
+            name, kind = MCTS_KEYS[key]
+            kwargs[name] = kind(value)
+        if not kwargs['max_time'] and not kwargs.get('max_playouts'):
+            kwargs['max_playouts'] = 2000
+        return MCTSPlayer(**kwargs)
+    if engine != 'alphabeta':
+        raise ValueError(f"Unknown engine: {engine}")
+
+    evaluator = None
+    for key, value in spec.items():
+        if key == 'engine':
+            continue
+        if key in LIMIT_KEYS:
+            kwargs[LIMIT_KEYS[key]] = float(value) if key == 'time' else int(value)
+        elif key in BOOL_KEYS:
+            kwargs[key] = value.lower() in ('1', 'true', 'yes', 'on')
+        elif key == 'evaluator':
+            evaluator = None if value == 'classic' else value
+        elif key == 'nnue':
+            from game.nnue import NNUEEvaluator
+            evaluator = NNUEEvaluator.load(value)
+        elif key == 'weights':
+            kwargs['weights'] = value
+        else:
+            raise ValueError(f"Unknown setting: {key}")
+    if not any(kwargs.get(k) for k in LIMIT_KEYS.values()):
+        kwargs['max_nodes'] = 3000
+    return AIPlayer(evaluator=evaluator, **kwargs)
+
+
+def play_game(players, rng, random_plies=4, max_plies=300):
+    """
+    One game between players {WHITE: p, BLACK: p} after `random_plies`
+    random opening plies drawn from rng. Returns (winner or None, plies,
+    {color: [nodes, seconds]}).
+    """
+    state = GameState()
+    state.repetition_limit = 3
+    stats = {WHITE: [0, 0.0], BLACK: [0, 0.0]}
+
+    for ply in range(max_plies):
+        over, winner = state.is_game_over()
+        if over:
+            return winner, ply, stats
+        if ply < random_plies:
+            move, cap, _ = rng.choice(list(state.iter_children()))
+        else:
+            player = players[state.current]
+            t0 = time.perf_counter()
+            move, cap = player.choose_move(state)
+            stats[state.current][0] += getattr(player, 'nodes', 0)
+            stats[state.current][1] += time.perf_counter() - t0
+        state.make_move(move, cap)
+    return None, max_plies, stats
+
+
+def play_match(spec_a, spec_b, games=20, random_plies=4, max_plies=300, seed=0, log=None):
+    """
+    Plays `games` games (rounded up to pairs) between two configurations.
+    Returns a summary dict from A's point of view.
+    """
+    wins = draws = losses = 0
+    nodes = {'a': 0, 'b': 0}
+    seconds = {'a': 0.0, 'b': 0.0}
+
+    for pair in range((games + 1) // 2):
+        for swap in (False, True):
+            rng = random.Random(seed * 7919 + pair)
+            a_color = BLACK if swap else WHITE
+            players = {
+                a_color: make_player(spec_a, a_color, seed=rng.randrange(1 << 30)),
+                -a_color: make_player(spec_b, -a_color, seed=rng.randrange(1 << 30)),
+            }
+            winner, plies, stats = play_game(players, rng, random_plies, max_plies)
+            for player in players.values():
+                if hasattr(player, 'close'):
+                    player.close()
+            nodes['a'] += stats[a_color][0]
+            nodes['b'] += stats[-a_color][0]
+            seconds['a'] += stats[a_color][1]
+            seconds['b'] += stats[-a_color][1]
+            if winner is None:
+                draws += 1
+                outcome = 'draw'
+            elif winner == a_color:
+                wins += 1
+                outcome = 'A wins'
+            else:
+                losses += 1
+                outcome = 'B wins'
+            if log:
+                log(f"game {wins + draws + losses}: A {'black' if swap else 'white'},"
+                    f" {outcome} in {plies} plies")
+
+    played = wins + draws + losses
+    score = (wins + draws / 2) / played
+    elo = None
+    if 0 < score < 1:
+        elo = round(-400 * math.log10(1 / score - 1))
+    return {
+        'games': played, 'wins': wins, 'draws': draws, 'losses': losses,
+        'score': round(score, 3), 'elo': elo,
+        'nps_a': int(nodes['a'] / seconds['a']) if seconds['a'] else 0,
+        'nps_b': int(nodes['b'] / seconds['b']) if seconds['b'] else 0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.arena',
+                                     description='Play engine configurations against each other.')
+    parser.add_argument('a', help='configuration A, e.g. "nodes=3000"')
+    parser.add_argument('b', help='configuration B, e.g. "nodes=3000,evaluator=pattern"')
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--random-plies', type=int, default=4, help='random opening plies')
+    parser.add_argument('--max-plies', type=int, default=300, help='longer games count as draws')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-q', '--quiet', action='store_true', help='only print the summary')
+    args = parser.parse_args(argv)
+
+    try:
+        spec_a, spec_b = parse_spec(args.a), parse_spec(args.b)
+        make_player(spec_a, WHITE)
+        make_player(spec_b, WHITE)
+    except ValueError as e:
+        parser.error(str(e))
+
+    log = None if args.quiet else (lambda msg: print(msg, file=sys.stderr, flush=True))
+    result = play_match(spec_a, spec_b, args.games, args.random_plies, args.max_plies,
+                        args.seed, log=log)
+    elo = 'n/a' if result['elo'] is None else f"{result['elo']:+d}"
+    print(f"A: {args.a}\nB: {args.b}")
+    print(f"A +{result['wins']} ={result['draws']} -{result['losses']}"
+          f" (score {result['score']:.3f}, Elo {elo})")
+    print(f"nodes/s (playouts/s for MCTS): A {result['nps_a']}  B {result['nps_b']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# src/game/batch_eval.py
+"""
+NumPy version of AIPlayer.evaluate for many positions at once.
+
+Positions are an (N, 24) int8 board array (WHITE / BLACK / EMPTY per point)
+plus an (N,) bool array telling which positions are in the placing phase;
+pack_states() builds both from GameStates, boards_from_masks() from uint32
+bitmasks (bit i = point i). Every term of evaluate() is computed with
+matrix products against tables built from ADJACENT and MILLS, so
+
+    evaluate_batch(*pack_states(states), color)[i] == AIPlayer(color).evaluate(states[i])
+
+Needs numpy (not required by the game itself).
+"""
+import numpy as np
+
+from game.ai import load_weights
+from utils.utils import ADJACENT, MILLS, WHITE, BLACK, EMPTY
+
+# ADJACENCY[i, j] = 1 when points i and j are neighbours
+ADJACENCY = np.zeros((24, 24), dtype=np.int16)
+for _frm, _neighbors in ADJACENT.items():
+    ADJACENCY[_frm, _neighbors] = 1
+
+# MILL_INCIDENCE[p, m] = 1 when point p belongs to mill m
+MILL_INCIDENCE = np.zeros((24, len(MILLS)), dtype=np.int16)
+for _m, _mill in enumerate(MILLS):
+    MILL_INCIDENCE[list(_mill), _m] = 1
+
+BITS = (np.uint32(1) << np.arange(24, dtype=np.uint32))
+
+
+# ======================================================================
+# PACKING
+# ======================================================================
+def pack_states(states):
+    """
+    GameStates -> (boards int8 (N, 24), placing bool (N,)).
+    """
+    states = list(states)
+    boards = np.array([s.board for s in states], dtype=np.int8).reshape(len(states), 24)
+    placing = np.array([s.phase == 'placing' for s in states], dtype=bool)
+    return boards, placing
+
+
+def boards_from_masks(white, black):
+    """
+    uint32 bitmask arrays (bit i set = piece on point i) -> (N, 24) int8 boards.
+    """
+    white = np.asarray(white, dtype=np.uint32)[:, None]
+    black = np.asarray(black, dtype=np.uint32)[:, None]
+    boards = np.zeros((white.shape[0], 24), dtype=np.int8)
+    boards[(white & BITS) != 0] = WHITE
+    boards[(black & BITS) != 0] = BLACK
+    return boards
+
+
+def masks_from_boards(boards):
+    """
+    (N, 24) boards -> (white, black) uint32 bitmask arrays.
+    """
+    boards = np.asarray(boards)
+    white = np.where(boards == WHITE, BITS, 0).sum(axis=1, dtype=np.uint32)
+    black = np.where(boards == BLACK, BITS, 0).sum(axis=1, dtype=np.uint32)
+    return white, black
+
+
+# ======================================================================
+# EVALUATION
+# ======================================================================
+def evaluate_terms(boards, placing):
+    """
+    White-minus-black feature differences, each an int32 array (N,):
+    (pieces, mobility, potential mills).
+    """
+    boards = np.asarray(boards)
+    placing = np.asarray(placing, dtype=bool)
+    white = (boards == WHITE).astype(np.int16)
+    black = (boards == BLACK).astype(np.int16)
+    empty = (boards == EMPTY).astype(np.int16)
+
+    n_white = white.sum(axis=1, dtype=np.int32)
+    n_black = black.sum(axis=1, dtype=np.int32)
+    n_empty = empty.sum(axis=1, dtype=np.int32)
+
+    # mobility: sliding moves = own pieces x empty neighbours; a side with
+    # exactly three pieces flies anywhere; placements use every empty point
+    empty_neighbors = empty @ ADJACENCY
+    slide_white = (white * empty_neighbors).sum(axis=1, dtype=np.int32)
+    slide_black = (black * empty_neighbors).sum(axis=1, dtype=np.int32)
+    mob_white = np.where(n_white == 3, 3 * n_empty, slide_white)
+    mob_black = np.where(n_black == 3, 3 * n_empty, slide_black)
+    mob_white = np.where(placing, n_empty, mob_white)
+    mob_black = np.where(placing, n_empty, mob_black)
+
+    # potential mills: two own pieces and an empty point on a mill
+    empty_in_mill = (empty @ MILL_INCIDENCE) == 1
+    open_white = ((white @ MILL_INCIDENCE) == 2) & empty_in_mill
+    open_black = ((black @ MILL_INCIDENCE) == 2) & empty_in_mill
+    potential = open_white.sum(axis=1, dtype=np.int32) - open_black.sum(axis=1, dtype=np.int32)
+
+    return n_white - n_black, (mob_white - mob_black).astype(np.int32), potential
+
+
+def evaluate_batch(boards, placing, color=WHITE, weights=None):
+    """
+    AIPlayer.evaluate for every position, from `color`'s point of view
+    (`weights` as AIPlayer's, default: the loaded config); array (N,).
+    """
+    if weights is None:
+        weights = load_weights()
+    pieces, mobility, potential = evaluate_terms(boards, placing)
+    score = weights['piece'] * pieces + weights['mobility'] * mobility + weights['mill'] * potential
+    return score if color == WHITE else -score
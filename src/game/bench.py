@@ -0,0 +1,196 @@
+# src/game/bench.py
+"""
+Fixed-depth search benchmark.
+
+    python -m game.bench [--depth-offset N] [--history bench_history.json] [--label TEXT]
+
+Searches a curated set of placing, moving and flying positions to fixed
+depths with fresh, seeded AIPlayers and no time limit, so the total node
+count is a deterministic signature of the search: it only changes when the
+search itself changes (move ordering, pruning, evaluation...). The
+players use DEFAULT_WEIGHTS unless `weights` is given, so a tuned
+eval_weights.json does not change the signature. Also prints
+nodes/s, the time to reach each depth and transposition table hit rates.
+
+Every run is appended to a JSON history file together with the commit and
+a machine description; the summary compares it with the previous run on
+the same machine. The engine's `bench` command runs the same suite.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from game.ai import DEFAULT_WEIGHTS, AIPlayer
+from game.game import GameState
+from game.notation import move_to_text
+
+HISTORY_FILE = 'bench_history.json'
+
+# (name, notation, depth); '' is the starting position
+BENCH_POSITIONS = [
+    ('start', '', 5),
+    ('placing-1', 'WB2W1BW/1W1B1W2/2B5 b p 4/5 0/0', 6),
+    ('placing-2', 'BWB1W2W/1W3BW1/1W3BBB w p 2/2 1/1', 8),
+    ('placing-3', '2B4W/2W3B1/7W b p 6/7 0/0', 6),
+    ('moving-1', '1W4WW/B1BWB3/W4BW1 w m 0/0 3/5 9/9 9 0 37', 9),
+    ('moving-2', 'WWB1BWW1/1W1WWBB1/W6W b m 0/0 0/5 9/9 9 0 14', 8),
+    ('moving-3', '5WBB/B2W3W/WW4BB w m 0/0 4/4', 9),
+    ('moving-4', '1W4BB/2W3WB/5BBW b m 0/0 5/4 9/9 9 0 2', 8),
+    ('flying-1', '2BWB3/2WW4/3B3B b m 0/0 6/5 9/9 9 0 25', 5),
+    ('flying-2', '3WW3/2W1B1B1/WB6 w m 0/0 5/6 9/9 9 0 5', 5),
+    ('flying-3', '4W3/2W1B3/BW1BW3 b m 0/0 5/6 9/9 9 0 13', 4),
+]
+
+
+def machine_info():
+    return {
+        'node': platform.node(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def current_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                             text=True, timeout=5, cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_bench(depth_offset=0, settings=None, log=None):
+    """
+    Searches every bench position; returns a result dict with totals and
+    one entry per position (name, depth, nodes, ms, depth_ms, tt_hit_rate,
+    tt_cutoff_rate, best move).
+    """
+    settings = dict(settings or {})
+    settings.setdefault('weights', dict(DEFAULT_WEIGHTS))
+    results = []
+    total_nodes = 0
+    total_seconds = 0.0
+    probes = hits = 0
+
+    for name, notation, depth in BENCH_POSITIONS:
+        state = GameState.from_notation(notation) if notation else GameState()
+        depth = max(1, depth + depth_offset)
+        ai = AIPlayer(color=state.current, max_time=0, max_depth=depth, seed=1, **settings)
+        depth_ms = []
+        ai.on_iteration = lambda a, d, score, choice: depth_ms.append(
+            round((time.perf_counter() - t0) * 1000, 1))
+        t0 = time.perf_counter()
+        choice = ai.choose_move(state)
+        seconds = time.perf_counter() - t0
+
+        total_nodes += ai.nodes
+        total_seconds += seconds
+        probes += ai.tt_probes
+        hits += ai.tt_hits
+        entry = {
+            'name': name, 'depth': depth, 'nodes': ai.nodes, 'ms': round(seconds * 1000, 1),
+            'nps': int(ai.nodes / seconds) if seconds > 0 else 0,
+            'depth_ms': depth_ms,
+            'tt_hit_rate': round(ai.tt_hits / ai.tt_probes, 4) if ai.tt_probes else 0.0,
+            'tt_cutoff_rate': round(ai.tt_cutoffs / ai.tt_probes, 4) if ai.tt_probes else 0.0,
+            'best': move_to_text(*choice) if choice else None,
+        }
+        results.append(entry)
+        if log:
+            log(entry)
+
+    return {
+        'signature': total_nodes,
+        'nodes': total_nodes,
+        'seconds': round(total_seconds, 3),
+        'nps': int(total_nodes / total_seconds) if total_seconds > 0 else 0,
+        'tt_hit_rate': round(hits / probes, 4) if probes else 0.0,
+        'depth_offset': depth_offset,
+        'settings': settings,
+        'positions': results,
+    }
+
+
+# ======================================================================
+# HISTORY
+# ======================================================================
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_run(path, run):
+    history = load_history(path)
+    history.append(run)
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=1)
+        f.write('\n')
+
+
+def previous_run(history, run):
+    """
+    The latest earlier run on the same machine with the same bench settings.
+    """
+    for old in reversed(history):
+        if (old.get('machine') == run['machine'] and old.get('depth_offset') == run['depth_offset']
+                and old.get('settings') == run['settings']):
+            return old
+    return None
+
+
+# ======================================================================
+# COMMAND LINE
+# ======================================================================
+def format_entry(entry):
+    return (f"{entry['name']:10s} depth {entry['depth']:2d} nodes {entry['nodes']:8d}"
+            f" time {entry['ms']:8.1f}ms nps {entry['nps']:7d}"
+            f" tt hits {entry['tt_hit_rate']:.1%} cutoffs {entry['tt_cutoff_rate']:.1%}"
+            f" best {entry['best']} to-depth ms {entry['depth_ms']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.bench',
+                                     description='Fixed-depth search benchmark with a node signature.')
+    parser.add_argument('--depth-offset', type=int, default=0,
+                        help='added to every position\'s depth')
+    parser.add_argument('--evaluator', choices=('classic', 'pattern', 'nnue'), default='classic')
+    parser.add_argument('--history', default=HISTORY_FILE, help='JSON history file')
+    parser.add_argument('--no-save', action='store_true', help='do not append to the history')
+    parser.add_argument('--label', default='', help='note stored with the run')
+    args = parser.parse_args(argv)
+
+    settings = {}
+    if args.evaluator != 'classic':
+        settings['evaluator'] = args.evaluator
+    run = run_bench(args.depth_offset, settings,
+                    log=lambda entry: print(format_entry(entry), flush=True))
+    run.update({
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': current_commit(),
+        'label': args.label,
+        'machine': machine_info(),
+    })
+
+    print(f"\nsignature {run['signature']}  nodes {run['nodes']}  time {run['seconds']:.2f}s"
+          f"  nps {run['nps']}  tt hits {run['tt_hit_rate']:.1%}")
+    old = previous_run(load_history(args.history), run)
+    if old is not None:
+        same = 'unchanged' if old['signature'] == run['signature'] else 'CHANGED'
+        change = (run['nps'] / old['nps'] - 1) if old['nps'] else 0.0
+        print(f"vs {old.get('commit') or '?'} ({old['time']}): signature {same}"
+              f" ({old['signature']} -> {run['signature']}), nps {change:+.1%}")
+    if not args.no_save:
+        save_run(args.history, run)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
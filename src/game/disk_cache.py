@@ -0,0 +1,361 @@
+# src/game/disk_cache.py
+"""
+Persistent analysis cache shared by every AIPlayer launch.
+
+    AIPlayer(disk_cache=True)                 # default file, see default_path()
+    AIPlayer(disk_cache='analysis.sqlite')    # explicit file
+    NMM_ANALYSIS_CACHE=1 python src/main.py   # the GUI's alpha-beta levels
+    python -m game.disk_cache stats|clear [--path FILE]
+
+One SQLite table of search results keyed by a 64-bit hash of the canonical
+position (smallest board over the 16 SYMMETRIES, side to move, phase and
+unplaced pieces) and of the evaluation in use. Each row holds the depth,
+bound flag, score (side to move's view) and best move (canonical
+orientation, mapped back to the caller's board on lookup). Forced wins /
+losses are not stored: their scores depend on the distance from the root.
+
+Lookups are synchronous and cheap (one indexed SELECT). Stores and LRU
+touches go through a queue to a writer thread that commits in batches, so
+the search never waits for the disk. The table is kept to `max_entries`
+rows by evicting the least recently used entries first, with deeper
+results credited as if used DEPTH_CREDIT seconds later per ply.
+"""
+import argparse
+import atexit
+import hashlib
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from game.notation import move_from_text, move_to_text
+from utils.utils import EMPTY, SYMMETRIES, WHITE
+
+CACHE_FILE = 'analysis.sqlite'
+MAX_ENTRIES = 1000000
+DEPTH_CREDIT = 3600          # seconds of recency one ply of depth is worth
+BATCH = 500                  # queued writes per transaction
+FLUSH_SECONDS = 0.5          # longest a queued write waits for its batch
+EVICT_SLACK = 0.05           # fraction of max_entries freed per eviction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis (
+    key   INTEGER PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    flag  INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    move  TEXT,
+    used  INTEGER NOT NULL
+)
+"""
+
+UPSERT = """
+INSERT INTO analysis (key, depth, flag, score, move, used) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET
+    depth = excluded.depth, flag = excluded.flag, score = excluded.score,
+    move = excluded.move, used = excluded.used
+WHERE excluded.depth >= analysis.depth
+"""
+
+
+def default_path():
+    """
+    <user cache dir>/nine-mens-morris/analysis.sqlite: XDG_CACHE_HOME or
+    ~/.cache, %LOCALAPPDATA% on Windows.
+    """
+    base = os.environ.get('XDG_CACHE_HOME')
+    if not base and os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA')
+    if not base:
+        base = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'nine-mens-morris', CACHE_FILE)
+
+
+def path_from_env():
+    """
+    The cache file selected by NMM_ANALYSIS_CACHE ("1" for the default
+    path, or a file name), or None when unset / "0".
+    """
+    value = os.environ.get('NMM_ANALYSIS_CACHE', '')
+    if not value or value == '0':
+        return None
+    return default_path() if value == '1' else value
+
+
+# ======================================================================
+# CANONICAL KEYS
+# ======================================================================
+def canonical_key(state, namespace=''):
+    """
+    Returns (key, perm) for `state`: key is the signed 64-bit hash of its
+    canonical position and `namespace`; canonical point perm[i] holds the
+    input's point i.
+    """
+    src = state.board
+    best = None
+    best_perm = None
+    for perm in SYMMETRIES:
+        board = [0] * 24
+        for i in range(24):
+            board[perm[i]] = src[i]
+        if best is None or board < best:
+            best = board
+            best_perm = perm
+
+    text = ''.join('.' if p == EMPTY else ('W' if p == WHITE else 'B') for p in best)
+    text += (f" {'w' if state.current == WHITE else 'b'} {state.phase[0]}"
+             f" {state.white_unplaced}/{state.black_unplaced} {namespace}")
+    digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True), best_perm
+
+
+def _map_choice(choice, perm):
+    move, cap = choice
+    if move[0] == 'place':
+        move = ('place', perm[move[1]])
+    else:
+        move = ('move', perm[move[1]], perm[move[2]])
+    return move, (None if cap is None else perm[cap])
+
+
+def _plausible(state, choice):
+    """
+    Cheap legality check of a cached choice (guards against hash
+    collisions; the search trusts its first move as legal).
+    """
+    move, cap = choice
+    if move not in state.legal_moves():
+        return False
+    return cap is None or state.board[cap] == -state.current
+
+
+# ======================================================================
+# CACHE
+# ======================================================================
+class DiskCache:
+    """
+    SQLite-backed table of (depth, flag, score, choice) per canonical
+    position. lookup() reads directly; store() is queued for the writer
+    thread. close() (or flush()) waits for queued writes.
+    """
+
+    _shared = {}
+
+    def __init__(self, path=None, max_entries=MAX_ENTRIES):
+        self.path = path or default_path()
+        self.max_entries = int(max_entries)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        # statistics of this process
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        # one reading connection per searching thread, one for the writer
+        self.local = threading.local()
+        db = self._connect()
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute(SCHEMA)
+        db.commit()
+        self.local.db = db
+
+        self.queue = queue.Queue()
+        self.since_evict = self.max_entries  # check the size on first batch
+        self.writer = threading.Thread(target=self._write_loop, name='disk-cache', daemon=True)
+        self.writer.start()
+
+    @classmethod
+    def shared(cls, path=None):
+        """
+        One open cache per file and process (players come and go; the
+        writer thread and connections stay).
+        """
+        path = os.path.abspath(path or default_path())
+        cache = cls._shared.get(path)
+        if cache is None:
+            if not cls._shared:
+                atexit.register(cls.close_shared)
+            cache = cls._shared[path] = cls(path)
+        return cache
+
+    @classmethod
+    def close_shared(cls):
+        for cache in cls._shared.values():
+            cache.close()
+        cls._shared.clear()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+        db.execute('PRAGMA synchronous=NORMAL')
+        return db
+
+    def _reader(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = self.local.db = self._connect()
+        return db
+
+    # ---------------------------------------------------------
+    # LOOKUP / STORE
+    # ---------------------------------------------------------
+    def lookup(self, state, namespace=''):
+        """
+        (depth, flag, score, choice) for `state` in its own orientation
+        (score: side to move's view; choice may be None), or None.
+        """
+        key, perm = canonical_key(state, namespace)
+        try:
+            row = self._reader().execute(
+                'SELECT depth, flag, score, move FROM analysis WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.queue.put(('touch', key))
+
+        depth, flag, score, text = row
+        choice = None
+        if text:
+            inverse = [0] * 24
+            for i, q in enumerate(perm):
+                inverse[q] = i
+            choice = _map_choice(move_from_text(text), inverse)
+            if not _plausible(state, choice):
+                return None
+        return depth, flag, score, choice
+
+    def store(self, state, depth, flag, score, choice, namespace=''):
+        """
+        Queues a result for `state` (score from its side to move's view);
+        a stored row is only replaced by one at least as deep.
+        """
+        key, perm = canonical_key(state, namespace)
+        text = move_to_text(*_map_choice(choice, perm)) if choice is not None else None
+        self.queue.put(('store', (key, int(depth), int(flag), int(score), text)))
+
+    def flush(self):
+        """
+        Blocks until every queued write is committed.
+        """
+        done = threading.Event()
+        self.queue.put(('flush', done))
+        done.wait()
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.queue.put(None)
+        self.writer.join()
+        self.writer = None
+        db = getattr(self.local, 'db', None)
+        if db is not None:
+            db.close()
+            self.local.db = None
+
+    # ---------------------------------------------------------
+    # WRITER THREAD
+    # ---------------------------------------------------------
+    def _write_loop(self):
+        db = self._connect()
+        running = True
+        while running:
+            items = [self.queue.get()]
+            deadline = time.monotonic() + FLUSH_SECONDS
+            while len(items) < BATCH and items[-1] is not None and items[-1][0] != 'flush':
+                try:
+                    items.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            stores, touches, events = [], [], []
+            for item in items:
+                if item is None:
+                    running = False
+                elif item[0] == 'store':
+                    stores.append(item[1])
+                elif item[0] == 'touch':
+                    touches.append(item[1])
+                else:
+                    events.append(item[1])
+
+            now = int(time.time())
+            try:
+                with db:
+                    if stores:
+                        db.executemany(UPSERT, [row + (now,) for row in stores])
+                    if touches:
+                        db.executemany('UPDATE analysis SET used = ? WHERE key = ?',
+                                       [(now, key) for key in touches])
+                self.writes += len(stores)
+                self.since_evict += len(stores)
+                if self.since_evict >= self.max_entries * EVICT_SLACK:
+                    self._evict(db)
+            except sqlite3.Error:
+                # another process holds the lock for too long: drop this batch
+                pass
+            for done in events:
+                done.set()
+        db.close()
+
+    def _evict(self, db):
+        self.since_evict = 0
+        count = db.execute('SELECT COUNT(*) FROM analysis').fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - self.max_entries + int(self.max_entries * EVICT_SLACK)
+        with db:
+            db.execute('DELETE FROM analysis WHERE key IN (SELECT key FROM analysis'
+                       ' ORDER BY used + depth * ? LIMIT ?)', (DEPTH_CREDIT, excess))
+
+    def stats(self):
+        """
+        Row count, depth histogram and this process's hits / misses / writes.
+        """
+        db = self._reader()
+        rows = db.execute('SELECT depth, COUNT(*) FROM analysis GROUP BY depth ORDER BY depth').fetchall()
+        return {
+            'path': self.path,
+            'entries': sum(n for _, n in rows),
+            'depths': dict(rows),
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+        }
+
+
+# ======================================================================
+# COMMAND LINE
+# ======================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.disk_cache',
+                                     description='Inspect or clear the persistent analysis cache.')
+    parser.add_argument('command', choices=('stats', 'clear'))
+    parser.add_argument('--path', default=None, help=f'cache file (default {default_path()})')
+    args = parser.parse_args(argv)
+
+    path = args.path or default_path()
+    if not os.path.exists(path):
+        print(f"{path}: no cache")
+        return 0
+    cache = DiskCache(path)
+    if args.command == 'clear':
+        with cache._reader() as db:
+            db.execute('DELETE FROM analysis')
+        cache._reader().execute('VACUUM')
+        print(f"{path}: cleared")
+    else:
+        s = cache.stats()
+        size = os.path.getsize(path)
+        print(f"{path}: {s['entries']} entries, {size / 1e6:.1f} MB")
+        print('by depth: ' + '  '.join(f"{d}:{n}" for d, n in s['depths'].items()))
+    cache.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,306 @@
+# src/game/engine.py
+"""
+Headless engine speaking a UCI-style text protocol on stdin/stdout.
+
+    python -m game.engine
+
+One process serves any number of positions; the transposition tables are
+kept between searches (cleared by `ucinewgame`).
+
+Commands
+    uci                                     -> id lines, options, uciok
+    isready                                 -> readyok
+    ucinewgame                              forget the transposition tables
+    setoption name <N> value <V>            Aspiration / PVS / LMR (true|false), Seed, MultiPV
+    position startpos|fen <notation> [moves <m> ...]
+    go [movetime <ms>] [nodes <n>] [depth <d>] [infinite]
+    stop                                    end the running search
+    d                                       print the current position
+    bench [<depth offset>]                  run the game.bench suite, print its signature
+    quit
+
+Moves are written "5" (place on 5), "3-4" (move 3 to 4), with an
+optional capture suffix "x7".
+
+Output during a search
+    info depth <d> [multipv <k>] score cp <x>|mate <n> nodes <n> nps <n> time <ms> pv <moves>
+    bestmove <move>|none
+"""
+import sys
+import threading
+import time
+
+from game.ai import AIPlayer, WIN_SCORE, MATE_THRESHOLD
+from game.game import GameState
+from game.notation import diagram, move_from_text, move_to_text
+from utils.utils import WHITE
+
+NAME = 'Nine Men\'s Morris AI'
+
+# check options: protocol name -> AIPlayer attribute
+OPTIONS = {
+    'aspiration': 'aspiration',
+    'pvs': 'pvs',
+    'lmr': 'lmr',
+}
+
+
+def _parse_bool(text):
+    text = text.lower()
+    if text in ('true', 'on', '1', 'yes'):
+        return True
+    if text in ('false', 'off', '0', 'no'):
+        return False
+    raise ValueError(f"Bad boolean: {text!r}")
+
+
+def score_text(score, depth):
+    """
+    'cp <x>' or 'mate <n>' (n in own moves, negative when losing).
+    """
+    if abs(score) < MATE_THRESHOLD:
+        return f"cp {int(score)}"
+    plies = depth - (abs(score) - WIN_SCORE)
+    moves = (plies + 1) // 2
+    return f"mate {moves if score > 0 else -moves}"
+
+
+class Engine:
+    """
+    Protocol state: the current position and one AIPlayer per side to move
+    (scores are kept from the searcher's point of view, so a table can only
+    be reused by searches for the same color).
+    """
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.lock = threading.Lock()
+        self.state = GameState()
+        self.players = {}
+        self.options = {}
+        self.seed = None
+        self.thread = None
+        self.searching = None
+        self.root = None
+
+    # ---------------------------------------------------------
+    # OUTPUT
+    # ---------------------------------------------------------
+    def send(self, line):
+        with self.lock:
+            self.out.write(line + '\n')
+            self.out.flush()
+
+    # ---------------------------------------------------------
+    # MAIN LOOP
+    # ---------------------------------------------------------
+    def run(self, lines):
+        for line in lines:
+            if not self.handle(line):
+                break
+        self.stop()
+
+    def handle(self, line):
+        """
+        Executes one command line. Returns False on `quit`.
+        """
+        words = line.split()
+        if not words:
+            return True
+        cmd, args = words[0], words[1:]
+
+        # commands allowed while a search is running
+        if cmd == 'quit':
+            return False
+        if cmd == 'stop':
+            self.stop()
+            return True
+        if cmd == 'isready':
+            self.send('readyok')
+            return True
+
+        self.wait()
+        handler = getattr(self, 'cmd_' + cmd, None)
+        if handler is None:
+            self.send(f"info string unknown command: {cmd}")
+            return True
+        try:
+            handler(args)
+        except ValueError as e:
+            self.send(f"info string error: {e}")
+        return True
+
+    # ---------------------------------------------------------
+    # COMMANDS
+    # ---------------------------------------------------------
+    def cmd_uci(self, args):
+        self.send(f"id name {NAME}")
+        for name in ('Aspiration', 'PVS', 'LMR'):
+            self.send(f"option name {name} type check default true")
+        self.send("option name Seed type spin default 0 min 0 max 2147483647")
+        self.send("option name MultiPV type spin default 1 min 1 max 64")
+        self.send('uciok')
+
+    def cmd_ucinewgame(self, args):
+        for ai in self.players.values():
+            ai.transposition.clear()
+
+    def cmd_setoption(self, args):
+        text = ' '.join(args)
+        if not text.startswith('name ') or ' value ' not in text:
+            raise ValueError("expected: setoption name <name> value <value>")
+        name, value = text[len('name '):].split(' value ', 1)
+        name = name.strip().lower()
+        value = value.strip()
+
+        if name == 'seed':
+            self.seed = int(value)
+            self.players.clear()
+            return
+        if name == 'multipv':
+            self.options['multi_pv'] = max(1, int(value))
+            for ai in self.players.values():
+                ai.multi_pv = self.options['multi_pv']
+            return
+        if name not in OPTIONS:
+            raise ValueError(f"unknown option: {name}")
+        attr = OPTIONS[name]
+        self.options[attr] = _parse_bool(value)
+        for ai in self.players.values():
+            setattr(ai, attr, self.options[attr])
+
+    def cmd_position(self, args):
+        if not args:
+            raise ValueError("expected: position startpos|fen <notation> [moves ...]")
+        if 'moves' in args:
+            split = args.index('moves')
+            args, moves = args[:split], args[split + 1:]
+        else:
+            moves = []
+
+        if args[0] == 'startpos':
+            state = GameState()
+        elif args[0] == 'fen':
+            state = GameState.from_notation(' '.join(args[1:]))
+        else:
+            raise ValueError(f"unknown position type: {args[0]}")
+
+        for text in moves:
+            move, cap = move_from_text(text)
+            if move not in state.legal_moves():
+                raise ValueError(f"illegal move: {text}")
+            if state.last_move_forms_mill(move):
+                if cap not in state.can_capture_positions():
+                    raise ValueError(f"missing or illegal capture: {text}")
+            elif cap is not None:
+                raise ValueError(f"no mill to capture with: {text}")
+            state.make_move(move, cap)
+        self.state = state
+
+    def cmd_go(self, args):
+        limits = {'max_time': 0.0, 'max_nodes': 0, 'max_depth': 0}
+        it = iter(args)
+        for word in it:
+            if word == 'infinite':
+                continue
+            key = {'movetime': 'max_time', 'nodes': 'max_nodes', 'depth': 'max_depth'}.get(word)
+            if key is None:
+                raise ValueError(f"unknown go parameter: {word}")
+            try:
+                value = int(next(it))
+            except (StopIteration, ValueError):
+                raise ValueError(f"go {word} needs a number") from None
+            limits[key] = value / 1000.0 if key == 'max_time' else value
+        if not any(limits.values()):
+            # infinite: run until `stop` (or a proven result)
+            limits['max_time'] = float('inf')
+
+        over, _ = self.state.is_game_over()
+        if over:
+            self.send('bestmove none')
+            return
+
+        ai = self._player(self.state.current)
+        ai.max_time = limits['max_time']
+        ai.max_nodes = limits['max_nodes']
+        ai.max_depth = limits['max_depth']
+        ai.stop_requested = False
+
+        state = self.state.clone()
+        self.root = state
+        self.searching = ai
+        self.thread = threading.Thread(target=self._run_search, args=(ai, state), daemon=True)
+        self.thread.start()
+
+    def cmd_bench(self, args):
+        from game.bench import format_entry, run_bench
+        offset = int(args[0]) if args else 0
+        run = run_bench(offset, self.options,
+                        log=lambda entry: self.send('info string ' + format_entry(entry)))
+        self.send(f"info string signature {run['signature']} nodes {run['nodes']}"
+                  f" time {int(run['seconds'] * 1000)} nps {run['nps']}")
+
+    def cmd_d(self, args):
+        for line in diagram(self.state).splitlines():
+            self.send(line)
+        self.send(f"fen {self.state.to_notation()}")
+
+    # ---------------------------------------------------------
+    # SEARCH
+    # ---------------------------------------------------------
+    def stop(self):
+        if self.searching is not None:
+            self.searching.stop_requested = True
+        self.wait()
+
+    def wait(self):
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+            self.searching = None
+
+    def _player(self, color):
+        ai = self.players.get(color)
+        if ai is None:
+            seed = None if self.seed is None else self.seed * 2 + (color == WHITE)
+            ai = AIPlayer(color=color, seed=seed, keep_tt=True, **self.options)
+            ai.on_iteration = self._report
+            self.players[color] = ai
+        return ai
+
+    def _report(self, ai, depth, score, choice):
+        elapsed = time.time() - ai.start_time
+        ms = int(elapsed * 1000)
+        nps = int(ai.nodes / elapsed) if elapsed > 0 else 0
+        lines = ai.lines or [(score, choice, None)]
+        for k, (line_score, line_choice, _) in enumerate(lines, 1):
+            line = f"info depth {depth}"
+            if ai.multi_pv > 1:
+                line += f" multipv {k}"
+            line += (f" score {score_text(line_score, depth)}"
+                     f" nodes {ai.nodes} nps {nps} time {ms}")
+            if line_choice is not None:
+                pv = ai.principal_variation(self.root, line_choice, depth)
+                line += ' pv ' + ' '.join(move_to_text(m, c) for m, c in pv)
+            self.send(line)
+
+    def _run_search(self, ai, state):
+        try:
+            choice = ai.choose_move(state)
+        except Exception as e:
+            self.send(f"info string search failed: {e}")
+            choice = None
+        self.send('bestmove ' + (move_to_text(*choice) if choice else 'none'))
+
+
+def main(argv=None):
+    engine = Engine()
+    try:
+        engine.run(sys.stdin)
+    except KeyboardInterrupt:
+        engine.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
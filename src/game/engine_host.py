@@ -0,0 +1,235 @@
+# src/game/engine_host.py
+import queue
+import threading
+
+from game.ai import AIPlayer
+from game.disk_cache import DiskCache
+from game.mcts import MCTSPlayer
+
+
+# ======================================================================
+# WORKER PROCESS
+# ======================================================================
+def _worker_main(conn):
+    """
+    Loop of the engine process.
+    Messages:
+        ('config', kwargs)          -> (re)build the player
+        ('go', request_id, state)   -> reply (request_id, choice, ai_endgame_moves)
+        None                        -> shutdown
+    """
+    ai = None
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        if msg is None:
+            break
+
+        if msg[0] == 'config':
+            ai = _rebuild_ai(ai, msg[1])
+        elif msg[0] == 'go':
+            _, request_id, state = msg
+            try:
+                choice = ai.choose_move(state)
+            except Exception:
+                choice = None
+            conn.send((request_id, choice, state.ai_endgame_moves))
+
+    # commit queued analysis cache writes (atexit does not run here)
+    DiskCache.close_shared()
+    conn.close()
+
+
+def _rebuild_ai(old, settings):
+    """
+    New player with the given settings (engine='mcts' for an MCTSPlayer,
+    otherwise an AIPlayer); the transposition table of the previous
+    AIPlayer is carried over when it scores from the same side.
+    """
+    settings = dict(settings)
+    if settings.pop('engine', 'alphabeta') == 'mcts':
+        return MCTSPlayer(**settings)
+    ai = AIPlayer(keep_tt=True, **settings)
+    if isinstance(old, AIPlayer) and old.color == ai.color and ai.shared_tt is None:
+        ai.transposition = old.transposition
+    return ai
+
+
+# ======================================================================
+# HOST
+# ======================================================================
+class EngineHost:
+    """
+    Runs AIPlayer searches off the GUI thread.
+
+    The engine lives in one persistent worker process (spawned on first use,
+    kept for the whole session so its transposition table stays warm), so
+    the search never competes with Tk for the GIL. If multiprocessing is not
+    available, or the worker dies, searches run on a daemon thread instead.
+
+    Usage: configure(...) once, submit(state), then poll() until it returns
+    a result tuple (choice, ai_endgame_moves).
+    """
+
+    POLL_MS = 15
+
+    def __init__(self, use_process=True):
+        self.use_process = use_process
+        self.settings = {}
+        self.process = None
+        self.conn = None
+
+        # request bookkeeping
+        self.next_id = 0
+        self.pending_id = None
+        self.pending_state = None
+
+        # in-process fallback
+        self.local_ai = None
+        self.results = queue.Queue()
+
+    # ---------------------------------------------------------
+    # PUBLIC API
+    # ---------------------------------------------------------
+    @property
+    def mode(self):
+        return 'process' if self.process is not None else 'thread'
+
+    def configure(self, **settings):
+        """
+        Set player keyword arguments (color, max_time...; engine='mcts'
+        selects MCTSPlayer).
+        """
+        self.settings = dict(settings)
+        self.local_ai = None
+        if self.process is not None:
+            self._send(('config', self.settings))
+
+    def submit(self, state):
+        """
+        Start a search on a copy of `state`. Any unfinished request is
+        superseded: its result will be discarded.
+        """
+        self.next_id += 1
+        self.pending_id = self.next_id
+        self.pending_state = state.clone()
+
+        if self.use_process and self.process is None:
+            self._start_process()
+
+        if self.process is not None and self._send(('go', self.pending_id, self.pending_state)):
+            return
+        self._start_thread(self.pending_id, self.pending_state.clone())
+
+    def poll(self):
+        """
+        Returns (choice, ai_endgame_moves) once the current request is done,
+        otherwise None.
+        """
+        if self.pending_id is None:
+            return None
+
+        while True:
+            item = self._receive()
+            if item is None:
+                return None
+            request_id, choice, endgame_moves = item
+            if request_id == self.pending_id:
+                self.pending_id = None
+                self.pending_state = None
+                return choice, endgame_moves
+
+    def busy(self):
+        return self.pending_id is not None
+
+    def close(self):
+        self.pending_id = None
+        self.pending_state = None
+        if self.process is None:
+            return
+        self._send(None)
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        self.process = None
+        self.conn = None
+
+    # ---------------------------------------------------------
+    # PROCESS MODE
+    # ---------------------------------------------------------
+    def _start_process(self):
+        try:
+            import multiprocessing
+            ctx = multiprocessing.get_context('spawn')
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+            process.start()
+            child_conn.close()
+        except (ImportError, OSError, ValueError, NotImplementedError):
+            # no usable multiprocessing here: stay in-process
+            self.use_process = False
+            return
+
+        self.process = process
+        self.conn = parent_conn
+        self._send(('config', self.settings))
+
+    def _send(self, msg):
+        try:
+            self.conn.send(msg)
+            return True
+        except (OSError, ValueError, AttributeError):
+            self._drop_process()
+            return False
+
+    def _receive(self):
+        if self.process is None:
+            try:
+                return self.results.get_nowait()
+            except queue.Empty:
+                return None
+
+        try:
+            if self.conn.poll():
+                return self.conn.recv()
+        except (EOFError, OSError):
+            pass
+
+        if not self.process.is_alive():
+            # worker crashed: finish the request on a thread
+            self._drop_process()
+            if self.pending_id is not None:
+                self._start_thread(self.pending_id, self.pending_state.clone())
+        return None
+
+    def _drop_process(self):
+        self.use_process = False
+        if self.process is not None:
+            try:
+                self.conn.close()
+            except OSError:
+                pass
+            if self.process.is_alive():
+                self.process.terminate()
+        self.process = None
+        self.conn = None
+
+    # ---------------------------------------------------------
+    # THREAD MODE (fallback)
+    # ---------------------------------------------------------
+    def _start_thread(self, request_id, state):
+        if self.local_ai is None:
+            self.local_ai = _rebuild_ai(None, self.settings)
+        ai = self.local_ai
+
+        def run():
+            try:
+                choice = ai.choose_move(state)
+            except Exception:
+                choice = None
+            self.results.put((request_id, choice, state.ai_endgame_moves))
+
+        threading.Thread(target=run, daemon=True).start()
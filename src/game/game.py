@@ -1,6 +1,6 @@
 # src/game/game.py
-from copy import deepcopy
-from utils.utils import ADJACENT, MILLS, WHITE, BLACK, EMPTY
+from utils.utils import (ADJACENT, MILLS, POINT_MILLS, SYMMETRIES, MILL_PLACES,
+                         EMPTY_MILL_CODE, WHITE, BLACK, EMPTY)
 import json
 
 class GameState:
@@ -25,11 +25,80 @@ class GameState:
         # AI endgame counter
         self.ai_endgame_moves = 0
 
+        # repetition tracking: plies since the last placement/capture and a
+        # linked trail of the positions since then (key, quiet_plies,
+        # parent), shared between clones
+        self.quiet_plies = 0
+        self.trail = None
+
+        # optional draw rules (0 = off): N-fold repetition, N plies without a mill
+        self.repetition_limit = 0
+        self.quiet_move_limit = 0
+
+        # pieces on the board, kept up to date by make/unmake_move
+        self.white_on_board = 0
+        self.black_on_board = 0
+
+        # base-3 code of every mill line (see utils.MILL_PLACES), kept up
+        # to date by make/unmake_move for table-driven evaluation
+        self.mill_codes = [EMPTY_MILL_CODE] * len(MILLS)
+
+        # optional evaluator accumulator (see game.nnue), copied by clone()
+        # and updated by make/unmake_move; None when not in use
+        self.accumulator = None
+
+        # facts derived from this exact position (game over, mobility,
+        # capturable points...), filled on demand and dropped on change
+        self._derived = {}
+
     def clone(self):
-        return deepcopy(self)
+        # every field but the board is immutable (the trail and the derived
+        # cache are shared until one side changes position)
+        s = GameState.__new__(GameState)
+        s.__dict__.update(self.__dict__)
+        s.board = self.board[:]
+        s.mill_codes = self.mill_codes[:]
+        if self.accumulator is not None:
+            s.accumulator = self.accumulator.copy()
+        return s
+
+    def invalidate(self):
+        """
+        Call after editing `board` directly: recounts the pieces and drops
+        cached derived data.
+        """
+        self.white_on_board = self.board.count(WHITE)
+        self.black_on_board = self.board.count(BLACK)
+        codes = [EMPTY_MILL_CODE] * len(MILLS)
+        for pos, color in enumerate(self.board):
+            if color != EMPTY:
+                for m, weight in MILL_PLACES[pos]:
+                    codes[m] += color * weight
+        self.mill_codes = codes
+        self.accumulator = None
+        self._derived = {}
+
+    def __getstate__(self):
+        # pickled states only carry the trail back to the last irreversible move
+        data = self.__dict__.copy()
+        keep = []
+        node = self.trail
+        while node is not None and len(keep) < self.quiet_plies:
+            keep.append(node[:2])
+            node = node[2]
+        trail = None
+        for key, quiet in reversed(keep):
+            trail = (key, quiet, trail)
+        data['trail'] = trail
+        data['_derived'] = {}
+        data['accumulator'] = None
+        return data
+
+    def position_key(self):
+        return tuple(self.board), self.current, self.phase
 
     def pieces_count(self, color):
-        return sum(1 for p in self.board if p == color)
+        return self.white_on_board if color == WHITE else self.black_on_board
 
     def other(self, color):
         return -color
@@ -40,8 +109,8 @@ class GameState:
         color = board[pos]
         if color == EMPTY:
             return False
-        for a, b, c in MILLS:
-            if pos in (a, b, c) and board[a] == board[b] == board[c] == color:
+        for a, b in POINT_MILLS[pos]:
+            if board[a] == color and board[b] == color:
                 return True
         return False
 
@@ -64,89 +133,323 @@ class GameState:
     # LEGAL MOVES FOR ANY COLOR (used by AI)
     # ---------------------------------------------------------
     def legal_moves_for(self, color):
-        moves = []
+        return list(self.iter_legal_moves(color))
+
+    def iter_legal_moves(self, color):
+        board = self.board
 
         # placing phase
         if self.phase == 'placing':
             for i in range(24):
-                if self.board[i] == EMPTY:
-                    moves.append(('place', i))
-            return moves
+                if board[i] == EMPTY:
+                    yield ('place', i)
+            return
 
         # moving phase
-        my_positions = [i for i, p in enumerate(self.board) if p == color]
+        my_positions = [i for i, p in enumerate(board) if p == color]
 
         # flying
-        if self.pieces_count(color) == 3:
+        if len(my_positions) == 3:
+            empty = [i for i, p in enumerate(board) if p == EMPTY]
             for frm in my_positions:
-                for to in range(24):
-                    if self.board[to] == EMPTY:
-                        moves.append(('move', frm, to))
-            return moves
+                for to in empty:
+                    yield ('move', frm, to)
+            return
 
         # normal move
         for frm in my_positions:
             for to in ADJACENT[frm]:
-                if self.board[to] == EMPTY:
-                    moves.append(('move', frm, to))
+                if board[to] == EMPTY:
+                    yield ('move', frm, to)
+
+    # ---------------------------------------------------------
+    # STAGED CHILDREN (used by AI search)
+    # ---------------------------------------------------------
+    def iter_children(self, first=None):
+        """
+        Lazily yields (move, cap, quiet) for the current player, best first:
+          1. `first` (e.g. the transposition-table move), trusted as legal
+          2. mill-forming moves, one entry per capture choice
+          3. quiet moves
+        Mill tests use POINT_MILLS (no cloning) and the capture list is only
+        built when the first mill move is reached, so a node that cuts off
+        early does little generation work. Equivalent captures are
+        collapsed (see capture_choices).
+        """
+        if first is not None:
+            yield first[0], first[1], first[1] is None
+
+        color = self.current
+        captures = None
+        quiet = []
+        for move in self.iter_legal_moves(color):
+            if move[0] == 'place':
+                to, frm = move[1], None
+            else:
+                to, frm = move[2], move[1]
+
+            if not self.forms_mill(to, frm, color):
+                quiet.append(move)
+                continue
+
+            if captures is None:
+                captures = self.can_capture_positions()
+            for cap in self.capture_choices(move, captures):
+                if first is None or first[0] != move or first[1] != cap:
+                    yield move, cap, False
+
+        for move in quiet:
+            if first is None or first[0] != move or first[1] is not None:
+                yield move, None, True
+
+    def forms_mill(self, to, frm, color):
+        """
+        True if `color` closes a mill by moving to `to` (from `frm`, None
+        for a placement). The board itself is not modified.
+        """
+        board = self.board
+        for a, b in POINT_MILLS[to]:
+            if a != frm and b != frm and board[a] == color and board[b] == color:
+                return True
+        return False
+
+    def capture_choices(self, move, captures):
+        """
+        Captures worth searching after mill move `move`:
+        - if the capture leaves the opponent with 2 pieces after placing
+          ends, every capture wins at once, so one is enough;
+        - captures mapped onto each other by a board symmetry that also
+          fixes the position after the move give equivalent children,
+          so only one per orbit is kept.
+        """
+        if len(captures) < 2:
+            return captures
+
+        opp = -self.current
+        placing_done = (self.phase == 'moving'
+                        or (move[0] == 'place' and self.placed_white + self.placed_black + 1 >= 18))
+        if placing_done and self.board.count(opp) <= 3:
+            return captures[:1]
 
-        return moves
+        board = self.board[:]
+        if move[0] == 'place':
+            board[move[1]] = self.current
+        else:
+            board[move[1]] = EMPTY
+            board[move[2]] = self.current
+
+        # symmetries that leave the whole position unchanged
+        fixing = []
+        for perm in SYMMETRIES[1:]:
+            for i in range(24):
+                if board[perm[i]] != board[i]:
+                    break
+            else:
+                fixing.append(perm)
+        if not fixing:
+            return captures
+
+        kept = []
+        seen = set()
+        for cap in captures:
+            if cap in seen:
+                continue
+            kept.append(cap)
+            seen.update(perm[cap] for perm in fixing)
+        return kept
 
     # ---------------------------------------------------------
     # APPLY MOVE
     # ---------------------------------------------------------
     def apply_move(self, move, remove_pos=None):
         s = self.clone()
+        s.make_move(move, remove_pos)
+        return s
+
+    # ---------------------------------------------------------
+    # MAKE / UNMAKE (in place)
+    # ---------------------------------------------------------
+    def make_move(self, move, remove_pos=None):
+        """
+        Applies move to this state in place.
+        Returns an undo record (move, captured_pos, prev_phase, prev_trail)
+        for unmake_move; captured_pos is None when remove_pos was not a
+        legal capture target.
+        """
+        prev_phase = self.phase
+        prev_trail = (self.quiet_plies, self.trail)
+        key = self.position_key()
+        self._derived = {}
+        codes = self.mill_codes
+        color = self.current
 
         if move[0] == 'place':
             pos = move[1]
-            s.board[pos] = s.current
-
-            if s.current == WHITE:
-                s.placed_white += 1
-                s.white_unplaced -= 1
+            self.board[pos] = self.current
+            for m, weight in MILL_PLACES[pos]:
+                codes[m] += color * weight
+
+            if self.current == WHITE:
+                self.placed_white += 1
+                self.white_unplaced -= 1
+                self.white_on_board += 1
             else:
-                s.placed_black += 1
-                s.black_unplaced -= 1
-
-            if s.placed_white + s.placed_black >= 18:
-                s.phase = 'moving'
+                self.placed_black += 1
+                self.black_unplaced -= 1
+                self.black_on_board += 1
 
         elif move[0] == 'move':
             frm, to = move[1], move[2]
-            s.board[frm] = EMPTY
-            s.board[to] = s.current
+            self.board[frm] = EMPTY
+            self.board[to] = self.current
+            for m, weight in MILL_PLACES[frm]:
+                codes[m] -= color * weight
+            for m, weight in MILL_PLACES[to]:
+                codes[m] += color * weight
 
         # capture
+        captured = None
         if remove_pos is not None:
-            if s.board[remove_pos] == -s.current:
-                s.board[remove_pos] = EMPTY
-                if s.current == WHITE:
-                    s.captured_black += 1
+            if self.board[remove_pos] == -self.current:
+                self.board[remove_pos] = EMPTY
+                captured = remove_pos
+                for m, weight in MILL_PLACES[remove_pos]:
+                    codes[m] += color * weight
+                if self.current == WHITE:
+                    self.captured_black += 1
+                    self.black_on_board -= 1
                 else:
-                    s.captured_white += 1
+                    self.captured_white += 1
+                    self.white_on_board -= 1
 
         # switch turn
-        s.current = -s.current
+        self.current = -self.current
+
+        # placements and captures can't be undone over the board: no earlier
+        # position can recur, so the trail is cut there
+        if move[0] == 'place' or captured is not None:
+            self.quiet_plies = 0
+            self.trail = None
+        else:
+            self.quiet_plies += 1
+            self.trail = (key, prev_trail[0], prev_trail[1])
 
         # ensure phase transition
-        if s.phase == 'placing' and s.placed_white + s.placed_black >= 18:
-            s.phase = 'moving'
+        if self.phase == 'placing' and self.placed_white + self.placed_black >= 18:
+            self.phase = 'moving'
+
+        if self.accumulator is not None:
+            self.accumulator.played(move, captured, color, self.phase != prev_phase, 1)
+
+        return move, captured, prev_phase, prev_trail
+
+    def unmake_move(self, undo):
+        """
+        Reverts a make_move given its undo record. A record rebuilt without
+        prev_trail (move, captured_pos, prev_phase) restores the trail of a
+        quiet move; after a placement or capture it is left empty.
+        """
+        move, captured, prev_phase = undo[:3]
+
+        self.current = -self.current
+        mover = self.current
+        self._derived = {}
+        codes = self.mill_codes
+
+        if captured is not None:
+            self.board[captured] = -mover
+            for m, weight in MILL_PLACES[captured]:
+                codes[m] -= mover * weight
+            if mover == WHITE:
+                self.captured_black -= 1
+                self.black_on_board += 1
+            else:
+                self.captured_white -= 1
+                self.white_on_board += 1
 
-        return s
+        if move[0] == 'place':
+            self.board[move[1]] = EMPTY
+            for m, weight in MILL_PLACES[move[1]]:
+                codes[m] -= mover * weight
+            if mover == WHITE:
+                self.placed_white -= 1
+                self.white_unplaced += 1
+                self.white_on_board -= 1
+            else:
+                self.placed_black -= 1
+                self.black_unplaced += 1
+                self.black_on_board -= 1
+
+        elif move[0] == 'move':
+            frm, to = move[1], move[2]
+            self.board[to] = EMPTY
+            self.board[frm] = mover
+            for m, weight in MILL_PLACES[to]:
+                codes[m] -= mover * weight
+            for m, weight in MILL_PLACES[frm]:
+                codes[m] += mover * weight
+
+        if self.accumulator is not None:
+            self.accumulator.played(move, captured, mover, self.phase != prev_phase, -1)
+
+        self.phase = prev_phase
+        if len(undo) > 3:
+            self.quiet_plies, self.trail = undo[3]
+        elif self.trail is not None:
+            _, self.quiet_plies, self.trail = self.trail
+        else:
+            self.quiet_plies = 0
 
     def can_capture_positions(self):
-        opp = -self.current
-        positions = [i for i, p in enumerate(self.board) if p == opp and not self.in_mill(i)]
-        if positions:
-            return positions
-        return [i for i, p in enumerate(self.board) if p == opp]
+        """
+        Opponent points the current player may capture (cached; don't modify).
+        """
+        positions = self._derived.get('capturable')
+        if positions is None:
+            opp = -self.current
+            positions = [i for i, p in enumerate(self.board) if p == opp and not self.in_mill(i)]
+            if not positions:
+                positions = [i for i, p in enumerate(self.board) if p == opp]
+            self._derived['capturable'] = positions
+        return positions
+
+    # ---------------------------------------------------------
+    # DERIVED FACTS (cached per position)
+    # ---------------------------------------------------------
+    def mobility(self, color):
+        """
+        Number of legal moves for `color`.
+        """
+        key = ('mobility', color)
+        count = self._derived.get(key)
+        if count is None:
+            count = sum(1 for _ in self.iter_legal_moves(color))
+            self._derived[key] = count
+        return count
+
+    def has_legal_move(self, color=None):
+        """
+        Early-exit test: stops at the first legal move found.
+        """
+        if color is None:
+            color = self.current
+        count = self._derived.get(('mobility', color))
+        if count is not None:
+            return count > 0
+        return next(self.iter_legal_moves(color), None) is not None
 
     def is_game_over(self):
         # During placing phase, nobody can lose by piece count
         if self.phase == 'placing':
             return False, None
 
+        result = self._derived.get('over')
+        if result is None:
+            result = self._game_over()
+            self._derived['over'] = result
+        return result
+
+    def _game_over(self):
         # After placing phase, piece count matters
         for color in (WHITE, BLACK):
             if self.pieces_count(color) < 3:
@@ -154,22 +457,56 @@ class GameState:
 
         # In moving phase, check if current player is blocked
         if self.phase == 'moving':
-            if not self.legal_moves():
+            if not self.has_legal_move():
                 return True, -self.current
 
+            # optional draw rules: (True, None)
+            if self.quiet_move_limit and self.quiet_plies >= self.quiet_move_limit:
+                return True, None
+            if self.repetition_limit and self.repetition_count() >= self.repetition_limit:
+                return True, None
+
         return False, None
 
+    # ---------------------------------------------------------
+    # REPETITIONS
+    # ---------------------------------------------------------
+    def repetition_count(self):
+        """
+        How many times the current position has occurred, this one included.
+        Only positions since the last placement/capture can match.
+        """
+        key = self.position_key()
+        count = 1
+        node = self.trail
+        plies = 1
+        while node is not None and plies <= self.quiet_plies:
+            if plies % 2 == 0 and node[0] == key:
+                count += 1
+            node = node[2]
+            plies += 1
+        return count
+
+    def is_repetition(self):
+        """
+        True if the current position already occurred earlier in the game
+        (or earlier on the search path).
+        """
+        key = self.position_key()
+        node = self.trail
+        plies = 1
+        while node is not None and plies <= self.quiet_plies:
+            if plies % 2 == 0 and node[0] == key:
+                return True
+            node = node[2]
+            plies += 1
+        return False
+
     def last_move_forms_mill(self, move):
-        temp = self.clone()
         if move[0] == 'place':
-            pos = move[1]
-            temp.board[pos] = temp.current
-            return bool(temp.mills_formed_by_move(pos, temp.current, temp.board))
+            return self.forms_mill(move[1], None, self.current)
         elif move[0] == 'move':
-            frm, to = move[1], move[2]
-            temp.board[frm] = EMPTY
-            temp.board[to] = temp.current
-            return bool(temp.mills_formed_by_move(to, temp.current, temp.board))
+            return self.forms_mill(move[2], move[1], self.current)
         return False
 
     # ---------------------------------------------------------
@@ -187,7 +524,10 @@ class GameState:
             "captured_white": self.captured_white,
             "captured_black": self.captured_black,
             "total_per_side": self.total_per_side,
-            "ai_endgame_moves": self.ai_endgame_moves
+            "ai_endgame_moves": self.ai_endgame_moves,
+            "quiet_plies": self.quiet_plies,
+            "repetition_limit": self.repetition_limit,
+            "quiet_move_limit": self.quiet_move_limit
         }
         return json.dumps(data)
 
@@ -213,4 +553,108 @@ class GameState:
 
         s.ai_endgame_moves = data.get("ai_endgame_moves", 0)
 
-        return s
\ No newline at end of file
+        s.quiet_plies = data.get("quiet_plies", 0)
+        s.repetition_limit = data.get("repetition_limit", 0)
+        s.quiet_move_limit = data.get("quiet_move_limit", 0)
+
+        s.invalidate()
+        return s
+
+    # ---------------------------------------------------------
+    # NOTATION (compact one-line position)
+    # ---------------------------------------------------------
+    def to_notation(self):
+        """
+        "<board> <side> <phase> <wu>/<bu> <cw>/<cb>[ <pw>/<pb> <total> <endgame> <quiet>[ <rep>/<qlimit>]]"
+        board: points 0..23 as W / B / digit runs of empty points, in
+        three groups of 8 separated by '/' (empty board: "8/8/8").
+        side: w|b, phase: p|m, then unplaced and captured counts per color.
+        The bracketed fields are only written when they differ from the
+        defaults (placed = total - unplaced, total 9, endgame counter 0,
+        0 plies since the last placement/capture, draw rules off:
+        repetition_limit / quiet_move_limit 0). The trail of earlier
+        positions is not part of the notation.
+        """
+        groups = []
+        for g in range(0, 24, 8):
+            out = []
+            run = 0
+            for p in self.board[g:g + 8]:
+                if p == EMPTY:
+                    run += 1
+                    continue
+                if run:
+                    out.append(str(run))
+                    run = 0
+                out.append('W' if p == WHITE else 'B')
+            if run:
+                out.append(str(run))
+            groups.append(''.join(out))
+
+        text = (
+            f"{'/'.join(groups)} {'w' if self.current == WHITE else 'b'}"
+            f" {'p' if self.phase == 'placing' else 'm'}"
+            f" {self.white_unplaced}/{self.black_unplaced}"
+            f" {self.captured_white}/{self.captured_black}"
+        )
+        if (self.placed_white != self.total_per_side - self.white_unplaced
+                or self.placed_black != self.total_per_side - self.black_unplaced
+                or self.total_per_side != 9 or self.ai_endgame_moves != 0
+                or self.quiet_plies != 0 or self.repetition_limit or self.quiet_move_limit):
+            text += (
+                f" {self.placed_white}/{self.placed_black}"
+                f" {self.total_per_side} {self.ai_endgame_moves} {self.quiet_plies}"
+            )
+            if self.repetition_limit or self.quiet_move_limit:
+                text += f" {self.repetition_limit}/{self.quiet_move_limit}"
+        return text
+
+    @staticmethod
+    def from_notation(text):
+        fields = text.split()
+        if len(fields) not in (5, 8, 9, 10):
+            raise ValueError(f"Bad position notation: {text!r}")
+
+        board = []
+        groups = fields[0].split('/')
+        if len(groups) != 3:
+            raise ValueError(f"Bad board in notation: {fields[0]!r}")
+        for group in groups:
+            start = len(board)
+            for ch in group:
+                if ch == 'W':
+                    board.append(WHITE)
+                elif ch == 'B':
+                    board.append(BLACK)
+                elif ch in '12345678':
+                    board.extend([EMPTY] * int(ch))
+                else:
+                    raise ValueError(f"Bad board in notation: {fields[0]!r}")
+            if len(board) - start != 8:
+                raise ValueError(f"Bad board in notation: {fields[0]!r}")
+
+        if fields[1] not in ('w', 'b') or fields[2] not in ('p', 'm'):
+            raise ValueError(f"Bad position notation: {text!r}")
+
+        s = GameState()
+        s.board = board
+        s.current = WHITE if fields[1] == 'w' else BLACK
+        s.phase = 'placing' if fields[2] == 'p' else 'moving'
+        try:
+            s.white_unplaced, s.black_unplaced = map(int, fields[3].split('/'))
+            s.captured_white, s.captured_black = map(int, fields[4].split('/'))
+            if len(fields) >= 8:
+                s.placed_white, s.placed_black = map(int, fields[5].split('/'))
+                s.total_per_side = int(fields[6])
+                s.ai_endgame_moves = int(fields[7])
+                if len(fields) >= 9:
+                    s.quiet_plies = int(fields[8])
+                if len(fields) == 10:
+                    s.repetition_limit, s.quiet_move_limit = map(int, fields[9].split('/'))
+            else:
+                s.placed_white = s.total_per_side - s.white_unplaced
+                s.placed_black = s.total_per_side - s.black_unplaced
+        except ValueError:
+            raise ValueError(f"Bad position notation: {text!r}") from None
+        s.invalidate()
+        return s
@@ -0,0 +1,179 @@
+# src/game/history.py
+from array import array
+
+from game.game import GameState
+
+# ---------------------------------------------------------
+# PACKED PLY: 16 bits
+#   bits 0-4   from point (NO_POINT for placements)
+#   bits 5-9   to point
+#   bits 10-14 captured point (NO_POINT when nothing was captured)
+#   bit  15    phase was 'placing' before the ply
+# ---------------------------------------------------------
+NO_POINT = 24
+PLACING_BIT = 1 << 15
+
+
+def encode_ply(move, cap=None, was_placing=False):
+    if move[0] == 'place':
+        frm, to = NO_POINT, move[1]
+    else:
+        frm, to = move[1], move[2]
+    cap = NO_POINT if cap is None else cap
+    code = frm | (to << 5) | (cap << 10)
+    if was_placing:
+        code |= PLACING_BIT
+    return code
+
+
+def decode_ply(code):
+    """
+    Returns (move, cap, was_placing).
+    """
+    frm = code & 31
+    to = (code >> 5) & 31
+    cap = (code >> 10) & 31
+    move = ('place', to) if frm == NO_POINT else ('move', frm, to)
+    return move, (None if cap == NO_POINT else cap), bool(code & PLACING_BIT)
+
+
+class MoveHistory:
+    """
+    Game history as a start position plus packed ply deltas.
+
+    Every ply costs 2 bytes. Undo and redo unmake or remake a single ply on
+    the live state in place: O(1), except that taking back a placement or
+    capture rebuilds the repetition trail by unmaking, on a copy, every
+    quiet ply since the irreversible ply before it (O(quiet plies)).
+    When more than max_plies are kept, the oldest plies are folded into
+    the start position in one chunk.
+    """
+
+    def __init__(self, start=None, max_plies=1000000):
+        self.start = start.clone() if start is not None else GameState()
+        self.max_plies = max(1, int(max_plies))
+        self.plies = array('H')
+        self.cursor = 0   # plies[:cursor] are played, the rest can be redone
+
+    def __len__(self):
+        return self.cursor
+
+    def reset(self, start):
+        self.start = start.clone()
+        del self.plies[:]
+        self.cursor = 0
+
+    def can_undo(self):
+        return self.cursor > 0
+
+    def can_redo(self):
+        return self.cursor < len(self.plies)
+
+    # ---------------------------------------------------------
+    # PLAY / UNDO / REDO (all in place on `state`)
+    # ---------------------------------------------------------
+    def play(self, state, move, cap=None):
+        """
+        Applies (move, cap) to `state` and records it. Any redo tail is
+        discarded.
+        """
+        _, captured, prev_phase, _ = state.make_move(move, cap)
+
+        del self.plies[self.cursor:]
+        self.plies.append(encode_ply(move, captured, prev_phase == 'placing'))
+        self.cursor += 1
+
+        if self.cursor > self.max_plies:
+            self._fold(self.cursor - self.max_plies + self.max_plies // 4)
+
+    def undo(self, state):
+        """
+        Takes back the last played ply. Returns (move, cap) or None.
+        """
+        if self.cursor == 0:
+            return None
+        self.cursor -= 1
+        move, cap, was_placing = decode_ply(self.plies[self.cursor])
+        state.unmake_move((move, cap, 'placing' if was_placing else 'moving'))
+        if move[0] == 'place' or cap is not None:
+            self._rebuild_trail(state)
+        return move, cap
+
+    def _rebuild_trail(self, state):
+        """
+        Restores the repetition trail of `state` (at the cursor) after a
+        placement or capture was taken back: the positions since the ply
+        before it that was irreversible, recovered by unmaking the quiet
+        plies in between on a copy.
+        """
+        scratch = state.clone()
+        keys = []
+        i = self.cursor - 1
+        while i >= 0:
+            move, cap, was_placing = decode_ply(self.plies[i])
+            if move[0] == 'place' or cap is not None:
+                break
+            scratch.unmake_move((move, cap, 'placing' if was_placing else 'moving'))
+            keys.append(scratch.position_key())
+            i -= 1
+
+        # reaching the start position, its own trail continues the chain
+        quiet, trail = (self.start.quiet_plies, self.start.trail) if i < 0 else (0, None)
+        for key in reversed(keys):
+            trail = (key, quiet, trail)
+            quiet += 1
+        state.quiet_plies, state.trail = quiet, trail
+
+    def redo(self, state):
+        """
+        Replays the next undone ply. Returns (move, cap) or None.
+        """
+        if self.cursor == len(self.plies):
+            return None
+        move, cap, _ = decode_ply(self.plies[self.cursor])
+        state.make_move(move, cap)
+        self.cursor += 1
+        return move, cap
+
+    # ---------------------------------------------------------
+    # REPLAY
+    # ---------------------------------------------------------
+    def moves(self):
+        """
+        Played plies as (move, cap) tuples, oldest first.
+        """
+        for i in range(self.cursor):
+            move, cap, _ = decode_ply(self.plies[i])
+            yield move, cap
+
+    def positions(self):
+        """
+        Yields the start position and the state after every played ply.
+        The same GameState object is updated in place between yields.
+        """
+        state = self.start.clone()
+        yield state
+        for i in range(self.cursor):
+            move, cap, _ = decode_ply(self.plies[i])
+            state.make_move(move, cap)
+            yield state
+
+    def current_state(self):
+        state = None
+        for state in self.positions():
+            pass
+        return state.clone()
+
+    # ---------------------------------------------------------
+    # MEMORY BOUND
+    # ---------------------------------------------------------
+    def _fold(self, count):
+        """
+        Moves the oldest `count` plies into the start position.
+        """
+        count = min(count, self.cursor)
+        for i in range(count):
+            move, cap, _ = decode_ply(self.plies[i])
+            self.start.make_move(move, cap)
+        del self.plies[:count]
+        self.cursor -= count
@@ -0,0 +1,476 @@
+# src/game/mcts.py
+"""
+Monte Carlo Tree Search player, an alternative to the alpha-beta AIPlayer.
+
+    MCTSPlayer(max_playouts=2000).choose_move(state) -> (move, cap)
+
+The tree is built from the exact game (GameState.iter_children and
+is_game_over, draw rules included). Leaves are scored by random playouts
+on a compact bitmask state (white mask, black mask, placements left, side
+to move) with a light policy: close a mill when possible, during placing
+block the opponent's open two, otherwise play at random. Playouts longer
+than `playout_plies` are scored by the piece balance.
+
+Selection is UCT (policy='uct') or PUCT with priors from the same move
+heuristics (policy='puct'). The subtree of the position actually reached
+is kept between moves. With processes > 1 the search runs in parallel:
+    parallel='root'  independent trees (this one included) over the same
+                     root; their root visit counts are summed;
+    parallel='leaf'  one tree; leaves are collected in batches with a
+                     virtual loss on their paths so selections spread
+                     out, then played out by the worker processes.
+"""
+import math
+import random
+import time
+
+from game.game import GameState
+from utils.utils import ADJACENT, MILLS, POINT_MILLS, WHITE, BLACK
+
+FULL = (1 << 24) - 1
+ADJ_MASK = [sum(1 << q for q in ADJACENT[p]) for p in range(24)]
+MILL_MASKS = [(1 << a) | (1 << b) | (1 << c) for a, b, c in MILLS]
+POINT_MILL_MASKS = [[m for m in MILL_MASKS if m >> p & 1] for p in range(24)]
+
+
+# ======================================================================
+# PLAYOUTS (compact state)
+# ======================================================================
+def compact_state(state):
+    """
+    GameState -> (white mask, black mask, placements left, side to move).
+    """
+    white = black = 0
+    for i, p in enumerate(state.board):
+        if p == WHITE:
+            white |= 1 << i
+        elif p == BLACK:
+            black |= 1 << i
+    left = 0
+    if state.phase == 'placing':
+        left = max(0, 18 - state.placed_white - state.placed_black)
+    return white, black, left, state.current
+
+
+def _points(mask):
+    points = []
+    while mask:
+        low = mask & -mask
+        points.append(low.bit_length() - 1)
+        mask ^= low
+    return points
+
+
+def _closes_mill(own, to):
+    for m in POINT_MILL_MASKS[to]:
+        if own & m == m:
+            return True
+    return False
+
+
+def _capturable(opp):
+    in_mill = 0
+    for m in MILL_MASKS:
+        if opp & m == m:
+            in_mill |= m
+    free = opp & ~in_mill
+    return free if free else opp
+
+
+def playout(compact, rng, max_plies=80):
+    """
+    Plays a compact state out; returns white's result in [0, 1]
+    (1 win, 0 loss, 0.5 draw; the piece balance when cut off).
+    """
+    white, black, left, side = compact
+    own, opp = (white, black) if side == WHITE else (black, white)
+
+    for _ in range(max_plies):
+        empty = FULL & ~(own | opp)
+        if left > 0:
+            targets = _points(empty)
+            to = None
+            for p in targets:
+                if _closes_mill(own | (1 << p), p):
+                    to = p
+                    break
+            if to is None:
+                for p in targets:
+                    if _closes_mill(opp | (1 << p), p):
+                        to = p
+                        break
+            if to is None:
+                to = rng.choice(targets)
+            own |= 1 << to
+            left -= 1
+        else:
+            n_own = own.bit_count()
+            if n_own < 3:
+                return 0.0 if side == WHITE else 1.0
+            if opp.bit_count() < 3:
+                return 1.0 if side == WHITE else 0.0
+            froms = _points(own)
+            if n_own == 3:
+                moves = [(f, t) for f in froms for t in _points(empty)]
+            else:
+                moves = [(f, t) for f in froms for t in _points(ADJ_MASK[f] & empty)]
+            if not moves:
+                return 0.0 if side == WHITE else 1.0
+            chosen = None
+            for f, t in moves:
+                if _closes_mill((own & ~(1 << f)) | (1 << t), t):
+                    chosen = f, t
+                    break
+            if chosen is None:
+                chosen = rng.choice(moves)
+            f, to = chosen
+            own = (own & ~(1 << f)) | (1 << to)
+
+        if _closes_mill(own, to):
+            opp &= ~(1 << rng.choice(_points(_capturable(opp))))
+
+        own, opp = opp, own
+        side = -side
+
+    white, black = (own, opp) if side == WHITE else (opp, own)
+    return min(1.0, max(0.0, 0.5 + 0.1 * (white.bit_count() - black.bit_count())))
+
+
+def _run_playouts(jobs):
+    # worker side of leaf parallelism: [(compact, seed, max_plies), ...]
+    return [playout(compact, random.Random(seed), plies) for compact, seed, plies in jobs]
+
+
+def _root_worker(notation, settings, seed, playouts, seconds):
+    # worker side of root parallelism: an independent tree's root visits
+    player = MCTSPlayer(seed=seed, max_playouts=playouts, max_time=seconds, **settings)
+    state = GameState.from_notation(notation)
+    player._grow(player._new_root(state))
+    return {child.choice: (child.visits, child.wins) for child in player.root.children}
+
+
+# ======================================================================
+# TREE
+# ======================================================================
+class Node:
+    """
+    A position in the tree. wins are counted for `mover`, the side that
+    played `choice` to reach it.
+    """
+    __slots__ = ('parent', 'choice', 'mover', 'prior', 'children',
+                 'visits', 'wins', 'virtual', 'result')
+
+    def __init__(self, parent, choice, mover, prior=1.0):
+        self.parent = parent
+        self.choice = choice
+        self.mover = mover
+        self.prior = prior
+        self.children = None     # None until expanded
+        self.visits = 0
+        self.wins = 0.0
+        self.virtual = 0
+        self.result = None       # white's result when the game is over here
+
+
+# ======================================================================
+# PLAYER
+# ======================================================================
+class MCTSPlayer:
+    """
+    Same contract as AIPlayer: choose_move(state) -> (move, cap) or None.
+    """
+
+    def __init__(self, color=BLACK, max_time=1.8, max_playouts=0, seed=None, policy='puct',
+                 exploration=None, processes=1, parallel='root', batch=8, playout_plies=80,
+                 reuse=True):
+        if policy not in ('uct', 'puct'):
+            raise ValueError(f"Unknown policy: {policy}")
+        if parallel not in ('root', 'leaf'):
+            raise ValueError(f"Unknown parallel mode: {parallel}")
+        self.color = color
+
+        # limits, combinable; 0 disables a limit
+        self.max_time = float(max_time)
+        self.max_playouts = int(max_playouts)
+        self.rng = random.Random(seed)
+
+        self.policy = policy
+        self.exploration = (exploration if exploration is not None
+                            else (1.4 if policy == 'uct' else 2.0))
+        self.processes = max(1, int(processes))
+        self.parallel = parallel
+        self.batch = max(1, int(batch))
+        self.playout_plies = int(playout_plies)
+        self.reuse = bool(reuse)
+
+        self.root = None
+        self.root_state = None
+        self.pool = None
+
+        # last search: playouts (as nodes, for arena statistics), the chosen
+        # move's win rate for the side to move and the reused visits
+        self.nodes = 0
+        self.score = None
+        self.reused = 0
+
+    # ======================================================================
+    # PUBLIC
+    # ======================================================================
+    def choose_move(self, state):
+        """
+        Returns (move, capture_pos) for the side to move, None if it has
+        no move.
+        """
+        if state.is_game_over()[0]:
+            return None
+        children = list(state.iter_children())
+        if not children:
+            return None
+        self.nodes = 0
+        if not (self.max_time or self.max_playouts):
+            move, cap, _ = self.rng.choice(children)
+            return move, cap
+        for move, cap, _ in children:
+            over, winner = state.apply_move(move, cap).is_game_over()
+            if over and winner == state.current:
+                self.score = 1.0
+                return move, cap
+
+        root = self._root_for(state)
+        self.reused = root.visits
+        extra = {}
+        if self.processes > 1 and self._start_pool():
+            if self.parallel == 'root':
+                extra = self._grow_root_parallel(state, root)
+            else:
+                self._grow(root, leaf_pool=True)
+        else:
+            self._grow(root)
+
+        counts = {c.choice: [c.visits, c.wins, c.prior] for c in root.children}
+        for choice, (visits, wins) in extra.items():
+            counts[choice][0] += visits
+            counts[choice][1] += wins
+            self.nodes += visits
+        # most visits; with none (a limit hit before the first playout) the
+        # policy's favourite legal move
+        best = max(counts, key=lambda choice: (counts[choice][0], counts[choice][2]))
+        visits, wins, _ = counts[best]
+        self.score = wins / visits if visits else None
+        return best
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    # ======================================================================
+    # PRIVATE: tree
+    # ======================================================================
+    def _new_root(self, state):
+        self.root = Node(None, None, -state.current)
+        self.root_state = state.clone()
+        return self.root
+
+    def _root_for(self, state):
+        """
+        The kept subtree for `state` when it is one or two plies below the
+        previous root, otherwise a new root.
+        """
+        old, old_state = self.root, self.root_state
+        if self.reuse and old is not None and old.children:
+            key = state.position_key()
+            frontier = [(old, old_state)]
+            for _ in range(2):
+                nxt = []
+                for node, s in frontier:
+                    for child in node.children or ():
+                        cs = s.apply_move(*child.choice)
+                        if (cs.position_key() == key
+                                and cs.white_unplaced == state.white_unplaced
+                                and cs.black_unplaced == state.black_unplaced):
+                            child.parent = None
+                            self.root = child
+                            self.root_state = state.clone()
+                            return child
+                        nxt.append((child, cs))
+                frontier = nxt
+        return self._new_root(state)
+
+    def _expand(self, node, state):
+        over, winner = state.is_game_over()
+        if over:
+            node.result = 0.5 if winner is None else (1.0 if winner == WHITE else 0.0)
+            node.children = []
+            return
+        mover = state.current
+        children = [Node(node, (move, cap), mover) for move, cap, _ in state.iter_children()]
+        if self.policy == 'puct' and children:
+            weights = [self._prior_weight(state, c.choice) for c in children]
+            total = sum(weights)
+            for c, w in zip(children, weights):
+                c.prior = w / total
+        node.children = children
+
+    def _prior_weight(self, state, choice):
+        # heuristic policy: captures first, then moves blocking an open two
+        move, cap = choice
+        if cap is not None:
+            return 4.0
+        to = move[1] if move[0] == 'place' else move[2]
+        opp = -state.current
+        for a, b in POINT_MILLS[to]:
+            if state.board[a] == opp and state.board[b] == opp:
+                return 2.0
+        return 1.0
+
+    def _select(self, node):
+        parent_n = node.visits + node.virtual
+        c = self.exploration
+        best, best_value = None, -math.inf
+        if self.policy == 'uct':
+            log_n = math.log(parent_n) if parent_n > 0 else 0.0
+            for child in node.children:
+                n = child.visits + child.virtual
+                if n == 0:
+                    value = math.inf
+                else:
+                    value = child.wins / n + c * math.sqrt(log_n / n)
+                if value > best_value:
+                    best, best_value = child, value
+        else:
+            sqrt_n = math.sqrt(parent_n + 1)
+            for child in node.children:
+                n = child.visits + child.virtual
+                q = child.wins / n if n else 0.5
+                value = q + c * child.prior * sqrt_n / (1 + n)
+                if value > best_value:
+                    best, best_value = child, value
+        return best
+
+    def _descend(self, root, root_state):
+        """
+        Selects and expands one leaf, adding a virtual loss along the path.
+        Returns (path, leaf state).
+        """
+        node = root
+        state = root_state.clone()
+        path = [node]
+        node.virtual += 1
+        while True:
+            if node.children is None:
+                self._expand(node, state)
+                if node is not root:
+                    # a new leaf is played out from here
+                    break
+            if not node.children:
+                break
+            node = self._select(node)
+            state.make_move(*node.choice)
+            path.append(node)
+            node.virtual += 1
+        return path, state
+
+    def _backup(self, path, white_result):
+        for node in path:
+            node.visits += 1
+            node.virtual -= 1
+            node.wins += white_result if node.mover == WHITE else 1.0 - white_result
+
+    def _limits_reached(self, root, start, done_before):
+        if self.max_playouts and root.visits - done_before >= self.max_playouts:
+            return True
+        if self.max_time and time.time() - start >= self.max_time:
+            return True
+        return not self.max_playouts and not self.max_time
+
+    def _grow(self, root, leaf_pool=False):
+        """
+        Runs playouts into the tree until a limit is reached.
+        """
+        root_state = self.root_state
+        if root.children is None:
+            # expanded up front, so the root has its moves even if no
+            # playout fits in the limits
+            self._expand(root, root_state)
+        start = time.time()
+        done_before = root.visits
+        while not self._limits_reached(root, start, done_before):
+            if not leaf_pool:
+                path, leaf_state = self._descend(root, root_state)
+                leaf = path[-1]
+                if leaf.result is not None:
+                    self._backup(path, leaf.result)
+                else:
+                    self._backup(path, playout(compact_state(leaf_state), self.rng,
+                                               self.playout_plies))
+                self.nodes += 1
+                continue
+
+            # leaf parallelism: a batch of leaves per worker, virtual losses
+            # keep the selections apart until the results are backed up
+            pending = []
+            for _ in range(self.batch * self.processes):
+                path, leaf_state = self._descend(root, root_state)
+                if path[-1].result is not None:
+                    self._backup(path, path[-1].result)
+                else:
+                    pending.append((path, (compact_state(leaf_state),
+                                           self.rng.randrange(1 << 30), self.playout_plies)))
+            jobs = [[job for _, job in pending[k::self.processes]] for k in range(self.processes)]
+            results = list(self.pool.map(_run_playouts, jobs))
+            for k, values in enumerate(results):
+                for (path, _), value in zip(pending[k::self.processes], values):
+                    self._backup(path, value)
+            self.nodes += self.batch * self.processes
+
+    def _grow_root_parallel(self, state, root):
+        """
+        Grows this tree while processes - 1 independent ones search the
+        same root; returns their summed root counts {choice: (visits, wins)}.
+        """
+        settings = {
+            'policy': self.policy, 'exploration': self.exploration,
+            'playout_plies': self.playout_plies, 'reuse': False,
+        }
+        share = -(-self.max_playouts // self.processes) if self.max_playouts else 0
+        notation = state.to_notation()
+        futures = [
+            self.pool.submit(_root_worker, notation, settings, self.rng.randrange(1 << 30),
+                             share, self.max_time)
+            for _ in range(self.processes - 1)
+        ]
+        own_limit = self.max_playouts
+        self.max_playouts = share
+        try:
+            self._grow(root)
+        finally:
+            self.max_playouts = own_limit
+
+        counts = {}
+        for future in futures:
+            for choice, (visits, wins) in future.result().items():
+                v, w = counts.get(choice, (0, 0.0))
+                counts[choice] = (v + visits, w + wins)
+        return counts
+
+    def _start_pool(self):
+        """
+        Starts the worker processes on first use; False when they are not
+        available (e.g. inside a daemon process such as the GUI's engine host).
+        """
+        if self.pool is not None:
+            return True
+        try:
+            import concurrent.futures
+            import multiprocessing
+            if multiprocessing.current_process().daemon:
+                raise OSError("daemon processes cannot have children")
+            ctx = multiprocessing.get_context('spawn')
+            workers = self.processes - 1 if self.parallel == 'root' else self.processes
+            self.pool = concurrent.futures.ProcessPoolExecutor(workers, mp_context=ctx)
+        except (ImportError, OSError, ValueError, NotImplementedError):
+            self.processes = 1
+            return False
+        return True
+
@@ -0,0 +1,388 @@
+# src/game/nnue.py
+"""
+Small learned evaluation with an incrementally updated first layer.
+
+    python -m game.tuning generate --games 500 --nodes 3000 -o selfplay.npz
+    python -m game.nnue train selfplay.npz [more.npz ...] [-o src/game/nnue.npz]
+    python -m game.nnue bench --nodes 5000 --games 20
+
+The network is 52 inputs -> HIDDEN clipped-ReLU units -> 1 output:
+    0..23    white piece on point i
+    24..47   black piece on point i
+    48, 49   white / black pieces still to place (counts)
+    50       placing phase
+    51       white to move
+Weights are stored quantized (first layer int16 scaled by QA, output int16
+scaled by QB) in an .npz, and evaluation is integer arithmetic only.
+
+The first-layer sums (the accumulator) live on GameState.accumulator:
+prepare() attaches one to the search root, and make/unmake_move add or
+subtract the weight rows of the features a placement, move or capture
+changes, so a node only pays for the HIDDEN-wide tail. AIPlayer uses it
+with evaluator='nnue' (default weights file NNUE_FILE) or any
+NNUEEvaluator instance.
+
+Training fits the float network to a blend of game results and the
+hand-written evaluation (squashed with the Texel K) on game.tuning
+self-play files, then quantizes. Needs numpy.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from game.ai import AIPlayer, load_weights
+from game.batch_eval import boards_from_masks, evaluate_batch
+from game.game import GameState
+from utils.utils import WHITE, BLACK, EMPTY
+
+NNUE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nnue.npz')
+
+INPUTS = 52
+RESERVE = 48      # + 0 white, + 1 black
+PHASE = 50
+SIDE = 51
+HIDDEN = 32
+QA = 255          # first layer scale; activations clip to [0, QA]
+QB = 64           # output layer scale
+SCALE = 400.0     # centipawns -> sigmoid argument, as in game.tuning
+
+
+def _offset(color):
+    return 0 if color == WHITE else 24
+
+
+# ======================================================================
+# ACCUMULATOR
+# ======================================================================
+class Accumulator:
+    """
+    First-layer sums (int32, HIDDEN) of one position for one network.
+    """
+    __slots__ = ('net', 'values')
+
+    def __init__(self, net, values):
+        self.net = net
+        self.values = values
+
+    def copy(self):
+        return Accumulator(self.net, self.values.copy())
+
+    def played(self, move, captured, mover, phase_changed, sign):
+        """
+        Applies (sign 1) or takes back (sign -1) one ply of `mover`.
+        """
+        net = self.net
+        c = 0 if mover == WHITE else 1
+        if move[0] == 'place':
+            delta = net.place_delta[c, move[1]]
+        else:
+            delta = net.move_delta[c, move[1], move[2]]
+        if captured is not None:
+            delta = delta + net.capture_delta[c, captured]
+        if phase_changed:
+            delta = delta + net.phase_delta
+        if sign > 0:
+            self.values += delta
+        else:
+            self.values -= delta
+
+
+# ======================================================================
+# EVALUATOR
+# ======================================================================
+class NNUEEvaluator:
+    """
+    evaluate(state, color) from quantized weights:
+    w1 int16 (INPUTS, H), b1 int32 (H,), w2 int16 (H,), b2 int32.
+    """
+
+    def __init__(self, w1, b1, w2, b2):
+        w1 = np.asarray(w1, dtype=np.int32)
+        if w1.ndim != 2 or w1.shape[0] != INPUTS:
+            raise ValueError(f"first layer must be ({INPUTS}, hidden), got {w1.shape}")
+        self.hidden = w1.shape[1]
+        self.w1 = w1
+        self.b1 = np.asarray(b1, dtype=np.int32).reshape(self.hidden)
+        self.w2 = np.asarray(w2, dtype=np.int32).reshape(self.hidden)
+        self.b2 = int(b2)
+
+        # per-ply accumulator deltas, side-to-move flip included
+        side = {WHITE: -w1[SIDE], BLACK: w1[SIDE]}
+        self.place_delta = np.empty((2, 24, self.hidden), dtype=np.int32)
+        self.move_delta = np.empty((2, 24, 24, self.hidden), dtype=np.int32)
+        self.capture_delta = np.empty((2, 24, self.hidden), dtype=np.int32)
+        for c, color in enumerate((WHITE, BLACK)):
+            own = w1[_offset(color):_offset(color) + 24]
+            opp = w1[_offset(-color):_offset(-color) + 24]
+            self.place_delta[c] = own - w1[RESERVE + c] + side[color]
+            self.move_delta[c] = own[None, :, :] - own[:, None, :] + side[color]
+            self.capture_delta[c] = -opp
+        self.phase_delta = -w1[PHASE]
+
+    @staticmethod
+    def load(path=None):
+        path = path or NNUE_FILE
+        if not os.path.exists(path):
+            raise ValueError(f"No network at {path}; train one with python -m game.nnue train")
+        data = np.load(path)
+        return NNUEEvaluator(data['w1'], data['b1'], data['w2'], data['b2'])
+
+    def save(self, path):
+        np.savez(path, w1=self.w1.astype(np.int16), b1=self.b1, w2=self.w2.astype(np.int16),
+                 b2=np.int32(self.b2), qa=QA, qb=QB)
+
+    def refresh(self, state):
+        """
+        Accumulator computed from scratch.
+        """
+        w1 = self.w1
+        values = self.b1.copy()
+        for i, p in enumerate(state.board):
+            if p != EMPTY:
+                values += w1[_offset(p) + i]
+        values += state.white_unplaced * w1[RESERVE] + state.black_unplaced * w1[RESERVE + 1]
+        if state.phase == 'placing':
+            values += w1[PHASE]
+        if state.current == WHITE:
+            values += w1[SIDE]
+        return Accumulator(self, values)
+
+    def prepare(self, state):
+        """
+        Attaches a fresh accumulator, kept up to date by make/unmake_move.
+        """
+        state.accumulator = self.refresh(state)
+
+    def evaluate(self, state, color):
+        acc = state.accumulator
+        if acc is None or acc.net is not self:
+            acc = state.accumulator = self.refresh(state)
+        h = acc.values.clip(0, QA)
+        score = (int(h.dot(self.w2)) + self.b2) * 100 // (QA * QB)
+        return score if color == WHITE else -score
+
+
+# ======================================================================
+# TRAINING
+# ======================================================================
+def input_matrix(data):
+    """
+    (N, INPUTS) float32 inputs from game.tuning columns.
+    """
+    boards = boards_from_masks(data['white'], data['black'])
+    x = np.zeros((len(boards), INPUTS), dtype=np.float32)
+    x[:, :24] = boards == WHITE
+    x[:, 24:48] = boards == BLACK
+    x[:, RESERVE] = data['white_unplaced']
+    x[:, RESERVE + 1] = data['black_unplaced']
+    x[:, PHASE] = data['placing']
+    x[:, SIDE] = data['current'] == WHITE
+    return x
+
+
+def training_target(data, result_weight=0.5):
+    """
+    result_weight * result + (1 - result_weight) * sigmoid(K * eval / SCALE),
+    white's view, K fitted for the hand-written evaluation.
+    """
+    from game.tuning import FEATURES, features, fit_k
+
+    weights = load_weights()
+    result = (data['result'].astype(np.float64) + 1.0) / 2.0
+    k = fit_k(features(data), result, np.array([weights[f] for f in FEATURES], dtype=np.float64))
+    boards = boards_from_masks(data['white'], data['black'])
+    hand = evaluate_batch(boards, data['placing'], WHITE, weights)
+    target = result_weight * result + (1 - result_weight) / (1.0 + np.exp(-k * hand / SCALE))
+    return target.astype(np.float32), k
+
+
+def _forward(params, x):
+    w1, b1, w2, b2 = params
+    a = x @ w1 + b1
+    h = np.clip(a, 0.0, 1.0)
+    return a, h, h @ w2 + b2
+
+
+def _error(params, x, target, k):
+    # network output is in pawns
+    p = 1.0 / (1.0 + np.exp(-k * 100.0 * _forward(params, x)[2] / SCALE))
+    return float(np.mean((target - p) ** 2))
+
+
+def train(x, target, k, hidden=HIDDEN, epochs=20, batch=1024, rate=1e-3, seed=0, log=None):
+    """
+    Minibatch Adam on the squared error of sigmoid(K * score / SCALE).
+    Returns float parameters (w1, b1, w2, b2).
+    """
+    rng = np.random.default_rng(seed)
+    params = [
+        rng.normal(0.0, 0.1, (INPUTS, hidden)).astype(np.float32),
+        np.full(hidden, 0.5, dtype=np.float32),
+        rng.normal(0.0, 0.1, hidden).astype(np.float32),
+        np.zeros((), dtype=np.float32),
+    ]
+    m = [np.zeros_like(p) for p in params]
+    v = [np.zeros_like(p) for p in params]
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    scale = k * 100.0 / SCALE
+    t = 0
+    for epoch in range(1, epochs + 1):
+        order = rng.permutation(len(x))
+        for start in range(0, len(x), batch):
+            idx = order[start:start + batch]
+            xb, tb = x[idx], target[idx]
+            a, h, y = _forward(params, xb)
+            p = 1.0 / (1.0 + np.exp(-scale * y))
+            dy = 2.0 * (p - tb) * p * (1.0 - p) * scale / len(idx)
+            da = np.outer(dy, params[2]) * ((a > 0.0) & (a < 1.0))
+            grads = [xb.T @ da, da.sum(axis=0), h.T @ dy, dy.sum()]
+            t += 1
+            for i, g in enumerate(grads):
+                m[i] = beta1 * m[i] + (1 - beta1) * g
+                v[i] = beta2 * v[i] + (1 - beta2) * g * g
+                params[i] = (params[i] - rate * (m[i] / (1 - beta1 ** t))
+                             / (np.sqrt(v[i] / (1 - beta2 ** t)) + eps)).astype(np.float32)
+        if log:
+            log(f"epoch {epoch}: error {_error(params, x, target, k):.6f}")
+    return params
+
+
+def quantize(params):
+    """
+    Float parameters -> NNUEEvaluator with int16 / int32 weights.
+    """
+    w1, b1, w2, b2 = params
+    limit = np.iinfo(np.int16).max
+    return NNUEEvaluator(
+        np.clip(np.round(w1 * QA), -limit, limit).astype(np.int16),
+        np.round(b1 * QA).astype(np.int32),
+        np.clip(np.round(w2 * QB), -limit, limit).astype(np.int16),
+        int(round(float(b2) * QA * QB)),
+    )
+
+
+def quantized_scores(net, x):
+    """
+    NNUEEvaluator scores (white's view, centipawns) for an input matrix.
+    """
+    acc = x.astype(np.int64) @ net.w1 + net.b1
+    h = np.clip(acc, 0, QA)
+    return (h @ net.w2 + net.b2) * 100 // (QA * QB)
+
+
+# ======================================================================
+# BENCHMARK
+# ======================================================================
+def random_positions(count, seed=0, max_plies=40):
+    """
+    Positions reached by random play from the start.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = GameState()
+        for _ in range(rng.randrange(4, max_plies)):
+            if state.is_game_over()[0]:
+                break
+            move, cap, _ = rng.choice(list(state.iter_children()))
+            state.make_move(move, cap)
+        if not state.is_game_over()[0]:
+            positions.append(state)
+    return positions
+
+
+def search_speed(positions, nodes, evaluator=None):
+    """
+    (total nodes, seconds) of node-limited searches over `positions`.
+    """
+    total = 0
+    seconds = 0.0
+    for state in positions:
+        ai = AIPlayer(color=state.current, max_time=0, max_nodes=nodes, seed=1,
+                      evaluator=evaluator)
+        t0 = time.perf_counter()
+        ai.choose_move(state)
+        seconds += time.perf_counter() - t0
+        total += ai.nodes
+    return total, seconds
+
+
+# ======================================================================
+# COMMAND LINE
+# ======================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.nnue',
+                                     description='Train and benchmark the learned evaluator.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    train_cmd = sub.add_parser('train', help='fit a network to self-play positions')
+    train_cmd.add_argument('inputs', nargs='+', help='.npz files from game.tuning generate')
+    train_cmd.add_argument('-o', '--output', default=NNUE_FILE,
+                           help='weights to write (default: the file evaluator=nnue loads)')
+    train_cmd.add_argument('--hidden', type=int, default=HIDDEN)
+    train_cmd.add_argument('--epochs', type=int, default=20)
+    train_cmd.add_argument('--batch', type=int, default=1024)
+    train_cmd.add_argument('--rate', type=float, default=1e-3)
+    train_cmd.add_argument('--result-weight', type=float, default=0.5,
+                           help='share of the game result in the target (rest: hand evaluation)')
+    train_cmd.add_argument('--seed', type=int, default=0)
+
+    bench = sub.add_parser('bench', help='compare speed and strength with the hand-written evaluation')
+    bench.add_argument('--net', default=NNUE_FILE, help='network weights (.npz)')
+    bench.add_argument('--positions', type=int, default=20)
+    bench.add_argument('--nodes', type=int, default=5000, help='node limit per speed search')
+    bench.add_argument('--games', type=int, default=10, help='arena games (0: skip)')
+    bench.add_argument('--match-nodes', type=int, default=3000, help='node limit per arena move')
+    bench.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args(argv)
+
+    def log(msg):
+        print(msg, file=sys.stderr, flush=True)
+
+    if args.command == 'train':
+        from game.tuning import load_positions
+        t0 = time.time()
+        try:
+            data = load_positions(args.inputs, ('white', 'black', 'placing', 'current',
+                                                'white_unplaced', 'black_unplaced', 'result'))
+        except ValueError as e:
+            parser.error(str(e))
+        x = input_matrix(data)
+        target, k = training_target(data, args.result_weight)
+        params = train(x, target, k, args.hidden, args.epochs, args.batch, args.rate,
+                       args.seed, log=log)
+        net = quantize(params)
+        net.save(args.output)
+        p = 1.0 / (1.0 + np.exp(-k * quantized_scores(net, x) / SCALE))
+        print(f"{len(x)} positions, K={k:.3f}, error {_error(params, x, target, k):.6f}"
+              f" (quantized {float(np.mean((target - p) ** 2)):.6f}) in {time.time() - t0:.1f}s")
+        print(f"network -> {args.output}")
+        return 0
+
+    try:
+        net = NNUEEvaluator.load(args.net)
+    except ValueError as e:
+        parser.error(str(e))
+    positions = random_positions(args.positions, args.seed)
+    for name, evaluator in (('classic', None), ('nnue', net)):
+        nodes, seconds = search_speed(positions, args.nodes, evaluator)
+        print(f"{name:8s} {nodes} nodes in {seconds:.2f}s: {int(nodes / seconds)} nodes/s")
+
+    if args.games > 0:
+        from game.arena import play_match
+        result = play_match({'nodes': str(args.match_nodes)},
+                            {'nodes': str(args.match_nodes), 'nnue': args.net},
+                            args.games, seed=args.seed, log=log)
+        elo = 'n/a' if result['elo'] is None else f"{-result['elo']:+d}"
+        print(f"nnue vs classic: +{result['losses']} ={result['draws']} -{result['wins']}"
+              f" (Elo {elo}); nodes/s classic {result['nps_a']} nnue {result['nps_b']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
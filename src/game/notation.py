@@ -0,0 +1,148 @@
+# src/game/notation.py
+"""
+Command line helpers for the one-line position notation
+(GameState.to_notation / GameState.from_notation).
+
+    python -m game.notation "W7/8/7B b p 8/8 0/0"
+    python -m game.notation start --moves
+"""
+import argparse
+import sys
+
+from game.game import GameState
+from utils.utils import ADJACENT, COORDS, WHITE, BLACK
+
+START = 'start'
+
+
+def parse_position(text):
+    """
+    Notation string (or "start") -> GameState. Usable as an argparse `type`.
+    """
+    if text.strip().lower() == START:
+        return GameState()
+    try:
+        return GameState.from_notation(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def add_position_args(parser, required=False):
+    """
+    Adds the shared `--position/-p` (repeatable) and `--positions-file`
+    options used by the analysis tools.
+    """
+    parser.add_argument('-p', '--position', dest='positions', action='append',
+                        type=parse_position, required=required, default=None,
+                        help='position in notation (or "start"); repeatable')
+    parser.add_argument('--positions-file',
+                        help='file with one position per line (# starts a comment)')
+
+
+def iter_positions_file(path):
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                yield parse_position(line)
+
+
+def positions_from_args(args):
+    """
+    Positions given by add_position_args options, in command line order.
+    """
+    for state in args.positions or ():
+        yield state
+    if args.positions_file:
+        yield from iter_positions_file(args.positions_file)
+
+
+# ======================================================================
+# MOVES: "5" place on 5, "3-4" move 3 to 4, optional "x7" capture on 7
+# ======================================================================
+def move_to_text(move, cap=None):
+    text = str(move[1]) if move[0] == 'place' else f"{move[1]}-{move[2]}"
+    return text if cap is None else f"{text}x{cap}"
+
+
+def move_from_text(text):
+    """
+    Returns (move, cap); raises ValueError for malformed text.
+    """
+    body, _, cap = text.strip().partition('x')
+    try:
+        cap = int(cap) if cap else None
+        if '-' in body:
+            frm, to = body.split('-')
+            move = ('move', int(frm), int(to))
+        else:
+            move = ('place', int(body))
+    except ValueError:
+        raise ValueError(f"Bad move: {text!r}") from None
+    if any(not 0 <= p < 24 for p in move[1:]) or (cap is not None and not 0 <= cap < 24):
+        raise ValueError(f"Bad move: {text!r}")
+    return move, cap
+
+
+# ======================================================================
+# TEXT DIAGRAM
+# ======================================================================
+def diagram(state):
+    """
+    ASCII board built from COORDS / ADJACENT: W, B or + for an empty point.
+    """
+    def cell(i):
+        x, y = COORDS[i]
+        return (y - 50) // 50 * 2, (x - 50) // 50 * 4
+
+    rows = [[' '] * 25 for _ in range(13)]
+    for frm, neighbors in ADJACENT.items():
+        r1, c1 = cell(frm)
+        for to in neighbors:
+            r2, c2 = cell(to)
+            if r1 == r2:
+                for c in range(min(c1, c2), max(c1, c2)):
+                    rows[r1][c] = '-'
+            else:
+                for r in range(min(r1, r2), max(r1, r2)):
+                    rows[r][c1] = '|'
+    for i in range(24):
+        r, c = cell(i)
+        p = state.board[i]
+        rows[r][c] = 'W' if p == WHITE else 'B' if p == BLACK else '+'
+    return '\n'.join(''.join(row).rstrip() for row in rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.notation',
+                                     description='Show positions given in notation.')
+    parser.add_argument('positions', nargs='*', type=parse_position, help='position(s) or "start"')
+    parser.add_argument('--positions-file', help='file with one position per line')
+    parser.add_argument('--moves', action='store_true', help='list legal moves')
+    parser.add_argument('--json', action='store_true', help='print GameState.to_json() instead')
+    args = parser.parse_args(argv)
+
+    for state in positions_from_args(args):
+        if args.json:
+            print(state.to_json())
+            continue
+        print(diagram(state))
+        print(state.to_notation())
+        over, winner = state.is_game_over()
+        side = 'White' if state.current == WHITE else 'Black'
+        if over and winner is None:
+            print("Game over: draw")
+        elif over:
+            print(f"Game over: {'White' if winner == WHITE else 'Black'} wins")
+        else:
+            print(f"{side} to move | phase: {state.phase}"
+                  f" | legal moves: {len(state.legal_moves())}")
+        if args.moves:
+            for move in state.legal_moves():
+                print(' ', move)
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
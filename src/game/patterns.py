@@ -0,0 +1,144 @@
+# src/game/patterns.py
+"""
+Table-driven evaluation over mill patterns.
+
+Each of the 16 MILLS lines is read as a base-3 code (GameState.mill_codes,
+updated incrementally by make/unmake_move), and the position scores
+
+    sum(table[code] for code in state.mill_codes)
+
+with one 27-entry table for the placing phase and one for the moving
+phase. Every term of AIPlayer.evaluate splits over mills:
+    - pieces: each point lies on exactly two mills (half a piece per mill);
+    - sliding mobility: every board edge belongs to exactly one mill, so
+      (own piece, empty neighbour) pairs are counted per mill;
+    - open two-in-a-rows are per mill by definition.
+Only the flying rule (a side with three pieces moves anywhere) needs the
+piece counts; it is added as a correction. With tables built from the
+weights, PatternEvaluator(...).evaluate(state, color) equals
+AIPlayer(color).evaluate(state).
+
+Tables can also be given explicitly, or read from the "patterns" entry of
+the weights config: {"patterns": {"placing": [27 numbers], "moving": [27]}}.
+"""
+import json
+import os
+
+from game.ai import DEFAULT_WEIGHTS, WEIGHTS_FILE, load_weights
+from utils.utils import ADJACENT, MILLS, EMPTY_MILL_CODE, WHITE, BLACK, EMPTY
+
+PATTERN_COUNT = 27
+
+
+def pattern_points(code):
+    """
+    Mill code -> (a, b, c) contents (WHITE / BLACK / EMPTY).
+    """
+    value = code - EMPTY_MILL_CODE
+    points = []
+    for _ in range(3):
+        digit = (value + 1) % 3 - 1
+        points.append(digit)
+        value = (value - digit) // 3
+    return tuple(points)
+
+
+def _check_edges():
+    # the mobility split relies on every edge lying on exactly one mill
+    mill_edges = [frozenset(e) for a, b, c in MILLS for e in ((a, b), (b, c))]
+    board_edges = {frozenset((p, q)) for p, qs in ADJACENT.items() for q in qs}
+    if len(mill_edges) != len(set(mill_edges)) or set(mill_edges) != board_edges:
+        raise ValueError("board edges do not split over MILLS")
+
+
+_check_edges()
+
+# per code: (white pieces, black pieces, white slides, black slides,
+#            white open two, black open two)
+PATTERN_FEATURES = []
+for _code in range(PATTERN_COUNT):
+    _line = pattern_points(_code)
+    _slides = {WHITE: 0, BLACK: 0}
+    for _x, _y in ((_line[0], _line[1]), (_line[1], _line[2])):
+        if _x != EMPTY and _y == EMPTY:
+            _slides[_x] += 1
+        elif _y != EMPTY and _x == EMPTY:
+            _slides[_y] += 1
+    PATTERN_FEATURES.append((
+        _line.count(WHITE), _line.count(BLACK), _slides[WHITE], _slides[BLACK],
+        _line.count(WHITE) == 2 and _line.count(EMPTY) == 1,
+        _line.count(BLACK) == 2 and _line.count(EMPTY) == 1,
+    ))
+
+# sliding moves per code, for the flying correction
+SLIDES_WHITE = [f[2] for f in PATTERN_FEATURES]
+SLIDES_BLACK = [f[3] for f in PATTERN_FEATURES]
+
+
+def tables_from_weights(weights):
+    """
+    (placing, moving) tables reproducing AIPlayer.evaluate (white's view).
+    """
+    piece = weights['piece'] / 2
+    if piece == int(piece):
+        piece = int(piece)
+    mobility = weights['mobility']
+    mill = weights['mill']
+    placing, moving = [], []
+    for w, b, slide_w, slide_b, open_w, open_b in PATTERN_FEATURES:
+        base = piece * (w - b) + mill * (open_w - open_b)
+        placing.append(base)
+        moving.append(base + mobility * (slide_w - slide_b))
+    return placing, moving
+
+
+class PatternEvaluator:
+    """
+    evaluate(state, color) from two 27-entry tables and state.mill_codes.
+    """
+
+    def __init__(self, weights=None, tables=None):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        if tables is None:
+            tables = tables_from_weights(self.weights)
+        placing, moving = tables
+        if len(placing) != PATTERN_COUNT or len(moving) != PATTERN_COUNT:
+            raise ValueError(f"pattern tables need {PATTERN_COUNT} entries each")
+        self.placing = list(placing)
+        self.moving = list(moving)
+        self.mobility_weight = self.weights['mobility']
+
+    @staticmethod
+    def from_config(path=None):
+        """
+        Weights and, when present, explicit "patterns" tables from the
+        weights config (default: game.ai.WEIGHTS_FILE, if it exists).
+        """
+        weights = load_weights(path)
+        tables = None
+        if path is None and os.path.exists(WEIGHTS_FILE):
+            path = WEIGHTS_FILE
+        if path is not None:
+            with open(path) as f:
+                patterns = json.load(f).get('patterns')
+            if patterns:
+                tables = patterns['placing'], patterns['moving']
+        return PatternEvaluator(weights, tables)
+
+    def evaluate(self, state, color):
+        codes = state.mill_codes
+        if state.phase == 'placing':
+            table = self.placing
+            score = sum([table[c] for c in codes])
+        else:
+            table = self.moving
+            score = sum([table[c] for c in codes])
+            # flying: a side with three pieces may move to any empty point
+            white, black = state.white_on_board, state.black_on_board
+            if white == 3 or black == 3:
+                empty = 24 - white - black
+                if white == 3:
+                    score += self.mobility_weight * (3 * empty - sum([SLIDES_WHITE[c] for c in codes]))
+                if black == 3:
+                    score -= self.mobility_weight * (3 * empty - sum([SLIDES_BLACK[c] for c in codes]))
+        return score if color == WHITE else -score
@@ -0,0 +1,299 @@
+# src/game/record.py
+import gzip
+import io
+import struct
+import sys
+from array import array
+
+from game.game import GameState
+from game.history import MoveHistory, decode_ply
+from utils.utils import WHITE, BLACK, EMPTY
+
+# ---------------------------------------------------------
+# FILE LAYOUT
+#   file header : MAGIC + version byte
+#   per game    : GAME_HEADER, then ply_count packed plies (uint16 LE,
+#                 see game.history.encode_ply)
+# The whole stream may be wrapped in gzip or zstd; readers detect it.
+# ---------------------------------------------------------
+MAGIC = b'NMMR'
+VERSION = 2
+
+# white mask, black mask, current, phase, 7 counters, ai_endgame_moves,
+# quiet_plies, repetition_limit, quiet_move_limit, result, ply count
+GAME_HEADER = struct.Struct('<IIbB7BHIBHBI')
+START_FIELDS = 15
+
+# version 1: no draw rules; start / end ai_endgame_moves
+GAME_HEADER_V1 = struct.Struct('<IIbB7BHHBI')
+
+# GameRecord.result: WHITE, BLACK, DRAW, or None while unfinished
+DRAW = 'draw'
+
+PHASES = ('placing', 'moving')
+RESULTS = {None: 0, WHITE: 1, BLACK: 2, DRAW: 3}
+RESULTS_BACK = {v: k for k, v in RESULTS.items()}
+
+BIG_ENDIAN = sys.byteorder == 'big'
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+class GameRecord:
+    """
+    A full game: the start position plus the packed ply list.
+    """
+
+    def __init__(self, start=None, plies=None, result=None):
+        self.start = start if start is not None else GameState()
+        self.plies = plies if plies is not None else array('H')
+        self.result = result
+
+    def __len__(self):
+        return len(self.plies)
+
+    @staticmethod
+    def from_history(history, state=None):
+        """
+        Builds a record from a MoveHistory; `state` is the live position
+        (used for the result).
+        """
+        record = GameRecord(history.start.clone(), array('H', history.plies[:history.cursor]))
+        if state is not None:
+            over, winner = state.is_game_over()
+            if over:
+                record.result = DRAW if winner is None else winner
+        return record
+
+    def moves(self):
+        for code in self.plies:
+            move, cap, _ = decode_ply(code)
+            yield move, cap
+
+    def to_history(self, max_plies=1000000):
+        """
+        Returns (history, state): a MoveHistory holding every ply and the
+        position reached at the end of the game.
+        """
+        history = MoveHistory(self.start, max_plies=max_plies)
+        state = self.start.clone()
+        for move, cap in self.moves():
+            history.play(state, move, cap)
+        return history, state
+
+    def final_state(self):
+        return self.to_history()[1]
+
+
+# ======================================================================
+# ENCODING
+# ======================================================================
+def _pack_game(record):
+    s = record.start
+    white = black = 0
+    for i, p in enumerate(s.board):
+        if p == WHITE:
+            white |= 1 << i
+        elif p == BLACK:
+            black |= 1 << i
+    plies = record.plies
+    if BIG_ENDIAN:
+        plies = array('H', plies)
+        plies.byteswap()
+    header = GAME_HEADER.pack(
+        white, black, s.current, PHASES.index(s.phase),
+        s.white_unplaced, s.black_unplaced, s.placed_white, s.placed_black,
+        s.captured_white, s.captured_black, s.total_per_side, s.ai_endgame_moves,
+        s.quiet_plies, s.repetition_limit, s.quiet_move_limit,
+        RESULTS[record.result], len(plies)
+    )
+    return header + plies.tobytes()
+
+
+def _unpack_start(fields):
+    (white, black, current, phase,
+     white_unplaced, black_unplaced, placed_white, placed_black,
+     captured_white, captured_black, total_per_side, endgame_moves,
+     quiet_plies, repetition_limit, quiet_move_limit) = fields
+
+    s = GameState()
+    s.board = [
+        WHITE if white >> i & 1 else BLACK if black >> i & 1 else EMPTY
+        for i in range(24)
+    ]
+    s.current = current
+    s.phase = PHASES[phase]
+    s.white_unplaced = white_unplaced
+    s.black_unplaced = black_unplaced
+    s.placed_white = placed_white
+    s.placed_black = placed_black
+    s.captured_white = captured_white
+    s.captured_black = captured_black
+    s.total_per_side = total_per_side
+    s.ai_endgame_moves = endgame_moves
+    # the trail before the start is not recorded: repetitions count from here
+    s.quiet_plies = quiet_plies
+    s.repetition_limit = repetition_limit
+    s.quiet_move_limit = quiet_move_limit
+    s.invalidate()
+    return s
+
+
+# ======================================================================
+# COMPRESSION
+# ======================================================================
+def _zstd_module():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        pass
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        raise ValueError("zstd compression needs the 'zstandard' package") from None
+
+
+def _open_write(path, compression):
+    if compression is None:
+        return open(path, 'wb')
+    if compression == 'gzip':
+        return gzip.open(path, 'wb', compresslevel=6)
+    if compression == 'zstd':
+        zstd = _zstd_module()
+        if hasattr(zstd, 'ZstdCompressor') and hasattr(zstd.ZstdCompressor, 'stream_writer'):
+            return zstd.ZstdCompressor().stream_writer(open(path, 'wb'), closefd=True)
+        return zstd.open(path, 'wb')
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def _open_read(path):
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    if head.startswith(GZIP_MAGIC):
+        return gzip.open(path, 'rb')
+    if head == ZSTD_MAGIC:
+        zstd = _zstd_module()
+        if hasattr(zstd, 'ZstdDecompressor') and hasattr(zstd.ZstdDecompressor, 'stream_reader'):
+            raw = zstd.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+            return io.BufferedReader(raw)
+        return zstd.open(path, 'rb')
+    return open(path, 'rb')
+
+
+# ======================================================================
+# STREAMING WRITER / READER
+# ======================================================================
+class RecordWriter:
+    """
+    Appends games to a record file one at a time.
+
+        with RecordWriter(path, compression='gzip') as w:
+            w.write(record)
+    """
+
+    def __init__(self, path, compression=None):
+        self.f = _open_write(path, compression)
+        self.f.write(MAGIC + bytes([VERSION]))
+        self.count = 0
+
+    def write(self, record):
+        self.f.write(_pack_game(record))
+        self.count += 1
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordReader:
+    """
+    Iterates the games of a record file (plain, gzip or zstd) without
+    loading the whole file. Version 1 files are read with the draw rules off.
+
+        with RecordReader(path) as r:
+            for record in r:
+                ...
+    """
+
+    def __init__(self, path):
+        self.f = _open_read(path)
+        head = self.f.read(len(MAGIC) + 1)
+        if head[:len(MAGIC)] != MAGIC:
+            self.f.close()
+            raise ValueError("Not a game record file")
+        self.version = head[len(MAGIC)]
+        if self.version not in (1, VERSION):
+            self.f.close()
+            raise ValueError(f"Unsupported game record version: {self.version}")
+
+    def __iter__(self):
+        read = self.f.read
+        header_struct = GAME_HEADER if self.version == VERSION else GAME_HEADER_V1
+        size = header_struct.size
+        unpack = header_struct.unpack
+        while True:
+            header = read(size)
+            if not header:
+                return
+            if len(header) < size:
+                raise ValueError("Truncated game record")
+            fields = unpack(header)
+            if self.version == 1:
+                # start fields, no draw rules, (end counter dropped) result, count
+                fields = fields[:12] + (0, 0, 0) + fields[13:]
+            ply_count = fields[-1]
+            plies = array('H')
+            plies.frombytes(read(2 * ply_count))
+            if len(plies) != ply_count:
+                raise ValueError("Truncated game record")
+            if BIG_ENDIAN:
+                plies.byteswap()
+            yield GameRecord(
+                _unpack_start(fields[:START_FIELDS]), plies,
+                result=RESULTS_BACK[fields[START_FIELDS]]
+            )
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_records(path, records, compression=None):
+    with RecordWriter(path, compression) as w:
+        for record in records:
+            w.write(record)
+        return w.count
+
+
+def read_records(path):
+    """
+    Generator over every game in the file.
+    """
+    with RecordReader(path) as r:
+        yield from r
+
+
+def is_record_file(path):
+    """
+    True when `path` looks like a game record file rather than a JSON snapshot.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    return head in (MAGIC, ZSTD_MAGIC) or head.startswith(GZIP_MAGIC)
@@ -0,0 +1,495 @@
+# src/game/server.py
+"""
+Local analysis server: many concurrent games served by a pool of warm
+AIPlayer worker processes.
+
+    python -m game.server --port 8765 --workers 4
+
+Protocol: JSON lines over TCP (localhost). Each request line
+
+    {"id": 1, "position": "<notation or 'start'>",
+     "movetime": 500, "nodes": 0, "depth": 0, "timeout": 5.0}
+
+gets one reply line carrying the same id, in completion order:
+
+    {"id": 1, "bestmove": "3-4x7", "move": [...], "cap": 7, "score": 130,
+     "depth": 6, "nodes": 18000, "mate": null, "pv": ["3-4x7", ...]}
+    {"id": 1, "error": "busy" | "timeout" | "<message>"}
+
+Scheduling
+    - requests are queued per connection and dispatched round-robin, so a
+      client flooding the server cannot starve the others;
+    - at most MAX_QUEUE jobs wait in total (more are refused with "busy"),
+      and a connection with MAX_INFLIGHT unanswered requests is not read
+      from until one completes (TCP backpressure);
+    - identical concurrent requests (same position and limits) share one
+      search;
+    - `timeout` bounds queueing plus search; the worker's time limit is cut
+      to what is left minus REPLY_MARGIN, so the best move found so far
+      gets back in time, and a worker that overruns is restarted.
+"""
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import socket
+import sys
+import time
+
+from game.ai import AIPlayer
+from game.game import GameState
+from game.notation import move_to_text, parse_position
+
+DEFAULT_PORT = 8765
+
+DEFAULT_MOVETIME = 1000    # ms, when a request sets no limit
+DEFAULT_TIMEOUT = 30.0     # s, queueing + search
+MAX_QUEUE = 256            # jobs waiting for a worker, all clients
+MAX_INFLIGHT = 32          # unanswered requests per connection
+OVERRUN_GRACE = 2.0        # s past the deadline before a worker is killed
+REPLY_MARGIN = 0.15        # s kept back from the deadline to send the result
+
+
+class Busy(Exception):
+    pass
+
+
+# ======================================================================
+# WORKER PROCESS
+# ======================================================================
+def _worker_main(conn):
+    """
+    Loop of a pool process: ('go', notation, limits) -> result dict.
+    One AIPlayer per side to move keeps its transposition table warm.
+    """
+    players = {}
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        if msg is None:
+            break
+        _, notation, limits = msg
+        try:
+            result = _analyze(players, GameState.from_notation(notation), limits)
+        except Exception as e:
+            result = {'error': str(e)}
+        conn.send(result)
+    conn.close()
+
+
+def _analyze(players, state, limits):
+    ai = players.get(state.current)
+    if ai is None:
+        ai = players[state.current] = AIPlayer(color=state.current, keep_tt=True)
+    ai.max_time = limits['max_time']
+    ai.max_nodes = limits['max_nodes']
+    ai.max_depth = limits['max_depth']
+
+    over, winner = state.is_game_over()
+    if over:
+        return {'bestmove': None, 'over': True, 'winner': winner}
+
+    result = ai.analyze(state)
+    if result['choice'] is None:
+        return {'bestmove': None}
+    move, cap = result['choice']
+    return {
+        'bestmove': move_to_text(move, cap),
+        'move': list(move),
+        'cap': cap,
+        'score': result['score'],
+        'depth': result['depth'],
+        'nodes': result['nodes'],
+        'mate': result['mate'],
+        'pv': [move_to_text(m, c) for m, c in result['pv']],
+    }
+
+
+class Worker:
+    """
+    One pool process. call() blocks, so it runs in an executor thread.
+    """
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.process = None
+        self.conn = None
+        self.start()
+
+    def start(self):
+        parent_conn, child_conn = self.ctx.Pipe()
+        self.process = self.ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def restart(self):
+        self.close(wait=False)
+        self.start()
+
+    def call(self, notation, limits, wait):
+        """
+        Result dict, or TimeoutError after `wait` seconds (the process is
+        then restarted, since it cannot be interrupted mid-search).
+        """
+        try:
+            self.conn.send(('go', notation, limits))
+            if self.conn.poll(wait):
+                return self.conn.recv()
+        except (EOFError, OSError):
+            self.restart()
+            raise RuntimeError("worker died") from None
+        self.restart()
+        raise TimeoutError()
+
+    def close(self, wait=True):
+        if self.process is None:
+            return
+        try:
+            if wait:
+                self.conn.send(None)
+                self.process.join(timeout=1.0)
+        except OSError:
+            pass
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        self.process = None
+        self.conn = None
+
+
+# ======================================================================
+# SCHEDULER
+# ======================================================================
+class Job:
+    """
+    One search, shared by every request waiting for the same key.
+    """
+
+    def __init__(self, key, notation, limits, deadline, future):
+        self.key = key
+        self.notation = notation
+        self.limits = limits
+        self.deadline = deadline
+        self.future = future
+        self.waiters = 0
+
+    def fail(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+            # waiters that already gave up never read it: don't log it
+            self.future.exception()
+
+
+class Scheduler:
+    """
+    Per-client FIFO queues served round-robin, with a global cap and
+    sharing of identical jobs (queued or running).
+    """
+
+    def __init__(self, max_queue=MAX_QUEUE):
+        self.max_queue = max_queue
+        self.queues = collections.OrderedDict()   # client -> deque of Job
+        self.jobs = {}                            # key -> Job (queued or running)
+        self.queued = 0
+        self.wakeup = asyncio.Event()
+        self.stats = collections.Counter()
+
+    def submit(self, client, notation, limits, deadline):
+        key = (notation, limits['max_time'], limits['max_nodes'], limits['max_depth'])
+        job = self.jobs.get(key)
+        if job is not None and not job.future.done():
+            job.deadline = max(job.deadline, deadline)
+            job.waiters += 1
+            self.stats['shared'] += 1
+            return job
+
+        if self.queued >= self.max_queue:
+            self.stats['busy'] += 1
+            raise Busy()
+
+        job = Job(key, notation, limits, deadline, asyncio.get_running_loop().create_future())
+        job.waiters = 1
+        self.jobs[key] = job
+        self.queues.setdefault(client, collections.deque()).append(job)
+        self.queued += 1
+        self.stats['submitted'] += 1
+        self.wakeup.set()
+        return job
+
+    def release(self, job):
+        """
+        A waiter gave up (timeout / disconnect).
+        """
+        job.waiters -= 1
+
+    def finish(self, job):
+        if self.jobs.get(job.key) is job:
+            del self.jobs[job.key]
+
+    async def next_job(self):
+        while True:
+            job = self._pop()
+            if job is not None:
+                return job
+            self.wakeup.clear()
+            await self.wakeup.wait()
+
+    def _pop(self):
+        while self.queues:
+            client, queue = next(iter(self.queues.items()))
+            job = queue.popleft()
+            self.queued -= 1
+            if queue:
+                self.queues.move_to_end(client)
+            else:
+                del self.queues[client]
+
+            if job.waiters <= 0 or job.deadline <= time.monotonic():
+                # nobody is waiting any more: skip the search
+                job.fail(TimeoutError())
+                self.finish(job)
+                self.stats['dropped'] += 1
+                continue
+            return job
+        return None
+
+
+# ======================================================================
+# SERVER
+# ======================================================================
+class AnalysisServer:
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, workers=2,
+                 max_queue=MAX_QUEUE, max_inflight=MAX_INFLIGHT):
+        self.host = host
+        self.port = port
+        self.worker_count = max(1, int(workers))
+        self.max_inflight = max_inflight
+        self.scheduler = None
+        self.max_queue = max_queue
+        self.workers = []
+        self.executor = None
+        self.server = None
+        self.tasks = []
+        self.next_client = 0
+
+    async def start(self):
+        import multiprocessing
+        ctx = multiprocessing.get_context('spawn')
+        loop = asyncio.get_running_loop()
+        self.scheduler = Scheduler(self.max_queue)
+        # one thread per worker waits on its pipe
+        self.executor = concurrent.futures.ThreadPoolExecutor(self.worker_count)
+        self.workers = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, Worker, ctx) for _ in range(self.worker_count)
+        ))
+        self.tasks = [asyncio.create_task(self._dispatch(w)) for w in self.workers]
+        self.server = await asyncio.start_server(self._serve_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self.tasks:
+            task.cancel()
+        for worker in self.workers:
+            worker.close(wait=False)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.workers = []
+        self.tasks = []
+
+    # ---------------------------------------------------------
+    # DISPATCH: one loop per worker process
+    # ---------------------------------------------------------
+    async def _dispatch(self, worker):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.scheduler.next_job()
+            limits = dict(zip(('max_time', 'max_nodes', 'max_depth'), job.key[1:]))
+            left = job.deadline - time.monotonic()
+            # stop early enough for the reply to beat the deadline
+            budget = left - REPLY_MARGIN if left > 2 * REPLY_MARGIN else left / 2
+            if not limits['max_time'] or limits['max_time'] > budget:
+                limits['max_time'] = max(0.01, budget)
+            try:
+                result = await loop.run_in_executor(
+                    self.executor, worker.call, job.notation, limits, left + OVERRUN_GRACE)
+            except Exception as e:
+                result = e
+            self.scheduler.finish(job)
+            if job.future.done():
+                continue
+            if isinstance(result, Exception):
+                job.fail(result)
+            else:
+                self.scheduler.stats['searched'] += 1
+                job.future.set_result(result)
+
+    # ---------------------------------------------------------
+    # CONNECTIONS
+    # ---------------------------------------------------------
+    async def _serve_client(self, reader, writer):
+        self.next_client += 1
+        client = self.next_client
+        inflight = asyncio.Semaphore(self.max_inflight)
+        pending = set()
+
+        try:
+            while True:
+                await inflight.acquire()
+                line = await reader.readline()
+                if not line:
+                    inflight.release()
+                    break
+                task = asyncio.create_task(self._handle(client, line, writer, inflight))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+
+    async def _handle(self, client, line, writer, inflight):
+        try:
+            reply = await self._answer(client, line)
+            writer.write((json.dumps(reply) + '\n').encode())
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            inflight.release()
+
+    async def _answer(self, client, line):
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+        except (ValueError, AttributeError):
+            return {'id': None, 'error': 'bad request'}
+
+        if request.get('op') == 'stats':
+            return {'id': request_id, 'stats': dict(self.scheduler.stats),
+                    'queued': self.scheduler.queued}
+
+        try:
+            notation = parse_position(str(request.get('position', 'start'))).to_notation()
+            limits = {
+                'max_time': float(request.get('movetime', 0)) / 1000.0,
+                'max_nodes': int(request.get('nodes', 0)),
+                'max_depth': int(request.get('depth', 0)),
+            }
+            timeout = float(request.get('timeout', DEFAULT_TIMEOUT))
+        except (ValueError, TypeError, argparse.ArgumentTypeError) as e:
+            return {'id': request_id, 'error': str(e)}
+        if not any(limits.values()):
+            limits['max_time'] = DEFAULT_MOVETIME / 1000.0
+
+        try:
+            job = self.scheduler.submit(client, notation, limits, time.monotonic() + timeout)
+        except Busy:
+            return {'id': request_id, 'error': 'busy'}
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(job.future), timeout)
+        except (asyncio.TimeoutError, TimeoutError):
+            self.scheduler.release(job)
+            return {'id': request_id, 'error': 'timeout'}
+        except asyncio.CancelledError:
+            self.scheduler.release(job)
+            raise
+        except Exception as e:
+            return {'id': request_id, 'error': str(e) or type(e).__name__}
+        return dict(result, id=request_id)
+
+
+# ======================================================================
+# CLIENT
+# ======================================================================
+class AnalysisClient:
+    """
+    Minimal blocking client.
+
+        with AnalysisClient(port=8765) as c:
+            reply = c.analyze('start', movetime=200)
+    """
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, timeout=None):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.file = self.sock.makefile('rwb')
+        self.next_id = 0
+
+    def send(self, position='start', **fields):
+        """
+        Queues one request and returns its id (replies come via receive()).
+        """
+        self.next_id += 1
+        request = dict(fields, id=self.next_id, position=position)
+        self.file.write((json.dumps(request) + '\n').encode())
+        self.file.flush()
+        return self.next_id
+
+    def receive(self):
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    def analyze(self, position='start', **fields):
+        request_id = self.send(position, **fields)
+        while True:
+            reply = self.receive()
+            if reply.get('id') == request_id:
+                return reply
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.server',
+                                     description='Serve AI analysis over JSON lines on localhost.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=2, help='worker processes')
+    parser.add_argument('--max-queue', type=int, default=MAX_QUEUE,
+                        help='queued jobs before requests are refused')
+    args = parser.parse_args(argv)
+
+    server = AnalysisServer(args.host, args.port, args.workers, args.max_queue)
+
+    async def run():
+        await server.start()
+        print(f"listening on {server.host}:{server.port} with {server.worker_count} workers",
+              file=sys.stderr)
+        try:
+            async with server.server:
+                await server.server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
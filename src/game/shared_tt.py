@@ -0,0 +1,394 @@
+# src/game/shared_tt.py
+"""
+Transposition table in shared memory, for several search processes on one
+host.
+
+    table = SharedTT(entries=1 << 20)            # creator (owns the segment)
+    AIPlayer(shared_tt=table, ...)               # in any process it reaches
+    python -m game.shared_tt stress --processes 4 --seconds 5
+    python -m game.shared_tt bench --processes 4
+
+A fixed array of 16-byte entries in a multiprocessing.shared_memory block:
+one 64-bit word of packed data and one holding key ^ data. Writers store
+both words without locks. A reader accepts an entry only if the two words
+XOR back to its own key, so an entry torn by a concurrent write, or one
+belonging to another position, reads as a miss instead of a wrong result.
+Entries sit in buckets of two: a depth-preferred slot and an always-replace
+slot.
+
+It is a drop-in for AIPlayer's dict (same keys and entries). Scores are
+stored from the side to move's view, so players of either color share
+entries; players with other weights or another evaluator are refused
+(bind()), since their scores would not mix. Scores are rounded to integers and distances to a forced win
+are capped at 254 plies. A SharedTT pickles as its segment name, so it can
+be handed to spawned workers (e.g. `game.analysis --shared-tt`).
+"""
+import argparse
+import hashlib
+import multiprocessing
+import random
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from game.ai import FLIPPED
+
+MAGIC = 0x4E4D4D5454303032   # "NMMTT002"
+HEADER_WORDS = 3             # magic, entry count, evaluation settings fingerprint
+MASK64 = (1 << 64) - 1
+SCORE_BIAS = 1 << 31
+
+# data word layout (bit offsets)
+FLAG_SHIFT = 32              # 2 bits: EXACT / LOWER / UPPER
+MATE_SHIFT = 34              # 8 bits: mate distance + 1, 0 = none
+WINNER_SHIFT = 42            # 1 bit: the mating side is the side to move
+CHOICE_SHIFT = 43            # 17 bits: present, kind, a, b, capture + 1
+DEPTH_SHIFT = 60             # 4 bits: depth (capped), for replacement
+
+
+def _hash(key):
+    """
+    64-bit hash of an AIPlayer table key (board, current, phase, depth,
+    maximizing), the same in every process. The side to move replaces
+    `maximizing`: entries are stored from its view.
+    """
+    h = hash((key[0], key[1], key[2] == 'moving', key[3])) & MASK64
+    return h or 1
+
+
+def _pack_choice(choice):
+    if choice is None:
+        return 0
+    move, cap = choice
+    if move[0] == 'place':
+        bits = 1 | move[1] << 2
+    else:
+        bits = 1 | 2 | move[1] << 2 | move[2] << 7
+    return bits | (0 if cap is None else cap + 1) << 12
+
+
+def _unpack_choice(bits):
+    if not bits & 1:
+        return None
+    a = bits >> 2 & 31
+    move = ('move', a, bits >> 7 & 31) if bits & 2 else ('place', a)
+    cap = (bits >> 12 & 31) - 1
+    return move, (None if cap < 0 else cap)
+
+
+def pack(entry, maximizing, depth):
+    """
+    Data word for an AIPlayer entry (value, mate, flag, choice) whose value
+    is from the maximizing player's view.
+    """
+    value, mate, flag, choice = entry
+    value = int(round(value))
+    if not maximizing:
+        value, flag = -value, FLIPPED[flag]
+    data = (value + SCORE_BIAS) & 0xFFFFFFFF | flag << FLAG_SHIFT
+    if mate is not None:
+        data |= (min(mate, 254) + 1) << MATE_SHIFT | int(maximizing) << WINNER_SHIFT
+    return data | _pack_choice(choice) << CHOICE_SHIFT | min(depth, 15) << DEPTH_SHIFT
+
+
+def unpack(data, maximizing):
+    """
+    The AIPlayer entry a data word holds, seen by the given role.
+    """
+    value = (data & 0xFFFFFFFF) - SCORE_BIAS
+    flag = data >> FLAG_SHIFT & 3
+    if not maximizing:
+        value, flag = -value, FLIPPED[flag]
+    mate = (data >> MATE_SHIFT & 255) - 1
+    # mate distances are for AIPlayer.color's wins only
+    if mate < 0 or bool(data >> WINNER_SHIFT & 1) != maximizing:
+        mate = None
+    return value, mate, flag, _unpack_choice(data >> CHOICE_SHIFT & 0x1FFFF)
+
+
+# ======================================================================
+# TABLE
+# ======================================================================
+class SharedTT:
+    """
+    Lockless shared transposition table with dict-style get / [] = / clear.
+    The creating process owns the segment and should close() it (which
+    unlinks it) once every user is done; attached processes just close().
+    """
+
+    def __init__(self, entries=1 << 20, name=None, create=True):
+        if create:
+            entries = 1 << max(1, int(entries - 1).bit_length())
+            size = (HEADER_WORDS + 2 * entries) * 8
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = _attach(name)
+        self.owner = create
+        self.words = self.shm.buf.cast('Q')
+        if create:
+            self.words[0] = MAGIC
+            self.words[1] = entries
+        elif self.words[0] != MAGIC:
+            self.close()
+            raise ValueError(f"{name}: not a shared transposition table")
+        self.entries = self.words[1]
+        self.bucket_mask = self.entries // 2 - 1
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @classmethod
+    def attach(cls, name):
+        return cls(name=name, create=False)
+
+    def __reduce__(self):
+        return SharedTT.attach, (self.name,)
+
+    def bind(self, namespace):
+        """
+        Claims the table for one evaluation setup (AIPlayer.cache_namespace):
+        the first player sets it, any other setup raises ValueError.
+        """
+        digest = hashlib.blake2b(namespace.encode(), digest_size=8).digest()
+        fingerprint = int.from_bytes(digest, 'little') or 1
+        if self.words[2] == 0:
+            self.words[2] = fingerprint
+        if self.words[2] != fingerprint:
+            raise ValueError(f"shared table {self.name} is used with other evaluation settings")
+
+    def close(self):
+        if self.words is None:
+            return
+        self.words.release()
+        self.words = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    # ---------------------------------------------------------
+    # DICT INTERFACE (AIPlayer.transposition)
+    # ---------------------------------------------------------
+    def _slot(self, h):
+        return HEADER_WORDS + (h >> 1 & self.bucket_mask) * 4
+
+    def get(self, key, default=None):
+        h = _hash(key)
+        words = self.words
+        slot = self._slot(h)
+        for s in (slot, slot + 2):
+            data = words[s + 1]
+            if words[s] ^ data == h:
+                return unpack(data, key[4])
+        return default
+
+    def __setitem__(self, key, entry):
+        h = _hash(key)
+        depth = key[3]
+        data = pack(entry, key[4], depth)
+        words = self.words
+        s = self._slot(h)
+        # the first slot keeps the deepest entry, the second takes the rest
+        held = words[s + 1]
+        if words[s] ^ held != h and (held >> DEPTH_SHIFT) > min(depth, 15):
+            s += 2
+        words[s + 1] = data
+        words[s] = h ^ data
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def clear(self):
+        """
+        Empties the table for every process using it (the settings it is
+        bound to are kept).
+        """
+        start = HEADER_WORDS * 8
+        self.shm.buf[start:] = bytes(len(self.shm.buf) - start)
+
+    def fill(self, sample=4096):
+        """
+        Estimated fraction of used slots.
+        """
+        words = self.words
+        step = max(1, self.entries // sample)
+        slots = range(HEADER_WORDS, HEADER_WORDS + 2 * self.entries, 2 * step)
+        return sum(1 for s in slots if words[s] or words[s + 1]) / len(slots)
+
+
+def _attach(name):
+    """
+    Opens an existing segment without handing it to a resource tracker:
+    only the creator may unlink it. (Before Python 3.13 every attach
+    registers the segment, and a tracker unlinks what is registered when
+    its process exits, so registration is skipped for the call.)
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)   # Python 3.13+
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+# ======================================================================
+# STRESS TEST
+# ======================================================================
+def _stress_key(rng, keys):
+    board = tuple(rng.choice((0, 0, 1, -1)) for _ in range(24))
+    return board, rng.choice((1, -1)), rng.choice(('placing', 'moving')), rng.randrange(1, keys), \
+        rng.random() < 0.5
+
+
+def _stress_entry(key):
+    """
+    The one entry ever written for `key`, so any other value read back
+    for it is corruption.
+    """
+    h = _hash(key)
+    value = h % 20001 - 10000
+    mate = h % 7 if h % 3 == 0 else None
+    choice = (('move', h % 24, h // 24 % 24), None) if h % 2 else (('place', h % 24), h // 7 % 24)
+    return value, mate, h % 3, choice
+
+
+def _stress_worker(table, seed, seconds, keys):
+    rng = random.Random(seed)
+    pool = [_stress_key(rng, keys) for _ in range(keys)]
+    expected = [_stress_entry(key) for key in pool]
+    reads = writes = hits = corrupt = 0
+    end = time.time() + seconds
+    while time.time() < end:
+        for _ in range(1000):
+            i = rng.randrange(keys)
+            if rng.random() < 0.5:
+                table[pool[i]] = expected[i]
+                writes += 1
+            else:
+                entry = table.get(pool[i])
+                reads += 1
+                if entry is not None:
+                    hits += 1
+                    if entry != expected[i]:
+                        corrupt += 1
+    # read back everything after the other writers may have interleaved
+    for key, entry in zip(pool, expected):
+        found = table.get(key)
+        if found is not None and found != entry:
+            corrupt += 1
+    table.close()
+    return reads, writes, hits, corrupt
+
+
+def stress(processes=4, seconds=5.0, entries=1 << 12, keys=20000):
+    """
+    Processes hammer a small table with overlapping keys (seeds repeat
+    across pairs of workers, so the same keys are written concurrently).
+    Returns totals (reads, writes, hits, corrupt); corrupt must be 0.
+    """
+    import concurrent.futures
+    table = SharedTT(entries)
+    ctx = multiprocessing.get_context('spawn')
+    try:
+        with concurrent.futures.ProcessPoolExecutor(processes, mp_context=ctx) as pool:
+            futures = [pool.submit(_stress_worker, table, i // 2, seconds, keys)
+                       for i in range(processes)]
+            totals = [f.result() for f in futures]
+    finally:
+        table.close()
+    return tuple(sum(t[k] for t in totals) for k in range(4))
+
+
+# ======================================================================
+# NODE SAVINGS BENCHMARK
+# ======================================================================
+def _bench_worker(table, index, depth_offset):
+    from game.ai import AIPlayer
+    from game.bench import BENCH_POSITIONS
+    from game.game import GameState
+
+    nodes = 0
+    # each worker starts at a different position
+    order = BENCH_POSITIONS[index % len(BENCH_POSITIONS):] + BENCH_POSITIONS[:index % len(BENCH_POSITIONS)]
+    for name, notation, depth in order:
+        state = GameState.from_notation(notation) if notation else GameState()
+        ai = AIPlayer(color=state.current, max_time=0, max_depth=max(1, depth + depth_offset),
+                      seed=index, shared_tt=table)
+        ai.choose_move(state)
+        nodes += ai.nodes
+    if table is not None:
+        table.close()
+    return nodes
+
+
+def bench(processes=4, depth_offset=-1, entries=1 << 20, log=None):
+    """
+    Every process searches the game.bench positions (rotated, so they are
+    at different positions at any time) once with private tables and once
+    sharing one SharedTT. Returns {'private': .., 'shared': ..}, each with
+    total nodes, per-process nodes and seconds. All processes search the
+    same positions, so the saving is an upper bound for unrelated work.
+    """
+    import concurrent.futures
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+    for mode in ('private', 'shared'):
+        table = SharedTT(entries) if mode == 'shared' else None
+        t0 = time.time()
+        try:
+            with concurrent.futures.ProcessPoolExecutor(processes, mp_context=ctx) as pool:
+                futures = [pool.submit(_bench_worker, table, i, depth_offset) for i in range(processes)]
+                per_process = [f.result() for f in futures]
+        finally:
+            if table is not None:
+                table.close()
+        results[mode] = {'nodes': sum(per_process), 'per_process': per_process,
+                         'seconds': round(time.time() - t0, 2)}
+        if log:
+            log(mode, results[mode])
+    return results
+
+
+# ======================================================================
+# COMMAND LINE
+# ======================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.shared_tt',
+                                     description='Shared-memory transposition table checks.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('stress', help='concurrent writers and readers on one small table')
+    p.add_argument('--processes', type=int, default=4)
+    p.add_argument('--seconds', type=float, default=5.0)
+    p.add_argument('--entries', type=int, default=1 << 12)
+    p.add_argument('--keys', type=int, default=20000, help='distinct keys per worker')
+
+    p = sub.add_parser('bench', help='nodes searched with private vs shared tables')
+    p.add_argument('--processes', type=int, default=4)
+    p.add_argument('--depth-offset', type=int, default=-1,
+                   help='added to every bench position\'s depth')
+    p.add_argument('--entries', type=int, default=1 << 20)
+    args = parser.parse_args(argv)
+
+    if args.command == 'stress':
+        reads, writes, hits, corrupt = stress(args.processes, args.seconds, args.entries, args.keys)
+        print(f"reads {reads}  writes {writes}  hits {hits} ({hits / max(1, reads):.1%})"
+              f"  corrupt {corrupt}")
+        return 1 if corrupt else 0
+
+    res = bench(args.processes, args.depth_offset, args.entries,
+                log=lambda mode, r: print(f"{mode:8s} nodes {r['nodes']:9d}  seconds {r['seconds']:7.2f}"
+                                          f"  per process {r['per_process']}", flush=True))
+    saved = 1 - res['shared']['nodes'] / res['private']['nodes'] if res['private']['nodes'] else 0.0
+    print(f"shared table saves {saved:.1%} of the nodes")
+    print("(every process searches the same bench positions, so their trees overlap"
+          " almost entirely: an upper bound, not a typical saving)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,411 @@
+# src/game/statespace.py
+"""
+Breadth-first enumeration of the reachable positions, layer by layer.
+
+    python -m game.statespace --layers 12
+    python -m game.statespace --pieces 4 --spill-dir /tmp/nmm --memory 20000000
+
+A position is packed into a uint64: white mask in bits 0-23, black mask
+in bits 24-47 (bit i = point i). Layer k holds the positions reached after
+k plies, so the side to move (white on even layers) and, during placing,
+the pieces placed are implied by the layer. Every layer is expanded in
+chunks with whole-array operations: placements, slides (and flying for a
+side with three pieces), mill tests and one child per capturable piece,
+then each child is reduced to its canonical form (smallest key over the
+16 board SYMMETRIES) and deduplicated with sort / unique.
+
+Placing positions differ from layer to layer (different pieces in hand).
+Moving positions can recur, so each is kept only the first time it is
+reached: a sorted "seen" array per (white count, black count, side to
+move) class filters the new layer with searchsorted. Positions where a
+side is down to two pieces after placing are counted but not expanded;
+draw rules are ignored.
+
+When a layer grows beyond `memory` keys, its classes are spilled to raw
+files in the spill directory and the seen sets are kept as memory-mapped
+.npy files, into which new keys are merged chunk by chunk; only one class
+of one layer has to fit in memory at a time. Counts per
+(white, black, phase) class and per-layer throughput are reported.
+
+Needs numpy.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from utils.utils import ADJACENT, MILLS, SYMMETRIES
+
+FULL = np.uint64((1 << 24) - 1)
+SHIFT = np.uint64(24)
+CHUNK = 1 << 17          # frontier positions expanded at once
+MEMORY = 50_000_000      # keys kept in memory per layer before spilling
+
+BIT = [np.uint64(1 << p) for p in range(24)]
+EDGES = [(p, q) for p in range(24) for q in ADJACENT[p]]
+
+# the two mills through every point, as (24,) masks
+_point_mills = [[(1 << a) | (1 << b) | (1 << c) for a, b, c in MILLS if p in (a, b, c)]
+                for p in range(24)]
+MILL_A = np.array([m[0] for m in _point_mills], dtype=np.uint64)
+MILL_B = np.array([m[1] for m in _point_mills], dtype=np.uint64)
+MILL_MASKS = [np.uint64((1 << a) | (1 << b) | (1 << c)) for a, b, c in MILLS]
+
+POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _symmetry_tables():
+    # SYM_BYTES[s, k, v]: mask of the images under symmetry s of the
+    # points set in byte k (= v) of a 24-bit mask
+    tables = np.zeros((len(SYMMETRIES), 3, 256), dtype=np.uint64)
+    for s, perm in enumerate(SYMMETRIES):
+        for k in range(3):
+            for v in range(256):
+                mask = 0
+                for bit in range(8):
+                    if v >> bit & 1:
+                        mask |= 1 << perm[8 * k + bit]
+                tables[s, k, v] = mask
+    return tables
+
+
+SYM_BYTES = _symmetry_tables()
+
+
+# ======================================================================
+# VECTOR PRIMITIVES
+# ======================================================================
+def popcount(masks):
+    """
+    Pieces in each 24-bit mask, as int32.
+    """
+    masks = masks.astype(np.uint64)
+    return (POPCOUNT8[masks & np.uint64(255)].astype(np.int32)
+            + POPCOUNT8[(masks >> np.uint64(8)) & np.uint64(255)]
+            + POPCOUNT8[(masks >> np.uint64(16)) & np.uint64(255)])
+
+
+def _transform(masks, s):
+    table = SYM_BYTES[s]
+    return (table[0][masks & np.uint64(255)]
+            | table[1][(masks >> np.uint64(8)) & np.uint64(255)]
+            | table[2][(masks >> np.uint64(16)) & np.uint64(255)])
+
+
+def canonical(white, black):
+    """
+    Smallest packed key over the board symmetries.
+    """
+    best = white | (black << SHIFT)
+    for s in range(1, len(SYMMETRIES)):
+        np.minimum(best, _transform(white, s) | (_transform(black, s) << SHIFT), out=best)
+    return best
+
+
+def unpack(keys):
+    return keys & FULL, (keys >> SHIFT) & FULL
+
+
+def _capturable(opp):
+    # opponent pieces outside mills, or all of them when every one is in a mill
+    in_mill = np.zeros_like(opp)
+    for m in MILL_MASKS:
+        in_mill |= np.where(opp & m == m, m, np.uint64(0))
+    free = opp & ~in_mill
+    return np.where(free != 0, free, opp)
+
+
+def expand(own, opp, placing):
+    """
+    Children (own, opp) of positions with `own` to move, mover's view.
+    """
+    empty = ~(own | opp) & FULL
+    new_own, new_opp, dest = [], [], []
+
+    def add(sel, moved, to):
+        new_own.append(moved)
+        new_opp.append(opp[sel])
+        dest.append(np.full(len(moved), to, dtype=np.intp))
+
+    if placing:
+        for p in range(24):
+            sel = np.flatnonzero(empty & BIT[p])
+            add(sel, own[sel] | BIT[p], p)
+    else:
+        flying = popcount(own) == 3
+        slide = np.flatnonzero(~flying)
+        fly = np.flatnonzero(flying)
+        for p, q in EDGES:
+            sel = slide[((own[slide] & BIT[p]) != 0) & ((empty[slide] & BIT[q]) != 0)]
+            add(sel, own[sel] ^ (BIT[p] | BIT[q]), q)
+        if len(fly):
+            for p in range(24):
+                has = fly[(own[fly] & BIT[p]) != 0]
+                for q in range(24):
+                    sel = has[(empty[has] & BIT[q]) != 0]
+                    add(sel, own[sel] ^ (BIT[p] | BIT[q]), q)
+
+    own2 = np.concatenate(new_own)
+    opp2 = np.concatenate(new_opp)
+    dest = np.concatenate(dest)
+
+    # mill closed at the destination: one child per capturable piece
+    a, b = MILL_A[dest], MILL_B[dest]
+    mill = (own2 & a == a) | (own2 & b == b)
+    out_own, out_opp = [own2[~mill]], [opp2[~mill]]
+    if mill.any():
+        m_own, m_opp = own2[mill], opp2[mill]
+        targets = _capturable(m_opp)
+        for r in range(24):
+            sel = (targets & BIT[r]) != 0
+            out_own.append(m_own[sel])
+            out_opp.append(m_opp[sel] ^ BIT[r])
+    return np.concatenate(out_own), np.concatenate(out_opp)
+
+
+# ======================================================================
+# LAYER STORAGE
+# ======================================================================
+class Layer:
+    """
+    Canonical keys of one layer grouped by (white count, black count);
+    spills to raw files in `directory` beyond `memory` keys.
+    """
+
+    def __init__(self, directory, name, memory=MEMORY):
+        self.directory = directory
+        self.name = name
+        self.memory = memory
+        self.parts = {}
+        self.in_memory = 0
+        self.spilled = set()
+
+    def _path(self, cls):
+        return os.path.join(self.directory, f"{self.name}-{cls[0]}-{cls[1]}.u64")
+
+    def add(self, keys):
+        if not len(keys):
+            return
+        white, black = unpack(keys)
+        nw, nb = popcount(white), popcount(black)
+        cls_code = nw * 32 + nb
+        order = np.argsort(cls_code, kind='stable')
+        keys, cls_code = keys[order], cls_code[order]
+        bounds = np.flatnonzero(np.diff(cls_code)) + 1
+        for part, code in zip(np.split(keys, bounds), cls_code[np.r_[0, bounds]]):
+            cls = (int(code) // 32, int(code) % 32)
+            self.parts.setdefault(cls, []).append(part)
+            self.in_memory += len(part)
+        if self.in_memory > self.memory:
+            self.spill()
+
+    def spill(self):
+        for cls, parts in self.parts.items():
+            with open(self._path(cls), 'ab') as f:
+                np.unique(np.concatenate(parts)).tofile(f)
+            self.spilled.add(cls)
+        self.parts = {}
+        self.in_memory = 0
+
+    def classes(self):
+        return sorted(set(self.parts) | self.spilled)
+
+    def take(self, cls):
+        """
+        Sorted unique keys of one class (removed from the layer).
+        """
+        parts = self.parts.pop(cls, [])
+        if cls in self.spilled:
+            path = self._path(cls)
+            parts.append(np.fromfile(path, dtype=np.uint64))
+            os.remove(path)
+            self.spilled.discard(cls)
+        if not parts:
+            return np.empty(0, dtype=np.uint64)
+        return np.unique(np.concatenate(parts))
+
+
+class SeenSet:
+    """
+    Sorted keys already reached, for one moving-phase class; kept as a
+    memory-mapped .npy file once it outgrows `memory`.
+    """
+
+    def __init__(self, directory, name, memory=MEMORY):
+        self.path = os.path.join(directory, name + '.npy')
+        self.memory = memory
+        self.keys = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def filter_new(self, keys):
+        """
+        The sorted `keys` not seen yet; they are added to the set.
+        """
+        if len(self.keys):
+            idx = np.searchsorted(self.keys, keys)
+            found = np.zeros(len(keys), dtype=bool)
+            inside = idx < len(self.keys)
+            found[inside] = self.keys[idx[inside]] == keys[inside]
+            keys = keys[~found]
+        if not len(keys):
+            return keys
+        total = len(self.keys) + len(keys)
+        if total <= self.memory:
+            merged = np.concatenate([self.keys, keys])
+            merged.sort(kind='stable')
+            self.keys = merged
+            return keys
+
+        # merge into a new file chunk by chunk: every key's place in the
+        # result is its own index plus the count of smaller keys in the
+        # other (sorted, disjoint) array, so the set is never in memory
+        old = self.keys
+        out = np.lib.format.open_memmap(self.path + '.tmp', mode='w+',
+                                        dtype=np.uint64, shape=(total,))
+        for start in range(0, len(old), CHUNK):
+            part = np.asarray(old[start:start + CHUNK])
+            out[np.arange(start, start + len(part)) + np.searchsorted(keys, part)] = part
+        for start in range(0, len(keys), CHUNK):
+            part = keys[start:start + CHUNK]
+            out[np.arange(start, start + len(part)) + np.searchsorted(old, part)] = part
+        out.flush()
+        # no map of either file may stay open across the replace (Windows)
+        del out, old, part
+        self.keys = None
+        os.replace(self.path + '.tmp', self.path)
+        self.keys = np.load(self.path, mmap_mode='r')
+        return keys
+
+
+# ======================================================================
+# ENUMERATION
+# ======================================================================
+def enumerate_positions(pieces=9, layers=0, memory=MEMORY, directory=None, symmetry=True,
+                        log=None):
+    """
+    Runs the breadth-first enumeration for `layers` plies (0: until no new
+    position appears). Yields one dict per layer: layer, phase, positions
+    (new positions in the layer), generated (children before dedup),
+    seconds, and classes {(white, black): count}.
+    """
+    own_dir = directory is None
+    if own_dir:
+        directory = tempfile.mkdtemp(prefix='nmm-statespace-')
+    else:
+        os.makedirs(directory, exist_ok=True)
+    placing_plies = 2 * pieces
+    seen = {}
+
+    try:
+        frontier = {(0, 0): np.zeros(1, dtype=np.uint64)}
+        frontier_files = []
+        layer = 0
+        yield {'layer': 0, 'phase': 'placing', 'positions': 1, 'generated': 0,
+               'seconds': 0.0, 'classes': {(0, 0): 1}}
+        while frontier and (not layers or layer < layers):
+            t0 = time.perf_counter()
+            placing = layer < placing_plies
+            white_to_move = layer % 2 == 0
+            nxt = Layer(directory, f"layer{layer + 1}", memory)
+            generated = 0
+
+            for cls, keys in frontier.items():
+                if not placing and (cls[0] < 3 or cls[1] < 3):
+                    continue   # game over: a side is down to two pieces
+                for start in range(0, len(keys), CHUNK):
+                    white, black = unpack(np.asarray(keys[start:start + CHUNK]))
+                    own, opp = (white, black) if white_to_move else (black, white)
+                    own, opp = expand(own, opp, placing)
+                    white, black = (own, opp) if white_to_move else (opp, own)
+                    children = canonical(white, black) if symmetry else white | (black << SHIFT)
+                    generated += len(children)
+                    nxt.add(np.unique(children))
+
+            layer += 1
+            phase = 'placing' if layer < placing_plies else 'moving'
+            # drop every map of the old frontier before deleting its files
+            frontier = keys = None
+            for path in frontier_files:
+                os.remove(path)
+            frontier = {}
+            frontier_files = []
+            counts = {}
+            for cls in nxt.classes():
+                keys = nxt.take(cls)
+                if phase == 'moving':
+                    side = 'w' if layer % 2 == 0 else 'b'
+                    name = f"seen-{cls[0]}-{cls[1]}-{side}"
+                    if name not in seen:
+                        seen[name] = SeenSet(directory, name, memory)
+                    keys = seen[name].filter_new(keys)
+                if len(keys):
+                    frontier[cls] = keys
+                    counts[cls] = len(keys)
+            # the frontier itself is spilled as memory-mapped files when large
+            if sum(counts.values()) > memory:
+                for cls, keys in frontier.items():
+                    path = os.path.join(directory, f"frontier{layer}-{cls[0]}-{cls[1]}.npy")
+                    np.save(path, keys)
+                    frontier[cls] = np.load(path, mmap_mode='r')
+                    frontier_files.append(path)
+
+            yield {
+                'layer': layer, 'phase': phase, 'positions': sum(counts.values()),
+                'generated': generated, 'seconds': time.perf_counter() - t0, 'classes': counts,
+            }
+    finally:
+        if own_dir:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+# ======================================================================
+# COMMAND LINE
+# ======================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.statespace',
+                                     description='Count reachable positions layer by layer.')
+    parser.add_argument('--layers', type=int, default=0, help='plies to expand (0: all)')
+    parser.add_argument('--pieces', type=int, default=9, help='pieces per side')
+    parser.add_argument('--memory', type=int, default=MEMORY,
+                        help='keys held in memory per layer before spilling to disk')
+    parser.add_argument('--spill-dir', help='directory for spilled layers (default: a temp dir)')
+    parser.add_argument('--no-symmetry', action='store_true',
+                        help='count positions without merging symmetric ones')
+    parser.add_argument('--classes', action='store_true', help='print counts per class per layer')
+    args = parser.parse_args(argv)
+
+    totals = {}
+    positions = generated = 0
+    seconds = 0.0
+    print(f"{'layer':>5} {'phase':8} {'positions':>14} {'generated':>14} {'seconds':>8} {'gen/s':>12}")
+    for info in enumerate_positions(args.pieces, args.layers, args.memory, args.spill_dir,
+                                    not args.no_symmetry):
+        rate = info['generated'] / info['seconds'] if info['seconds'] else 0
+        print(f"{info['layer']:5d} {info['phase']:8} {info['positions']:14d}"
+              f" {info['generated']:14d} {info['seconds']:8.2f} {int(rate):12d}", flush=True)
+        if args.classes:
+            for (w, b), count in sorted(info['classes'].items()):
+                print(f"      {w}v{b} {count}")
+        for (w, b), count in info['classes'].items():
+            key = (w, b, info['phase'])
+            totals[key] = totals.get(key, 0) + count
+        positions += info['positions']
+        generated += info['generated']
+        seconds += info['seconds']
+
+    print("\nreachable positions per class (white, black, phase):")
+    for (w, b, phase), count in sorted(totals.items(), key=lambda kv: (kv[0][2], -kv[0][0], -kv[0][1])):
+        print(f"  {w}v{b} {phase:8} {count}")
+    rate = generated / seconds if seconds else 0
+    print(f"total {positions} positions, {generated} generated in {seconds:.1f}s ({int(rate)}/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
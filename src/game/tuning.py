@@ -0,0 +1,280 @@
+# src/game/tuning.py
+"""
+Offline tuning of the evaluation weights (Texel method) from self-play.
+
+    python -m game.tuning generate --games 500 --nodes 3000 --processes 4 -o selfplay.npz
+    python -m game.tuning fit selfplay.npz [more.npz ...] -o src/game/eval_weights.json
+
+`generate` plays headless engine games (a few random opening plies for
+variety, then node-limited AIPlayers on both sides) and stores every
+position reached with the game's result in a compressed columnar .npz:
+
+    white, black  uint32   piece bitmasks (bit i = point i)
+    placing       bool     placing phase
+    current       int8     side to move (WHITE / BLACK)
+    white_unplaced, black_unplaced
+                  uint8    pieces still to place
+    result        int8     1 white won, -1 black won, 0 draw
+    game          uint32   game number
+
+`fit` computes the evaluation features of every position with
+game.batch_eval, then minimises the mean squared error between the result
+(as 1 / 0.5 / 0) and sigmoid(K * score / 400) over the weights, K being
+fitted first for the current weights. Everything is whole-array NumPy, so
+millions of positions take seconds per pass. The weights are written as
+the JSON config AIPlayer loads at startup (game.ai.WEIGHTS_FILE).
+
+Needs numpy.
+"""
+import argparse
+import concurrent.futures
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from game.ai import AIPlayer, DEFAULT_WEIGHTS, WEIGHTS_FILE, load_weights
+from game.batch_eval import boards_from_masks, evaluate_terms
+from game.game import GameState
+from utils.utils import WHITE, BLACK
+
+FEATURES = ('piece', 'mobility', 'mill')
+SCALE = 400.0
+
+# per-position columns of a self-play file (plus result and game)
+POSITION_COLUMNS = {
+    'white': np.uint32, 'black': np.uint32, 'placing': bool, 'current': np.int8,
+    'white_unplaced': np.uint8, 'black_unplaced': np.uint8,
+}
+
+
+# ======================================================================
+# SELF-PLAY
+# ======================================================================
+def play_game(seed, nodes=3000, random_plies=6, max_plies=300, weights=None):
+    """
+    One engine-vs-engine game. Returns (columns, result): columns maps
+    white / black / placing / current / white_unplaced / black_unplaced
+    to lists with one entry per non-terminal position after the random
+    opening.
+    """
+    rng = random.Random(seed)
+    players = {
+        color: AIPlayer(color=color, max_time=0, max_nodes=nodes,
+                        seed=rng.randrange(1 << 30), weights=weights)
+        for color in (WHITE, BLACK)
+    }
+    state = GameState()
+    state.repetition_limit = 3
+    cols = {name: [] for name in POSITION_COLUMNS}
+    result = 0
+
+    for ply in range(max_plies):
+        over, winner = state.is_game_over()
+        if over:
+            result = 0 if winner is None else winner
+            break
+        if ply >= random_plies:
+            w = b = 0
+            for i, p in enumerate(state.board):
+                if p == WHITE:
+                    w |= 1 << i
+                elif p == BLACK:
+                    b |= 1 << i
+            cols['white'].append(w)
+            cols['black'].append(b)
+            cols['placing'].append(state.phase == 'placing')
+            cols['current'].append(state.current)
+            cols['white_unplaced'].append(state.white_unplaced)
+            cols['black_unplaced'].append(state.black_unplaced)
+
+        if ply < random_plies:
+            move, cap, _ = rng.choice(list(state.iter_children()))
+        else:
+            move, cap = players[state.current].choose_move(state)
+        state.make_move(move, cap)
+
+    return cols, result
+
+
+def _play(args):
+    return play_game(*args)
+
+
+def generate(path, games, nodes=3000, random_plies=6, max_plies=300, processes=1, seed=0,
+             log=None):
+    """
+    Plays `games` games and writes the positions to `path` (.npz).
+    Returns the number of positions.
+    """
+    jobs = [(seed * 1000003 + g, nodes, random_plies, max_plies) for g in range(games)]
+    cols = {name: [] for name in POSITION_COLUMNS}
+    cols['result'] = []
+    cols['game'] = []
+
+    def add(g, game):
+        positions, result = game
+        for name, values in positions.items():
+            cols[name].extend(values)
+        count = len(positions['white'])
+        cols['result'].extend([result] * count)
+        cols['game'].extend([g] * count)
+        if log:
+            log(f"game {g + 1}/{games}: {count} positions, result {result:+d}")
+
+    if processes <= 1:
+        for g, job in enumerate(jobs):
+            add(g, _play(job))
+    else:
+        import multiprocessing
+        ctx = multiprocessing.get_context('spawn')
+        with concurrent.futures.ProcessPoolExecutor(processes, mp_context=ctx) as pool:
+            for g, game in enumerate(pool.map(_play, jobs, chunksize=4)):
+                add(g, game)
+
+    dtypes = dict(POSITION_COLUMNS, result=np.int8, game=np.uint32)
+    np.savez_compressed(path, **{name: np.array(values, dtype=dtypes[name])
+                                 for name, values in cols.items()})
+    return len(cols['white'])
+
+
+def load_positions(paths, columns=('white', 'black', 'placing', 'result')):
+    """
+    Concatenates the given columns of one or more self-play files.
+    """
+    parts = [np.load(p) for p in paths]
+    for path, part in zip(paths, parts):
+        missing = [name for name in columns if name not in part.files]
+        if missing:
+            raise ValueError(f"{path}: no {', '.join(missing)} column (regenerate it)")
+    return {name: np.concatenate([part[name] for part in parts]) for name in columns}
+
+
+# ======================================================================
+# FITTING
+# ======================================================================
+def features(data):
+    """
+    (N, 3) float64 feature matrix, white minus black, in FEATURES order.
+    """
+    boards = boards_from_masks(data['white'], data['black'])
+    return np.stack(evaluate_terms(boards, data['placing']), axis=1).astype(np.float64)
+
+
+def _error(x, target, w, k):
+    p = 1.0 / (1.0 + np.exp(-k * (x @ w) / SCALE))
+    return float(np.mean((target - p) ** 2))
+
+
+def fit_k(x, target, w):
+    """
+    Sigmoid scale K that best maps the current weights to results
+    (golden-section search).
+    """
+    lo, hi = 0.01, 10.0
+    g = (5 ** 0.5 - 1) / 2
+    a, b = hi - g * (hi - lo), lo + g * (hi - lo)
+    fa, fb = _error(x, target, w, a), _error(x, target, w, b)
+    for _ in range(60):
+        if fa < fb:
+            hi, b, fb = b, a, fa
+            a = hi - g * (hi - lo)
+            fa = _error(x, target, w, a)
+        else:
+            lo, a, fa = a, b, fb
+            b = lo + g * (hi - lo)
+            fb = _error(x, target, w, b)
+    return (lo + hi) / 2
+
+
+def fit(x, target, weights, iterations=2000, rate=None, log=None):
+    """
+    Texel fit: K for the starting weights, then full-batch Adam on the
+    mean squared error. Returns (weights dict, K, error before, error after).
+    """
+    w = np.array([weights[name] for name in FEATURES], dtype=np.float64)
+    k = fit_k(x, target, w)
+    before = _error(x, target, w, k)
+
+    # per-feature step sizes in weight units
+    rate = rate if rate is not None else 0.5
+    m = np.zeros_like(w)
+    v = np.zeros_like(w)
+    beta1, beta2, eps = 0.9, 0.999, 1e-12
+    for t in range(1, iterations + 1):
+        p = 1.0 / (1.0 + np.exp(-k * (x @ w) / SCALE))
+        grad = -2.0 * ((target - p) * p * (1.0 - p) * (k / SCALE)) @ x / len(x)
+        m = beta1 * m + (1 - beta1) * grad
+        v = beta2 * v + (1 - beta2) * grad * grad
+        w -= rate * (m / (1 - beta1 ** t)) / (np.sqrt(v / (1 - beta2 ** t)) + eps)
+        if log and t % 500 == 0:
+            log(f"iteration {t}: error {_error(x, target, w, k):.6f} weights {np.round(w, 2)}")
+
+    after = _error(x, target, w, k)
+    return dict(zip(FEATURES, (round(float(value), 2) for value in w))), k, before, after
+
+
+def write_weights(path, weights, **info):
+    data = dict(weights)
+    if info:
+        data['_tuning'] = info
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.write('\n')
+
+
+# ======================================================================
+# COMMAND LINE
+# ======================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.tuning',
+                                     description='Tune evaluation weights from self-play.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    gen = sub.add_parser('generate', help='play engine games and store their positions')
+    gen.add_argument('-o', '--output', required=True, help='.npz file to write')
+    gen.add_argument('--games', type=int, default=100)
+    gen.add_argument('--nodes', type=int, default=3000, help='node limit per move')
+    gen.add_argument('--random-plies', type=int, default=6, help='random opening plies')
+    gen.add_argument('--max-plies', type=int, default=300, help='longer games count as draws')
+    gen.add_argument('--processes', type=int, default=1)
+    gen.add_argument('--seed', type=int, default=0)
+
+    fit_cmd = sub.add_parser('fit', help='fit weights to stored positions')
+    fit_cmd.add_argument('inputs', nargs='+', help='.npz files from generate')
+    fit_cmd.add_argument('-o', '--output', default=WEIGHTS_FILE,
+                         help='weights config to write (default: the one AIPlayer loads)')
+    fit_cmd.add_argument('--iterations', type=int, default=2000)
+    fit_cmd.add_argument('--from-defaults', action='store_true',
+                         help='start from the built-in weights instead of the current config')
+
+    args = parser.parse_args(argv)
+
+    def log(msg):
+        print(msg, file=sys.stderr, flush=True)
+
+    if args.command == 'generate':
+        t0 = time.time()
+        count = generate(args.output, args.games, args.nodes, args.random_plies,
+                         args.max_plies, args.processes, args.seed, log=log)
+        print(f"{count} positions from {args.games} games in {time.time() - t0:.1f}s -> {args.output}")
+        return 0
+
+    t0 = time.time()
+    data = load_positions(args.inputs)
+    x = features(data)
+    target = (data['result'].astype(np.float64) + 1.0) / 2.0
+    start = dict(DEFAULT_WEIGHTS) if args.from_defaults else load_weights()
+    weights, k, before, after = fit(x, target, start, args.iterations, log=log)
+    write_weights(args.output, weights, positions=len(x), k=round(k, 4),
+                  error_before=round(before, 6), error_after=round(after, 6))
+    print(f"{len(x)} positions, K={k:.3f}, error {before:.6f} -> {after:.6f}"
+          f" in {time.time() - t0:.1f}s")
+    print(f"weights {weights} -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
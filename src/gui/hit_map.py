@@ -0,0 +1,59 @@
+# src/gui/hit_map.py
+
+NO_HIT = 255
+
+
+class HitMap:
+    """
+    Precomputed pixel -> board point lookup for the canvas.
+
+    One byte per canvas pixel holds the index of the point whose disc
+    covers it (NO_HIT elsewhere), so a pointer event is a single read.
+    `nearest=False` keeps the lowest index when discs overlap (click test),
+    `nearest=True` keeps the closest point, later index on ties (hover).
+    The board is drawn at a fixed size (the main window is not resizable),
+    so the map is built once for the canvas size and COORDS as given.
+    """
+
+    def __init__(self, coords, radius, width, height, nearest=False):
+        self.coords = coords
+        self.radius = radius
+        self.nearest = nearest
+        self.width = int(width)
+        self.height = int(height)
+        w, h = self.width, self.height
+        grid = bytearray([NO_HIT]) * (w * h)
+        best = {}  # pixel -> squared distance, only for `nearest`
+
+        r = self.radius
+        r2 = r * r
+        span = int(r) + 1
+        for idx in sorted(self.coords):
+            cx, cy = self.coords[idx]
+            for y in range(max(0, int(cy) - span), min(h, int(cy) + span + 1)):
+                dy = y - cy
+                row = y * w
+                for x in range(max(0, int(cx) - span), min(w, int(cx) + span + 1)):
+                    dx = x - cx
+                    d2 = dx * dx + dy * dy
+                    if d2 > r2:
+                        continue
+                    cell = row + x
+                    if self.nearest:
+                        if d2 <= best.get(cell, r2):
+                            best[cell] = d2
+                            grid[cell] = idx
+                    elif grid[cell] == NO_HIT:
+                        grid[cell] = idx
+        self.grid = grid
+
+    def lookup(self, x, y):
+        """
+        Point index under canvas pixel (x, y), or None.
+        """
+        x = int(x)
+        y = int(y)
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return None
+        idx = self.grid[y * self.width + x]
+        return None if idx == NO_HIT else idx
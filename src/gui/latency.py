@@ -0,0 +1,236 @@
+# src/gui/latency.py
+"""
+Opt-in UI latency instrumentation.
+
+    NMM_LATENCY=1 python src/main.py          # report on exit (stderr)
+    NMM_LATENCY=overlay python src/main.py    # plus a live overlay on the board
+    NMM_LATENCY_FILE=latency.json             # also write the report as JSON
+
+Measured, in milliseconds:
+    click, move            BoardFrame.on_click / on_mouse_move, from entry
+                           to return (any draw_board they trigger included)
+    click_idle, move_idle  from handler entry until Tk is idle again, i.e.
+                           after the redraw has been processed
+    draw_board             one full board redraw
+    loop_lag               how late a heartbeat `after` callback fires
+and sampled on every heartbeat: live canvas items and pending `after`
+callbacks. Each timing series is summarised as count / p50 / p95 / p99 /
+max with a bucketed histogram; the two sampled counts as min / p50 / max.
+"""
+import bisect
+import collections
+import json
+import os
+import sys
+import time
+import tkinter as tk
+
+SAMPLE_LIMIT = 20000       # most recent samples kept per series
+HEARTBEAT_MS = 50
+OVERLAY_EVERY = 20         # heartbeats between overlay refreshes
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+COUNT_SERIES = ('canvas_items', 'after_pending')
+
+
+class Series:
+    """
+    Bounded sample store with percentiles. Timings (ms) get a histogram
+    over BUCKETS; counts (timing=False) a min instead.
+    """
+
+    def __init__(self, limit=SAMPLE_LIMIT, timing=True):
+        self.samples = collections.deque(maxlen=limit)
+        self.timing = timing
+        self.count = 0
+        self.max = 0.0
+        self.min = None
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+        if value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    def percentile(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))]
+
+    def histogram(self):
+        """
+        {"<1": n, "<2": n, ..., ">=250": n} over the kept samples.
+        """
+        counts = [0] * (len(BUCKETS) + 1)
+        for value in self.samples:
+            counts[bisect.bisect_right(BUCKETS, value)] += 1
+        labels = [f"<{b}" for b in BUCKETS] + [f">={BUCKETS[-1]}"]
+        return dict(zip(labels, counts))
+
+    def summary(self):
+        if not self.timing:
+            return {
+                'count': self.count,
+                'min': self.min,
+                'p50': self.percentile(50),
+                'max': self.max,
+            }
+        return {
+            'count': self.count,
+            'p50': round(self.percentile(50), 2),
+            'p95': round(self.percentile(95), 2),
+            'p99': round(self.percentile(99), 2),
+            'max': round(self.max, 2),
+            'histogram': self.histogram(),
+        }
+
+
+class LatencyMonitor:
+    """
+    Times board handlers and the Tk event loop of one application.
+    attach(board) instruments a BoardFrame; close() stops and reports.
+    """
+
+    def __init__(self, root, overlay=False, path=None):
+        self.root = root
+        self.overlay = overlay
+        self.path = path
+        self.series = collections.defaultdict(Series)
+        for name in COUNT_SERIES:
+            self.series[name] = Series(timing=False)
+        self.board = None
+        self.label = None
+        self.expected = None
+        self.beats = 0
+        self.beat_id = root.after(HEARTBEAT_MS, self._beat)
+
+    @staticmethod
+    def from_env(root):
+        """
+        A monitor when NMM_LATENCY is set (and not "0"), otherwise None.
+        """
+        value = os.environ.get('NMM_LATENCY', '')
+        if not value or value == '0':
+            return None
+        return LatencyMonitor(root, overlay=(value == 'overlay'),
+                              path=os.environ.get('NMM_LATENCY_FILE') or None)
+
+    # ---------------------------------------------------------
+    # INSTRUMENTATION
+    # ---------------------------------------------------------
+    def attach(self, board):
+        """
+        Wraps the board's pointer handlers and draw_board. Call before the
+        board binds its canvas events (the wrappers are instance attributes).
+        """
+        self.board = board
+        board.on_click = self._timed_handler('click', board.on_click)
+        board.on_mouse_move = self._timed_handler('move', board.on_mouse_move)
+        board.draw_board = self._timed_call('draw_board', board.draw_board)
+        self.label = None
+
+    def _timed_handler(self, name, handler):
+        series = self.series[name]
+        idle = self.series[name + '_idle']
+
+        def wrapper(event):
+            t0 = time.perf_counter()
+            try:
+                return handler(event)
+            finally:
+                series.add((time.perf_counter() - t0) * 1000)
+                self.root.after_idle(lambda: idle.add((time.perf_counter() - t0) * 1000))
+        return wrapper
+
+    def _timed_call(self, name, fn):
+        series = self.series[name]
+
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                series.add((time.perf_counter() - t0) * 1000)
+        return wrapper
+
+    def _beat(self):
+        now = time.perf_counter()
+        if self.expected is not None:
+            self.series['loop_lag'].add(max(0.0, (now - self.expected) * 1000))
+        try:
+            pending = self.root.tk.splitlist(self.root.tk.call('after', 'info'))
+            self.series['after_pending'].add(len(pending))
+            if self.board is not None and self.board.winfo_exists():
+                self.series['canvas_items'].add(len(self.board.canvas.find_all()))
+        except tk.TclError:
+            self.board = None
+
+        self.beats += 1
+        if self.overlay and self.beats % OVERLAY_EVERY == 0:
+            self._update_overlay()
+        self.expected = time.perf_counter() + HEARTBEAT_MS / 1000.0
+        self.beat_id = self.root.after(HEARTBEAT_MS, self._beat)
+
+    # ---------------------------------------------------------
+    # OUTPUT
+    # ---------------------------------------------------------
+    def _update_overlay(self):
+        board = self.board
+        if board is None:
+            return
+        try:
+            if self.label is None or not self.label.winfo_exists():
+                self.label = tk.Label(board, bg='#000000', fg='#FFD65C', font=('Consolas', 8),
+                                      justify='left', anchor='nw')
+                self.label.place(relx=1.0, rely=1.0, anchor='se')
+            s = self.series
+            self.label.config(text=(
+                f"click p95 {s['click_idle'].percentile(95):.1f}ms"
+                f"  move p95 {s['move_idle'].percentile(95):.1f}ms\n"
+                f"draw p95 {s['draw_board'].percentile(95):.1f}ms"
+                f"  lag p95 {s['loop_lag'].percentile(95):.1f}ms\n"
+                f"items {int(s['canvas_items'].samples[-1]) if s['canvas_items'].samples else 0}"
+                f"  after {int(s['after_pending'].samples[-1]) if s['after_pending'].samples else 0}"
+            ))
+        except tk.TclError:
+            self.label = None
+
+    def report(self):
+        """
+        {series name: summary} for every series with samples.
+        """
+        return {name: series.summary() for name, series in sorted(self.series.items())
+                if series.count}
+
+    def format_report(self):
+        lines = [f"{'series':14s} {'count':>7s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s}"]
+        counts = []
+        for name, s in self.report().items():
+            if 'histogram' not in s:
+                counts.append(f"{name:14s} {s['count']:7d} min {s['min']:g}  p50 {s['p50']:g}"
+                              f"  max {s['max']:g}")
+                continue
+            lines.append(f"{name:14s} {s['count']:7d} {s['p50']:8.2f} {s['p95']:8.2f}"
+                         f" {s['p99']:8.2f} {s['max']:8.2f}")
+            lines.append('    ' + '  '.join(f"{k}:{v}" for k, v in s['histogram'].items() if v))
+        return '\n'.join(lines + counts)
+
+    def close(self):
+        """
+        Stops the heartbeat and writes the report (stderr, and JSON when a
+        path was given).
+        """
+        if self.beat_id is not None:
+            try:
+                self.root.after_cancel(self.beat_id)
+            except tk.TclError:
+                pass
+            self.beat_id = None
+        print("UI latency (ms), then sampled counts", file=sys.stderr)
+        print(self.format_report(), file=sys.stderr)
+        if self.path:
+            with open(self.path, 'w') as f:
+                json.dump(self.report(), f, indent=1)
+                f.write('\n')
@@ -1,6 +1,5 @@
 # src/gui/ui_board.py
 import os
-import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
@@ -8,9 +7,19 @@ from PIL import Image, ImageTk, ImageEnhance, ImageDraw, ImageFilter
 
 from utils.utils import COORDS, WHITE, BLACK, EMPTY, ADJACENT
 from game.game import GameState
-from game.ai import AIPlayer
+from game.history import MoveHistory
+from game.record import GameRecord, RecordWriter, RecordReader, is_record_file
+from game.disk_cache import path_from_env
+from game.engine_host import EngineHost
+from gui.hit_map import HitMap
+from gui.ui_start import AI_PRESETS
 
 RADIUS = 14  # logical radius for pieces
+CANVAS_W, CANVAS_H = 420, 460
+
+# pointer hit radii around each point
+CLICK_RADIUS = RADIUS + 8
+HOVER_RADIUS = RADIUS + 14
 
 # background around the board
 BG = "#24130F"
@@ -34,7 +43,8 @@ class BoardFrame(tk.Frame):
         back_callback=None,
         undo_limit=5,
         ai_level=None,
-        max_win_moves=0
+        engine_host=None,
+        latency=None
     ):
         super().__init__(master, bg=BG)
         self.mode = mode
@@ -43,27 +53,31 @@ class BoardFrame(tk.Frame):
 
         # settings
         self.ai_level = ai_level or "N/A"
-        self.max_win_moves = int(max_win_moves or 0)
         self.undo_limit = max(0, int(undo_limit))
 
-        # AI instance
-        self.ai = None
+        # AI engine (searches run in the engine host, off the Tk thread)
+        self.ai_color = None
+        self.engine = None
+        self.owns_engine = False
         if mode == 'ai':
-            level = (ai_level or "Medium").lower()
-            if level == 'easy':
-                max_time = 0.6
-            elif level == 'hard':
-                max_time = 4.0
-            else:
-                max_time = 1.8
-            self.ai = AIPlayer(color=BLACK, max_time=max_time, max_win_moves=self.max_win_moves)
+            limits = AI_PRESETS.get(ai_level or "Medium", AI_PRESETS["Medium"])
+            self.ai_color = BLACK
+            self.engine = engine_host
+            if self.engine is None:
+                self.engine = EngineHost()
+                self.owns_engine = True
+            settings = dict(limits)
+            cache = path_from_env()
+            if cache and settings.get('engine') != 'mcts':
+                settings['disk_cache'] = cache
+            self.engine.configure(color=BLACK, **settings)
 
         # interaction state
         self.selected = None
         self.pending_capture = False
         self.last_move = None
-        self.undo_stack = []
-        self.ai_thread = None
+        self.history = MoveHistory(self.state)
+        self.undo_points = 0
         self.ai_running = False
         self.win_label = None
         self.game_over_handled = False
@@ -80,6 +94,15 @@ class BoardFrame(tk.Frame):
         self.hover_glow_items = []
         self.glow_items = []
 
+        # pointer hit-testing (pixel -> point lookup); the canvas has a fixed size
+        self.click_map = HitMap(COORDS, CLICK_RADIUS, CANVAS_W, CANVAS_H)
+        self.hover_map = HitMap(COORDS, HOVER_RADIUS, CANVAS_W, CANVAS_H, nearest=True)
+
+        # optional gui.latency.LatencyMonitor; wraps the handlers before
+        # build_ui binds them
+        if latency is not None:
+            latency.attach(self)
+
         self.build_ui()
         self.load_textures()
         self.draw_board()
@@ -191,7 +214,7 @@ class BoardFrame(tk.Frame):
         row2.pack_propagate(False)
         self.ai_level_label = tk.Label(
             row2,
-            text=f"AI: {self.ai_level} | Max win: {self.max_win_moves or '∞'}",
+            text=f"AI: {self.ai_level}",
             bg=BG, fg="#F7E7D0", font=("Segoe UI", 10)
         )
         self.ai_level_label.pack(side='left', padx=12)
@@ -223,7 +246,7 @@ class BoardFrame(tk.Frame):
         canvas_frame.pack(pady=10)
 
         self.canvas = tk.Canvas(
-            canvas_frame, width=420, height=460,
+            canvas_frame, width=CANVAS_W, height=CANVAS_H,
             bg=BG, bd=0, highlightthickness=0
         )
         self.canvas.pack(padx=12, pady=6)
@@ -293,7 +316,7 @@ class BoardFrame(tk.Frame):
 
             # --- load board texture ---
             board_img = Image.open(WOOD_TEXTURE).convert("RGB")
-            board_img = board_img.resize((420, 460), Image.LANCZOS)
+            board_img = board_img.resize((CANVAS_W, CANVAS_H), Image.LANCZOS)
             # subtle darkening for mood
             board_img = ImageEnhance.Brightness(board_img).enhance(0.95)
             self.board_bg_img = ImageTk.PhotoImage(board_img)
@@ -317,21 +340,30 @@ class BoardFrame(tk.Frame):
 
     # ---------- Undo / Save / Load ----------
     def push_undo(self):
-        self.undo_stack.append(self.state.to_json())
-        if len(self.undo_stack) > 200:
-            self.undo_stack.pop(0)
+        # marks the start of a player move as an undo point;
+        # the moves themselves are kept in self.history
+        self.undo_points += 1
         if self.undo_limit > 0:
-            while len(self.undo_stack) > self.undo_limit:
-                self.undo_stack.pop(0)
+            self.undo_points = min(self.undo_points, self.undo_limit)
         self.update_undo_label()
 
     def on_undo(self):
-        if not self.undo_stack:
+        if self.ai_running:
+            messagebox.showinfo("Please wait", "AI is thinking. Please wait a moment.")
+            return
+        if self.undo_points == 0 or not (self.pending_capture or self.history.can_undo()):
             messagebox.showinfo("Undo", "No undos available")
             return
-        last_json = self.undo_stack.pop()
         try:
-            self.state = GameState.from_json(last_json)
+            self.undo_points -= 1
+            if self.pending_capture:
+                self.revert_pending()
+            else:
+                self.history.undo(self.state)
+                # vs AI, take back the AI reply together with the player's move
+                while (self.mode == 'ai' and self.state.current == self.ai_color
+                       and self.history.can_undo()):
+                    self.history.undo(self.state)
             self.selected = None
             self.pending_capture = False
             self.last_move = None
@@ -345,36 +377,50 @@ class BoardFrame(tk.Frame):
         if self.undo_limit == 0:
             text = "Undos left: ∞"
         else:
-            used = len(self.undo_stack)
+            used = self.undo_points
             left = max(0, self.undo_limit - used)
             text = f"Undos left: {left}"
         self.undo_label.config(text=text)
 
     def on_save(self):
         path = filedialog.asksaveasfilename(
-            defaultextension=".json",
-            filetypes=[("JSON files", "*.json")]
+            defaultextension=".nmm",
+            filetypes=[("Game records", "*.nmm"), ("JSON snapshot", "*.json")]
         )
         if not path:
             return
         try:
-            with open(path, 'w') as f:
-                f.write(self.state.to_json())
+            if path.lower().endswith(".json"):
+                # legacy: current position only
+                with open(path, 'w') as f:
+                    f.write(self.state.to_json())
+            else:
+                # full game: start position + every move, gzip-compressed
+                with RecordWriter(path, compression='gzip') as w:
+                    w.write(GameRecord.from_history(self.history, self.state))
             messagebox.showinfo("Save", "Game saved")
         except Exception as e:
             messagebox.showerror("Save Error", str(e))
 
     def on_load(self):
         path = filedialog.askopenfilename(
-            filetypes=[("JSON files", "*.json")]
+            filetypes=[("Saved games", "*.nmm *.json"), ("Game records", "*.nmm"), ("JSON snapshot", "*.json")]
         )
         if not path:
             return
         try:
-            with open(path, 'r') as f:
-                text = f.read()
-            loaded = GameState.from_json(text)
-            self.push_undo()
+            if is_record_file(path):
+                with RecordReader(path) as r:
+                    record = next(iter(r), None)
+                if record is None:
+                    raise ValueError("The file contains no games")
+                self.history, loaded = record.to_history()
+            else:
+                with open(path, 'r') as f:
+                    text = f.read()
+                loaded = GameState.from_json(text)
+                self.history.reset(loaded)
+            self.undo_points = 0
             self.state = loaded
             self.selected = None
             self.pending_capture = False
@@ -391,6 +437,11 @@ class BoardFrame(tk.Frame):
                 return
             self.back_callback()
 
+    def destroy(self):
+        if self.owns_engine:
+            self.engine.close()
+        super().destroy()
+
     # ---------- Drawing ----------
     def draw_board(self):
         c = self.canvas
@@ -402,7 +453,7 @@ class BoardFrame(tk.Frame):
         if self.board_bg_img is not None:
             self.board_bg_id = c.create_image(0, 0, anchor='nw', image=self.board_bg_img)
         else:
-            c.create_rectangle(0, 0, 420, 460, fill="#5A2E1E", outline="#2C150E")
+            c.create_rectangle(0, 0, CANVAS_W, CANVAS_H, fill="#5A2E1E", outline="#2C150E")
 
         # carved frame
         c.create_rectangle(8, 8, 412, 452, outline="#2D1208", width=6)
@@ -476,15 +527,7 @@ class BoardFrame(tk.Frame):
     # ---------- Hover handling ----------
     def on_mouse_move(self, event):
         # find nearest point in range and animate hover glow
-        closest = None
-        best_dist2 = (RADIUS + 14) ** 2
-        for idx, (x, y) in COORDS.items():
-            dx = event.x - x
-            dy = event.y - y
-            d2 = dx * dx + dy * dy
-            if d2 <= best_dist2:
-                best_dist2 = d2
-                closest = idx
+        closest = self.hover_map.lookup(event.x, event.y)
 
         if closest != self.hover_pos:
             self.hover_pos = closest
@@ -536,13 +579,7 @@ class BoardFrame(tk.Frame):
     def on_click(self, event):
         if self.ai_running or self.animating:
             return
-        clicked = None
-        for idx, (x, y) in COORDS.items():
-            dx = event.x - x
-            dy = event.y - y
-            if dx * dx + dy * dy <= (RADIUS + 8) ** 2:
-                clicked = idx
-                break
+        clicked = self.click_map.lookup(event.x, event.y)
         if clicked is None:
             return
 
@@ -550,9 +587,9 @@ class BoardFrame(tk.Frame):
             if self.state.board[clicked] == -self.state.current:
                 capturable = self.state.can_capture_positions()
                 if clicked in capturable:
-                    self.push_undo()
                     self.animate_capture(clicked)
-                    self.state = self.state.apply_move(self.last_move, remove_pos=clicked)
+                    self.revert_pending()
+                    self.history.play(self.state, self.last_move, clicked)
                     self.pending_capture = False
                     self.selected = None
                     self.draw_board()
@@ -570,12 +607,13 @@ class BoardFrame(tk.Frame):
                     self.last_move = move
                     self.pending_capture = True
                     self.state.board[clicked] = self.state.current
+                    self.state.invalidate()
                     self.draw_board()
                     self.update_status(capturing=True)
                     self.animate_glow([clicked])
                 else:
                     self.push_undo()
-                    self.state = self.state.apply_move(move, remove_pos=None)
+                    self.history.play(self.state, move)
                     self.draw_board()
                     self.update_status()
                     self.animate_glow([clicked])
@@ -601,6 +639,7 @@ class BoardFrame(tk.Frame):
                             self.animate_move(frm, to, self.state.current)
                             self.state.board[frm] = EMPTY
                             self.state.board[to] = self.state.current
+                            self.state.invalidate()
                             self.pending_capture = True
                             self.selected = None
                             self.draw_board()
@@ -609,7 +648,7 @@ class BoardFrame(tk.Frame):
                         else:
                             self.push_undo()
                             self.animate_move(frm, to, self.state.current)
-                            self.state = self.state.apply_move(move, remove_pos=None)
+                            self.history.play(self.state, move)
                             self.selected = None
                             self.draw_board()
                             self.update_status()
@@ -623,6 +662,17 @@ class BoardFrame(tk.Frame):
                         self.selected = clicked
                         self.draw_board()
 
+    def revert_pending(self):
+        # undo the board preview of a mill move still waiting for its capture
+        move = self.last_move
+        if move[0] == 'place':
+            self.state.board[move[1]] = EMPTY
+        else:
+            self.state.board[move[2]] = EMPTY
+            self.state.board[move[1]] = self.state.current
+        self.state.invalidate()
+        self.pending_capture = False
+
     def is_legal_move(self, move):
         if move[0] != 'move':
             return False
@@ -642,8 +692,11 @@ class BoardFrame(tk.Frame):
         if over and not self.game_over_handled:
             self.game_over_handled = True
 
-            winner_text = "White" if winner == WHITE else "Black"
-            fancy = f"🎉 {winner_text} Wins the Match! 🎉"
+            if winner is None:
+                fancy = "Draw!"
+            else:
+                winner_text = "White" if winner == WHITE else "Black"
+                fancy = f"🎉 {winner_text} Wins the Match! 🎉"
 
             # Show animated message in the center
             self.show_win_animation(fancy)
@@ -677,9 +730,8 @@ class BoardFrame(tk.Frame):
         self.update_undo_label()
 
     def after_ai_if_needed(self):
-        if self.mode == 'ai' and self.state.current == self.ai.color:
+        if self.mode == 'ai' and self.state.current == self.ai_color:
             self.update_status()
-            self.push_undo()
             self.start_ai_thread()
 
     def start_ai_thread(self):
@@ -689,15 +741,17 @@ class BoardFrame(tk.Frame):
         self.progress.pack(side='right', padx=12)
         self.progress.start(10)
         self.ai_label.config(text=f"AI ({self.ai_level}) is thinking...")
-        self.ai_thread = threading.Thread(target=self.run_ai_thread, daemon=True)
-        self.ai_thread.start()
-
-    def run_ai_thread(self):
-        try:
-            choice = self.ai.choose_move(self.state)
-            self.after(10, lambda: self.finish_ai_move(choice))
-        except Exception:
-            self.after(10, lambda: self.finish_ai_move(None))
+        self.engine.submit(self.state)
+        self.after(EngineHost.POLL_MS, self.poll_ai)
+
+    def poll_ai(self):
+        # the search runs in the engine host; Tk only checks for the answer
+        result = self.engine.poll()
+        if result is None:
+            self.after(EngineHost.POLL_MS, self.poll_ai)
+            return
+        choice, _ = result
+        self.finish_ai_move(choice)
 
     def finish_ai_move(self, choice):
         try:
@@ -713,8 +767,8 @@ class BoardFrame(tk.Frame):
         move, cap = choice
         if move[0] == 'move':
             frm, to = move[1], move[2]
-            self.animate_move(frm, to, self.ai.color)
-        self.state = self.state.apply_move(move, remove_pos=cap)
+            self.animate_move(frm, to, self.ai_color)
+        self.history.play(self.state, move, cap)
         self.draw_board()
         if move[0] == 'move':
             self.animate_glow([move[2]])
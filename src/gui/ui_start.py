@@ -16,6 +16,17 @@ PANEL_BG = "#3A1F0F" # panel background
 GOLD = "#FFD65C"
 IVORY = "#F7E7D0"
 
+# AI strength presets (AIPlayer limits). Node and depth budgets fix the
+# work per move; max_time is only a safety cap for very slow machines.
+# "engine": "mcts" presets use game.mcts.MCTSPlayer with a playout budget.
+AI_PRESETS = {
+    "Easy": {"max_nodes": 8000, "max_depth": 3, "max_time": 2.0},
+    "Medium": {"max_nodes": 30000, "max_depth": 0, "max_time": 5.0},
+    "Hard": {"max_nodes": 80000, "max_depth": 0, "max_time": 12.0},
+    "MCTS Medium": {"engine": "mcts", "max_playouts": 3000, "max_time": 5.0},
+    "MCTS Hard": {"engine": "mcts", "max_playouts": 10000, "max_time": 12.0},
+}
+
 
 class StartFrame(tk.Frame):
     def __init__(self, master, start_callback):
@@ -106,31 +117,12 @@ class StartFrame(tk.Frame):
         self.ai_level_combo = ttk.Combobox(
             panel, textvariable=self.ai_level_var,
             state="readonly",
-            values=["Easy", "Medium", "Hard"],
-            width=10,
+            values=list(AI_PRESETS),
+            width=12,
             font=("Segoe UI", 11)
         )
         self.ai_level_combo.grid(row=1, column=1, padx=10, pady=10)
 
-        # Max moves to win
-        lbl_maxwin = tk.Label(
-            panel, text="Max moves to win:",
-            bg=PANEL_BG, fg=IVORY,
-            font=("Segoe UI", 11)
-        )
-        lbl_maxwin.grid(row=2, column=0, padx=10, pady=10, sticky="w")
-
-        self.maxwin_spin = tk.Spinbox(
-            panel, from_=0, to=200, width=6,
-            font=("Segoe UI", 11),
-            bg="#FDF5E6",
-            fg="#24130F",
-            insertbackground="#24130F"
-        )
-        self.maxwin_spin.delete(0, "end")
-        self.maxwin_spin.insert(0, "20")
-        self.maxwin_spin.grid(row=2, column=1, padx=10, pady=10)
-
         # Buttons
         btn_frame = tk.Frame(container, bg=BG)
         btn_frame.pack(pady=40)
@@ -183,9 +175,4 @@ class StartFrame(tk.Frame):
 
         ai_level = self.ai_level_var.get() if mode == "ai" else None
 
-        try:
-            max_win_moves = int(self.maxwin_spin.get())
-        except Exception:
-            max_win_moves = 20
-
-        self.start_callback(mode, undo_limit, ai_level, max_win_moves)
\ No newline at end of file
+        self.start_callback(mode, undo_limit, ai_level)
\ No newline at end of file
@@ -2,6 +2,8 @@
 import tkinter as tk
 from gui.ui_start import StartFrame
 from gui.ui_board import BoardFrame
+from game.engine_host import EngineHost
+from gui.latency import LatencyMonitor
 
 class App(tk.Tk):
     def __init__(self):
@@ -10,6 +12,10 @@ class App(tk.Tk):
         self.geometry("520x620")
         self.resizable(False, False)
         self.current_frame = None
+        # one engine process per session, shared by every game
+        self.engine_host = EngineHost()
+        # UI latency instrumentation, only when NMM_LATENCY is set
+        self.latency = LatencyMonitor.from_env(self)
         self.show_start()
 
     def clear_frame(self):
@@ -17,15 +23,22 @@ class App(tk.Tk):
             self.current_frame.destroy()
             self.current_frame = None
 
+    def destroy(self):
+        self.engine_host.close()
+        if self.latency is not None:
+            self.latency.close()
+        super().destroy()
+
     def show_start(self):
         self.clear_frame()
         self.current_frame = StartFrame(self, start_callback=self.start_game)
         self.current_frame.pack(fill='both', expand=True)
 
-    def start_game(self, mode, undo_limit, ai_level=None, max_win_moves=0):
+    def start_game(self, mode, undo_limit, ai_level=None):
         self.clear_frame()
         self.current_frame = BoardFrame(self, mode=mode, back_callback=self.show_start,
-                                        undo_limit=undo_limit, ai_level=ai_level, max_win_moves=max_win_moves)
+                                        undo_limit=undo_limit, ai_level=ai_level, engine_host=self.engine_host,
+                                        latency=self.latency)
         self.current_frame.game_over_handled = False
         self.current_frame.pack(fill='both', expand=True)
 
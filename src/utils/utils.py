@@ -53,4 +53,62 @@ COORDS = {
 # Colors
 WHITE = 1
 BLACK = -1
-EMPTY = 0
\ No newline at end of file
+EMPTY = 0
+
+# Mills through each point: POINT_MILLS[p] = [(q, r), ...] for every mill (p, q, r)
+POINT_MILLS = {
+    p: [tuple(q for q in mill if q != p) for mill in MILLS if p in mill]
+    for p in range(24)
+}
+
+# Mill patterns: each mill's contents as a base-3 number, color c at its
+# k-th point adding c * 3**k, offset so that an empty mill is EMPTY_MILL_CODE
+# (codes 0..26). MILL_PLACES[p] = [(mill index, 3**k), ...] for point p.
+EMPTY_MILL_CODE = 13
+MILL_PLACES = {
+    p: [(m, 3 ** mill.index(p)) for m, mill in enumerate(MILLS) if p in mill]
+    for p in range(24)
+}
+
+
+def _board_symmetries():
+    """
+    The 16 symmetries of the board as point permutations (perm[i] is the
+    image of point i): rotations and reflections of the square, each with
+    or without swapping the inner and outer rings. Index 0 is the identity.
+    """
+    where = {xy: i for i, xy in COORDS.items()}
+    cx, cy = 200, 200
+
+    def permutation(fn):
+        return tuple(where[fn(*COORDS[i])] for i in range(24))
+
+    def rotate(x, y):
+        return cx - (y - cy), cy + (x - cx)
+
+    def mirror(x, y):
+        return 2 * cx - x, y
+
+    def swap_rings(x, y):
+        # distance 150 (outer) <-> 50 (inner) from the center, 100 stays
+        def flip(d):
+            return d if abs(d) not in (50, 150) else (200 - abs(d)) * (1 if d > 0 else -1)
+        return cx + flip(x - cx), cy + flip(y - cy)
+
+    perms = []
+    for ring in (False, True):
+        for mir in (False, True):
+            for rot in range(4):
+                def fn(x, y, ring=ring, mir=mir, rot=rot):
+                    if ring:
+                        x, y = swap_rings(x, y)
+                    if mir:
+                        x, y = mirror(x, y)
+                    for _ in range(rot):
+                        x, y = rotate(x, y)
+                    return x, y
+                perms.append(permutation(fn))
+    return perms
+
+
+SYMMETRIES = _board_symmetries()
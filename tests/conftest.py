@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# the game runs from src/ (python -m game.x); tests import the same way
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
@@ -0,0 +1,130 @@
+# tests/test_evaluators.py
+import random
+
+import pytest
+
+from game.ai import AIPlayer, DEFAULT_WEIGHTS
+from game.game import GameState
+from utils.utils import WHITE, BLACK
+
+WEIGHTS = dict(DEFAULT_WEIGHTS, piece=100, mobility=7, mill=31)
+
+
+def random_positions(count, seed=0, max_plies=250):
+    """
+    Positions from random games, placing, moving and flying ones.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = GameState()
+        for _ in range(rng.randrange(max_plies)):
+            if state.is_game_over()[0]:
+                break
+            move, cap, _ = rng.choice(list(state.iter_children()))
+            state.make_move(move, cap)
+        positions.append(state)
+    return positions
+
+
+POSITIONS = random_positions(300)
+
+
+def test_positions_cover_every_phase():
+    phases = {s.phase for s in POSITIONS}
+    assert phases == {'placing', 'moving'}
+    assert any(s.phase == 'moving' and 3 in (s.white_on_board, s.black_on_board) for s in POSITIONS)
+
+
+# ======================================================================
+# BATCH (NumPy)
+# ======================================================================
+def test_batch_matches_evaluate():
+    pytest.importorskip('numpy')
+    from game.batch_eval import boards_from_masks, evaluate_batch, masks_from_boards, pack_states
+
+    boards, placing = pack_states(POSITIONS)
+    for color in (WHITE, BLACK):
+        scores = evaluate_batch(boards, placing, color, WEIGHTS)
+        player = AIPlayer(color, weights=WEIGHTS)
+        assert [int(v) for v in scores] == [player.evaluate(s) for s in POSITIONS]
+
+    # bitmask packing round-trips
+    assert (boards_from_masks(*masks_from_boards(boards)) == boards).all()
+
+
+# ======================================================================
+# PATTERN TABLES
+# ======================================================================
+def test_patterns_match_evaluate():
+    from game.patterns import PatternEvaluator
+
+    patterns = PatternEvaluator(WEIGHTS)
+    for color in (WHITE, BLACK):
+        player = AIPlayer(color, weights=WEIGHTS)
+        for state in POSITIONS:
+            assert patterns.evaluate(state, color) == player.evaluate(state)
+
+
+def test_mill_codes_follow_make_unmake():
+    # the pattern tables read GameState.mill_codes, kept up to date incrementally
+    for state in POSITIONS[:50]:
+        state = state.clone()
+        for move, cap, _ in list(state.iter_children())[:5]:
+            undo = state.make_move(move, cap)
+            fresh = state.clone()
+            fresh.invalidate()
+            assert state.mill_codes == fresh.mill_codes
+            state.unmake_move(undo)
+
+
+# ======================================================================
+# NNUE
+# ======================================================================
+def random_net(seed=0):
+    np = pytest.importorskip('numpy')
+    from game.nnue import INPUTS, NNUEEvaluator
+
+    rng = np.random.default_rng(seed)
+    hidden = 16
+    return NNUEEvaluator(
+        rng.integers(-60, 60, (INPUTS, hidden)), rng.integers(-200, 200, hidden),
+        rng.integers(-60, 60, hidden), int(rng.integers(-500, 500)),
+    )
+
+
+def test_nnue_incremental_matches_refresh():
+    net = random_net()
+    rng = random.Random(1)
+    for state in POSITIONS[:60]:
+        state = state.clone()
+        net.prepare(state)
+        undos = []
+        for _ in range(12):
+            if state.is_game_over()[0]:
+                break
+            move, cap, _ = rng.choice(list(state.iter_children()))
+            undos.append(state.make_move(move, cap))
+            assert (state.accumulator.values == net.refresh(state).values).all()
+        while undos:
+            state.unmake_move(undos.pop())
+            assert (state.accumulator.values == net.refresh(state).values).all()
+
+
+def test_nnue_through_aiplayer():
+    net = random_net()
+    rng = random.Random(2)
+    for state in POSITIONS:
+        state = state.clone()
+        net.prepare(state)
+        for _ in range(3):
+            if state.is_game_over()[0]:
+                break
+            move, cap, _ = rng.choice(list(state.iter_children()))
+            state.make_move(move, cap)
+        fresh = state.clone()
+        fresh.accumulator = None
+        for color in (WHITE, BLACK):
+            # the incrementally updated accumulator scores like a fresh one
+            assert AIPlayer(color, evaluator=net).evaluate(state) == net.evaluate(fresh, color)
+        assert net.evaluate(fresh, WHITE) == -net.evaluate(fresh, BLACK)
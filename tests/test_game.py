@@ -0,0 +1,158 @@
+# tests/test_game.py
+import random
+
+from game.game import GameState
+from game.history import MoveHistory
+
+
+def snapshot(state):
+    return (
+        state.board[:], state.current, state.phase,
+        state.white_unplaced, state.black_unplaced, state.placed_white, state.placed_black,
+        state.captured_white, state.captured_black,
+        state.white_on_board, state.black_on_board, state.mill_codes[:],
+        state.quiet_plies, state.trail,
+    )
+
+
+def random_line(seed, plies=200):
+    """
+    (move, cap) list of a random game from the start.
+    """
+    rng = random.Random(seed)
+    state = GameState()
+    line = []
+    for _ in range(plies):
+        if state.is_game_over()[0]:
+            break
+        move, cap, _ = rng.choice(list(state.iter_children()))
+        state.make_move(move, cap)
+        line.append((move, cap))
+    return line
+
+
+# ======================================================================
+# MAKE / UNMAKE
+# ======================================================================
+def test_make_unmake_round_trip():
+    for seed in range(20):
+        state = GameState()
+        undos = []
+        snapshots = []
+        for move, cap in random_line(seed):
+            snapshots.append(snapshot(state))
+            undos.append(state.make_move(move, cap))
+            # counters kept by make_move match a recount from the board
+            fresh = state.clone()
+            fresh.invalidate()
+            assert fresh.mill_codes == state.mill_codes
+            assert fresh.white_on_board == state.white_on_board
+            assert fresh.black_on_board == state.black_on_board
+        while undos:
+            state.unmake_move(undos.pop())
+            assert snapshot(state) == snapshots.pop()
+
+
+def test_history_undo_redo_matches_replay():
+    rng = random.Random(7)
+    for _ in range(10):
+        state = GameState()
+        history = MoveHistory(state, max_plies=30)
+        for _ in range(150):
+            r = rng.random()
+            if r < 0.2 and history.can_undo():
+                history.undo(state)
+            elif r < 0.3 and history.can_redo():
+                history.redo(state)
+            elif state.is_game_over()[0]:
+                break
+            else:
+                move, cap, _ = rng.choice(list(state.iter_children()))
+                history.play(state, move, cap)
+            replay = history.current_state()
+            assert snapshot(replay)[:12] == snapshot(state)[:12]
+            assert replay.quiet_plies == state.quiet_plies
+            assert replay.repetition_count() == state.repetition_count()
+
+
+# ======================================================================
+# RECORDS
+# ======================================================================
+def test_record_round_trip(tmp_path):
+    from game.record import DRAW, GameRecord, read_records, write_records
+
+    records = []
+    finals = []
+    for seed in range(12):
+        state = GameState()
+        state.repetition_limit = 3
+        state.quiet_move_limit = 40
+        history = MoveHistory(state)
+        rng = random.Random(seed)
+        for _ in range(300):
+            if state.is_game_over()[0]:
+                break
+            move, cap, _ = rng.choice(list(state.iter_children()))
+            history.play(state, move, cap)
+        records.append(GameRecord.from_history(history, state))
+        finals.append(state)
+    assert any(r.result == DRAW for r in records)
+
+    for compression in (None, 'gzip'):
+        path = tmp_path / f'games-{compression}.nmm'
+        write_records(path, records, compression=compression)
+        loaded = list(read_records(path))
+        assert len(loaded) == len(records)
+        for record, back, final in zip(records, loaded, finals):
+            assert back.result == record.result
+            assert list(back.plies) == list(record.plies)
+            _, state = back.to_history()
+            assert snapshot(state)[:12] == snapshot(final)[:12]
+            assert state.is_game_over() == final.is_game_over()
+
+
+def test_record_keeps_draw_rules_of_a_later_start(tmp_path):
+    from game.record import GameRecord, read_records, write_records
+
+    start = GameState()
+    for move, cap in random_line(3, plies=24):
+        start.make_move(move, cap)
+    start.quiet_move_limit = 50
+    start.repetition_limit = 3
+    start.quiet_plies = 7
+    path = tmp_path / 'later.nmm'
+    write_records(path, [GameRecord(start)])
+    back = next(iter(read_records(path))).start
+    assert snapshot(back)[:13] == snapshot(start)[:13]
+    assert (back.repetition_limit, back.quiet_move_limit) == (3, 50)
+
+
+# ======================================================================
+# NOTATION
+# ======================================================================
+def test_notation_round_trip():
+    for seed in range(20):
+        state = GameState()
+        if seed % 2:
+            state.repetition_limit = 3
+            state.quiet_move_limit = 50
+        for move, cap in random_line(seed, plies=random.Random(seed).randrange(60)):
+            state.make_move(move, cap)
+        back = GameState.from_notation(state.to_notation())
+        assert back.to_notation() == state.to_notation()
+        assert snapshot(back)[:13] == snapshot(state)[:13]
+        assert (back.repetition_limit, back.quiet_move_limit) == (
+            state.repetition_limit, state.quiet_move_limit)
+        assert sorted(back.legal_moves()) == sorted(state.legal_moves())
+
+
+def test_notation_start_position():
+    assert GameState().to_notation() == '8/8/8 w p 9/9 0/0'
+    assert snapshot(GameState.from_notation('8/8/8 w p 9/9 0/0')) == snapshot(GameState())
+
+
+def test_move_text_round_trip():
+    from game.notation import move_from_text, move_to_text
+
+    for move, cap in random_line(5):
+        assert move_from_text(move_to_text(move, cap)) == (move, cap)
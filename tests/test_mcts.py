@@ -0,0 +1,25 @@
+# tests/test_mcts.py
+from game.game import GameState
+from game.mcts import MCTSPlayer, _root_worker
+
+
+def test_zero_budget_returns_a_legal_move():
+    for policy in ('puct', 'uct'):
+        state = GameState()
+        player = MCTSPlayer(max_time=1e-9, max_playouts=0, policy=policy)
+        move, cap = player.choose_move(state)
+        assert move in state.legal_moves()
+        assert cap is None
+        assert player.score is None
+
+
+def test_root_worker_with_zero_budget():
+    counts = _root_worker(GameState().to_notation(), {}, 1, 0, 1e-9)
+    assert len(counts) == 24
+
+
+def test_playout_limit_is_deterministic():
+    state = GameState()
+    moves = [MCTSPlayer(max_playouts=100, seed=3).choose_move(state) for _ in range(2)]
+    assert moves[0] == moves[1]
+    assert moves[0][0] in state.legal_moves()
@@ -0,0 +1,56 @@
+# tests/test_shared_tt.py
+import pytest
+
+from game.ai import AIPlayer, DEFAULT_WEIGHTS, EXACT, LOWER, UPPER
+from game.game import GameState
+from game.shared_tt import SharedTT, stress
+from utils.utils import WHITE, BLACK
+
+
+@pytest.fixture
+def table():
+    table = SharedTT(entries=1 << 10)
+    yield table
+    table.close()
+
+
+def test_entries_round_trip_for_both_roles(table):
+    key = GameState().position_key()
+    entries = [
+        (120, None, EXACT, (('place', 4), None)),
+        (-35, None, LOWER, (('move', 3, 4), 17)),
+        (999990, 9, UPPER, None),
+    ]
+    for depth, entry in enumerate(entries, 1):
+        for maximizing in (True, False):
+            table[key + (depth, maximizing)] = entry
+            assert table.get(key + (depth, maximizing)) == entry
+    assert table.get(key + (9, True)) is None
+
+
+def test_scores_are_shared_between_colors(table):
+    # stored from the side to move's view: the other role sees it negated
+    key = GameState().position_key() + (3,)
+    table[key + (True,)] = (50, None, LOWER, None)
+    assert table.get(key + (False,)) == (-50, None, UPPER, None)
+
+
+def test_other_evaluation_settings_are_refused(table):
+    AIPlayer(WHITE, shared_tt=table, weights=DEFAULT_WEIGHTS)
+    AIPlayer(BLACK, shared_tt=table, weights=DEFAULT_WEIGHTS)
+    with pytest.raises(ValueError):
+        AIPlayer(WHITE, shared_tt=table, weights=dict(DEFAULT_WEIGHTS, mill=1))
+
+
+def test_search_with_shared_table(table):
+    state = GameState()
+    player = AIPlayer(WHITE, max_time=0, max_depth=3, shared_tt=table, weights=DEFAULT_WEIGHTS)
+    move, _ = player.choose_move(state)
+    assert move in state.legal_moves()
+    assert table.fill() > 0
+
+
+def test_concurrent_writers_never_corrupt():
+    reads, writes, hits, corrupt = stress(processes=2, seconds=0.5, keys=2000)
+    assert writes and hits
+    assert corrupt == 0